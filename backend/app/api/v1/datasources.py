@@ -1,20 +1,51 @@
-from fastapi import APIRouter, HTTPException
+import logging
 
-from app.schemas import DataSourceCreate, DataSourceResponse, DataResult
-from app.db.supabase import get_supabase_client
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.v1.pagination import page_response, page_responses, paginate, select_columns
+from app.schemas import DataSourceCreate, DataSourceResponse, DataSourceSummary, DataResult
+from app.db.client import get_db_client
+from app.connectors.base import FetchError
 from app.connectors.registry import ConnectorRegistry
+from app.services import ndjson
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+DATASOURCE_COLUMNS = frozenset(
+    {"id", "name", "type", "config", "field_mappings", "user_id", "is_active",
+     "last_synced_at", "created_at"}
+)
+# Connection configs and mappings are only needed when editing a single data source
+DATASOURCE_LIST_COLUMNS = DATASOURCE_COLUMNS - {"config", "field_mappings"}
+# Streamed records are sent in chunks of about this many bytes
+STREAM_CHUNK_BYTES = 64 * 1024
 
-@router.get("/", response_model=list[DataSourceResponse])
+
+@router.get("/", responses=page_responses(DataSourceSummary))
 async def list_datasources(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns to return"),
     user_id: str = "demo-user",
 ):
-    """List all data sources for the current user."""
-    client = get_supabase_client()
-    response = client.table("data_sources").select("*").eq("user_id", user_id).execute()
-    return response.data
+    """
+    List data sources for the current user, newest first.
+
+    Paginated like templates; `config` and `field_mappings` are only included when
+    named in `fields`.
+    """
+    client = get_db_client()
+    query = (
+        client.table("data_sources")
+        .select(select_columns(fields, DATASOURCE_COLUMNS, DATASOURCE_LIST_COLUMNS))
+        .eq("user_id", user_id)
+    )
+    response = paginate(query, limit, cursor).execute()
+    return page_response(request, response.data, limit)
 
 
 @router.post("/", response_model=DataSourceResponse)
@@ -23,7 +54,7 @@ async def create_datasource(
     user_id: str = "demo-user",
 ):
     """Create a new data source."""
-    client = get_supabase_client()
+    client = get_db_client()
     response = (
         client.table("data_sources")
         .insert(
@@ -46,7 +77,7 @@ async def get_datasource(
     user_id: str = "demo-user",
 ):
     """Get a data source by ID."""
-    client = get_supabase_client()
+    client = get_db_client()
     response = (
         client.table("data_sources")
         .select("*")
@@ -66,7 +97,7 @@ async def test_datasource(
     user_id: str = "demo-user",
 ):
     """Test a data source connection."""
-    client = get_supabase_client()
+    client = get_db_client()
     response = (
         client.table("data_sources")
         .select("*")
@@ -96,7 +127,7 @@ async def fetch_from_datasource(
     user_id: str = "demo-user",
 ):
     """Fetch data from a data source."""
-    client = get_supabase_client()
+    client = get_db_client()
     response = (
         client.table("data_sources")
         .select("*")
@@ -114,13 +145,71 @@ async def fetch_from_datasource(
     return result
 
 
+@router.post("/{datasource_id}/fetch/stream")
+async def stream_from_datasource(
+    datasource_id: str,
+    query: dict = {},
+    user_id: str = "demo-user",
+):
+    """
+    Fetch data from a data source as NDJSON, one record per line.
+
+    Records are encoded as the connector yields them instead of being collected
+    into a `DataResult`, so memory stays flat however large the result. A fetch
+    that fails before the first record is a 502 with the connector's errors; one
+    that fails later cuts the response off without its final chunk, so clients
+    can't mistake a partial result for a complete one.
+    """
+    client = get_db_client()
+    response = (
+        client.table("data_sources")
+        .select("*")
+        .eq("id", datasource_id)
+        .eq("user_id", user_id)
+        .single()
+        .execute()
+    )
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    connector = ConnectorRegistry.create(response.data)
+    records = connector.stream_records(query)
+    # Wait for the first record so failures to connect still get an error status
+    try:
+        first = [await anext(records)]
+    except StopAsyncIteration:
+        first = []
+    except FetchError as e:
+        raise HTTPException(status_code=502, detail=e.errors)
+
+    async def body():
+        chunk = bytearray()
+        try:
+            for record in first:
+                chunk += ndjson.dumps_line(record)
+            async for record in records:
+                chunk += ndjson.dumps_line(record)
+                if len(chunk) >= STREAM_CHUNK_BYTES:
+                    yield bytes(chunk)
+                    chunk.clear()
+            if chunk:
+                yield bytes(chunk)
+        except FetchError:
+            logger.warning("Streaming data source %s failed", datasource_id, exc_info=True)
+            raise
+        finally:
+            await records.aclose()
+
+    return StreamingResponse(body(), media_type=ndjson.MEDIA_TYPE)
+
+
 @router.delete("/{datasource_id}")
 async def delete_datasource(
     datasource_id: str,
     user_id: str = "demo-user",
 ):
     """Delete a data source."""
-    client = get_supabase_client()
+    client = get_db_client()
     client.table("data_sources").delete().eq("id", datasource_id).eq(
         "user_id", user_id
     ).execute()
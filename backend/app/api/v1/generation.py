@@ -1,11 +1,56 @@
-from fastapi import APIRouter, HTTPException, Depends
-from uuid import uuid4
+import asyncio
+import json
+import logging
+from contextlib import AsyncExitStack
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from uuid import UUID, uuid4
 
-from app.schemas import GenerateRequest, GenerateResponse, PDFOptions
-from app.db.supabase import get_supabase_client
-from app.dependencies import get_pdf_engine
+from pydantic import ValidationError
+
+from app.schemas import (
+    BulkGenerateResponse,
+    BulkGenerateResult,
+    DataSourceBinding,
+    GenerateRequest,
+    GenerateResponse,
+    PDFOptions,
+    PreviewOptions,
+    PreviewResponse,
+)
+from app.db.client import get_db_client
+from app.dependencies import (
+    get_audit_writer,
+    get_native_renderer,
+    get_pdf_engine,
+    get_template_builder,
+)
+from app.templates.cache import get_template_cache
 from app.templates.compiler import TemplateCompiler
-from app.connectors.registry import ConnectorRegistry
+from app.templates.fields import template_data_paths
+from app.templates.preview import PreviewSession
+from app.config import get_settings
+from app.connectors.columnar import columnarize, digest
+from app.metrics import RENDERS, stage
+from app.pdf.optimize import optimize_pdf
+from app.pdf.scheduler import RenderPriority
+from app.services import ndjson
+from app.services.data import DataSourceError, lookup_datasources, resolve_data
+from app.services.ingest import (
+    MAX_FIELD_BYTES,
+    IngestError,
+    RecordError,
+    RecordParser,
+    iter_multipart,
+    map_record,
+    upload_format,
+)
+from app.services.pipeline import StageGraph
+from app.services.singleflight import SingleFlight
+from app.storage import get_storage_backend
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -13,86 +58,447 @@ router = APIRouter()
 @router.post("/", response_model=GenerateResponse)
 async def generate_pdf(
     request: GenerateRequest,
+    user_id: str = "demo-user",  # TODO: Get from auth
 ):
-    """Generate a PDF from a template with data."""
-    client = get_supabase_client()
+    """
+    Generate a PDF from a template with data.
+
+    Runs as two stage graphs so independent I/O overlaps. The first resolves
+    the request: the template and data source lookups run together, and the
+    fetch waits for the template so connectors only request the fields it
+    reads. Several data sources are fetched concurrently and merged into one
+    data context; optional ones that fail are reported in `data_errors`. The
+    second produces the PDF: a browser page is checked out while the template
+    compiles, with long tables handed to the compiler column by column.
+    Templates the native renderer supports skip the HTML compile and the
+    browser altogether.
+
+    Identical requests from one user (same template version, data, options and
+    priority) arriving while one is being produced wait for it and share its
+    job and PDF. Browser pages are queued by `request.priority`, fairly between
+    users.
+    """
+    client = get_db_client()
     pdf_engine = get_pdf_engine()
+    native_renderer = get_native_renderer()
+    storage = get_storage_backend()
     compiler = TemplateCompiler()
+    options = request.options or PDFOptions()
+    priority = RenderPriority[request.priority.upper()]
+    columnar_min_rows = get_settings().columnar_min_rows
+    coalesce = get_settings().coalesce_generate_requests
+    job_id = str(uuid4())
+    file_path = _pdf_path(job_id)
 
-    # 1. Get template
-    template_response = (
-        client.table("templates").select("*").eq("id", request.template_id).single().execute()
-    )
-    if not template_response.data:
-        raise HTTPException(status_code=404, detail="Template not found")
+    async def template_lookup():
+        response = await asyncio.to_thread(
+            lambda: (
+                client.table("templates")
+                .select("*")
+                .eq("id", request.template_id)
+                .single()
+                .execute()
+            )
+        )
+        if not response.data:
+            raise HTTPException(status_code=404, detail="Template not found")
+        return response.data
 
-    template = template_response.data
+    # The single `datasource_id` form is an optional source merged into the top level
+    bindings = list(request.datasources or [])
+    if request.datasource_id:
+        bindings.insert(
+            0,
+            DataSourceBinding(
+                datasource_id=request.datasource_id,
+                query=request.datasource_query,
+                required=False,
+            ),
+        )
+    data_errors: list[str] = []
 
-    # 2. Resolve data
-    data = request.data or {}
+    async def datasource_lookup():
+        return await lookup_datasources(client, bindings)
 
-    if request.datasource_id:
-        # Fetch data from connector
-        datasource_response = (
-            client.table("data_sources")
-            .select("*")
-            .eq("id", request.datasource_id)
-            .single()
-            .execute()
+    def template_nodes(template: dict) -> dict | None:
+        """The template's parsed Craft.js node map; None for simple or invalid templates."""
+        editor_state = template["template_json"].get("editorState")
+        if not editor_state or not isinstance(editor_state, str):
+            return None
+        try:
+            nodes = get_template_cache().nodes(
+                template["id"], str(template["updated_at"]), editor_state
+            )
+        except json.JSONDecodeError:
+            return None
+        return nodes if isinstance(nodes, dict) else None
+
+    async def connector_fetch(datasource_lookup, template_lookup):
+        nodes = await asyncio.to_thread(template_nodes, template_lookup)
+        data = request.data or {}
+        if bindings:
+            # Only fetch what the template reads
+            paths = await asyncio.to_thread(
+                template_data_paths, template_lookup["template_json"], nodes
+            )
+            try:
+                data, errors = await resolve_data(
+                    bindings, datasource_lookup, data, paths, get_settings().datasource_timeout
+                )
+            except DataSourceError as e:
+                raise HTTPException(status_code=502, detail=e.errors) from e
+            data_errors.extend(errors)
+        if nodes and columnar_min_rows is not None:
+            data = await asyncio.to_thread(
+                columnarize, data, compiler._table_paths(nodes), columnar_min_rows
+            )
+        return data
+
+    def compile_cached(template: dict, data: dict) -> str:
+        template_json = template["template_json"]
+        nodes = template_nodes(template)
+        if nodes is None:
+            return compiler.compile(template_json, data)
+        return compiler.compile_nodes(nodes, template_json.get("pageSettings", {}), data)
+
+    async def render_plan(template_lookup):
+        """The node map to render natively, or None to render HTML in the browser."""
+        if native_renderer is None:
+            return None
+        nodes = await asyncio.to_thread(template_nodes, template_lookup)
+        if nodes is None or not native_renderer.supports(nodes, options):
+            return None
+        return nodes
+
+    async def request_key(template_lookup, connector_fetch):
+        """What makes two requests produce the same PDF: template version, data and options."""
+        if not coalesce:
+            return None
+        return (
+            user_id,  # Jobs are never shared across users
+            priority,
+            template_lookup["id"],
+            str(template_lookup["updated_at"]),
+            await asyncio.to_thread(digest, connector_fetch),
+            options.model_dump_json(),
         )
-        if datasource_response.data:
-            connector = ConnectorRegistry.create(datasource_response.data)
-            result = await connector.fetch_data(request.datasource_query or {})
-            if result.success:
-                data = result.data if isinstance(result.data, dict) else {"items": result.data}
 
-    # 3. Compile template to HTML
-    html_content = compiler.compile(template["template_json"], data)
+    resolve = StageGraph()
+    resolve.add("template_lookup", template_lookup)
+    resolve.add("datasource_lookup", datasource_lookup)
+    resolve.add("connector_fetch", connector_fetch, after=("datasource_lookup", "template_lookup"))
+    resolve.add("render_plan", render_plan, after=("template_lookup",))
+    resolve.add("request_key", request_key, after=("template_lookup", "connector_fetch"))
+    resolved = await resolve.run()
+    template = resolved["template_lookup"]
+    data = resolved["connector_fetch"]
+    nodes = resolved["render_plan"]
 
-    # 4. Generate PDF
-    options = request.options or PDFOptions()
-    pdf_bytes = await pdf_engine.generate_pdf(html_content, options)
+    async def compile_html():
+        artifact = await get_template_builder().artifact_for(template)
+        if artifact is not None:
+            return await asyncio.to_thread(artifact.render, compiler, data)
+        return await asyncio.to_thread(compile_cached, template, data)
 
-    # 5. Upload to Supabase Storage
-    job_id = str(uuid4())
-    file_path = f"pdfs/{job_id}.pdf"
+    async def produce() -> GenerateResponse:
+        async with AsyncExitStack() as resources:
+
+            async def compile_template():
+                if nodes is not None:
+                    return None  # Rendered from the node map instead
+                return await compile_html()
+
+            async def page_checkout():
+                if nodes is not None:
+                    return None
+                return await resources.enter_async_context(pdf_engine.page(priority, user_id))
+
+            async def render(page_checkout, compile):
+                if nodes is None:
+                    RENDERS.labels(renderer="browser").inc()
+                    return await pdf_engine.render_pdf(page_checkout, compile, options)
+                try:
+                    pdf_bytes = await asyncio.to_thread(
+                        native_renderer.render, nodes, data, options
+                    )
+                except Exception:
+                    logger.warning(
+                        "Native render failed for job %s; falling back to the browser",
+                        job_id,
+                        exc_info=True,
+                    )
+                else:
+                    RENDERS.labels(renderer="native").inc()
+                    return pdf_bytes
+                RENDERS.labels(renderer="native_fallback").inc()
+                page = await resources.enter_async_context(pdf_engine.page(priority, user_id))
+                return await pdf_engine.render_pdf(page, await compile_html(), options)
+
+            async def pdf_optimize(render):
+                await resources.aclose()  # Hand the page back before post-processing
+                if options.optimize is None:
+                    return render, None
+                try:
+                    return await asyncio.to_thread(optimize_pdf, render, options.optimize)
+                except Exception:
+                    logger.warning(
+                        "PDF optimization failed for job %s; keeping the rendered file",
+                        job_id,
+                        exc_info=True,
+                    )
+                    return render, None
+
+            async def upload(pdf_optimize):
+                await storage.upload(file_path, pdf_optimize[0], "application/pdf")
+
+            graph = StageGraph()
+            graph.add("compile", compile_template)
+            graph.add("page_checkout", page_checkout)
+            graph.add("render", render, after=("page_checkout", "compile"))
+            graph.add("pdf_optimize", pdf_optimize, after=("render",))
+            graph.add("upload", upload, after=("pdf_optimize",))
+            results = await graph.run()
+
+        # Record in database (batched in the background)
+        await get_audit_writer().record(
+            {
+                "id": job_id,
+                "user_id": user_id,
+                "template_id": request.template_id,
+                "data_source_id": request.datasource_id,
+                "storage_path": file_path,
+                "status": "completed",
+                "input_data": data,  # Tables stay columnar until the writer encodes them
+                "pdf_options": options.model_dump(),
+            }
+        )
+
+        pdf_bytes, optimization = results["pdf_optimize"]
+        download_url = storage.get_public_url(file_path)
+        return GenerateResponse(
+            job_id=job_id,
+            status="completed",
+            download_url=download_url,
+            size_bytes=len(pdf_bytes),
+            optimization=optimization,
+            data_errors=data_errors,
+        )
+
+    if resolved["request_key"] is None:
+        return await produce()
+    # Identical requests in flight share one render, upload and job
+    response, _ = await get_generate_flights().do(resolved["request_key"], produce)
+    return response
+
+
+def _pdf_path(job_id: str) -> str:
+    """Where a job's PDF is stored."""
+    return f"pdfs/{job_id}.pdf"
+
+
+@lru_cache
+def get_generate_flights() -> SingleFlight:
+    """In-flight `generate_pdf` calls, shared by identical requests."""
+    return SingleFlight("generate")
 
-    storage_response = client.storage.from_("generated-pdfs").upload(
-        file_path, pdf_bytes, {"content-type": "application/pdf"}
+
+@router.post("/bulk", response_model=BulkGenerateResponse)
+async def generate_bulk(
+    http_request: Request,
+    user_id: str = "demo-user",  # TODO: Get from auth
+):
+    """
+    Generate one PDF per record of an uploaded CSV or NDJSON file.
+
+    The multipart/form-data body has `template_id` and optionally `options`
+    (PDFOptions as JSON), `field_mappings` (JSON list of `sourceField`,
+    `templateField` and `type`) and `format` ("csv" or "ndjson"; otherwise told
+    from the file), all before the `file` part. Each record, coerced and mapped
+    by `field_mappings`, is the data for one `generate_pdf` at batch priority.
+
+    The upload is parsed as it arrives and `bulk_generate_concurrency` records
+    are generated at a time; reading waits while they are busy, so memory holds
+    a few records however large the file. Records that can't be parsed or fail
+    to generate are reported by row and the rest carry on.
+    """
+    client = get_db_client()
+    concurrency = max(1, get_settings().bulk_generate_concurrency)
+    queue: asyncio.Queue[tuple[int, dict | RecordError] | None] = asyncio.Queue(concurrency)
+    results: list[BulkGenerateResult] = []
+    fields: dict[str, str] = {}
+    field_value = bytearray()
+    parser: RecordParser | None = None
+    workers: list[asyncio.Task] = []
+    rows = 0
+    error = None
+
+    async def start(file_part) -> RecordParser:
+        """Check the form fields and start the workers once the file begins."""
+        template_id = fields.get("template_id")
+        if not template_id:
+            raise HTTPException(status_code=400, detail="template_id must come before the file")
+        try:
+            options = PDFOptions.model_validate_json(fields.get("options") or "{}")
+            field_mappings = ndjson.loads(fields.get("field_mappings") or "[]")
+        except (ValidationError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=str(e)) from e
+        if not isinstance(field_mappings, list) or not all(
+            isinstance(mapping, dict) for mapping in field_mappings
+        ):
+            raise HTTPException(status_code=422, detail="field_mappings must be a list of objects")
+        template = await asyncio.to_thread(
+            lambda: client.table("templates").select("id").eq("id", template_id).limit(1).execute()
+        )
+        if not template.data:
+            raise HTTPException(status_code=404, detail="Template not found")
+
+        async def generate_records():
+            while (item := await queue.get()) is not None:
+                row, record = item
+                results.append(
+                    await _generate_record(
+                        row, record, template_id, options, field_mappings, user_id
+                    )
+                )
+
+        workers.extend(asyncio.create_task(generate_records()) for _ in range(concurrency))
+        return RecordParser(upload_format(file_part, fields.get("format")))
+
+    try:
+        content_type = http_request.headers.get("content-type", "")
+        async for part, chunk in iter_multipart(content_type, http_request.stream()):
+            if part.filename is None:
+                if chunk is not None:
+                    field_value.extend(chunk)
+                    if len(field_value) > MAX_FIELD_BYTES:
+                        raise IngestError(f"Form field {part.name} is too large")
+                else:
+                    fields[part.name] = field_value.decode()
+                    field_value.clear()
+                continue
+            if parser is None:
+                parser = await start(part)
+            for record in parser.feed(chunk or b"", final=chunk is None):
+                rows += 1
+                await queue.put((rows, record))  # Waits while the workers are busy
+            if chunk is None:
+                break  # Anything after the file is ignored
+    except IngestError as e:
+        if parser is None:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        error = str(e)
+    except BaseException:
+        for worker in workers:
+            worker.cancel()
+        raise
+    if parser is None:
+        raise HTTPException(status_code=400, detail="No file in the upload")
+
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+
+    results.sort(key=lambda result: result.row)
+    completed = sum(result.status == "completed" for result in results)
+    return BulkGenerateResponse(
+        total=len(results),
+        completed=completed,
+        failed=len(results) - completed,
+        results=results,
+        error=error,
     )
 
-    # Get public URL
-    download_url = client.storage.from_("generated-pdfs").get_public_url(file_path)
 
-    # 6. Record in database
-    client.table("generated_pdfs").insert(
-        {
-            "id": job_id,
-            "user_id": "demo-user",  # TODO: Get from auth
-            "template_id": request.template_id,
-            "data_source_id": request.datasource_id,
-            "storage_path": file_path,
-            "status": "completed",
-            "input_data": data,
-            "pdf_options": options.model_dump(),
-        }
-    ).execute()
+async def _generate_record(
+    row: int,
+    record: dict | RecordError,
+    template_id: str,
+    options: PDFOptions,
+    field_mappings: list[dict],
+    user_id: str,
+) -> BulkGenerateResult:
+    """Generate one uploaded record's PDF, reporting failures instead of raising."""
+    try:
+        if isinstance(record, RecordError):
+            raise record
+        response = await generate_pdf(
+            GenerateRequest(
+                template_id=template_id,
+                data=map_record(record, field_mappings),
+                options=options,
+                priority="batch",
+            ),
+            user_id,
+        )
+    except RecordError as e:
+        return BulkGenerateResult(row=row, status="failed", error=str(e))
+    except HTTPException as e:
+        detail = "; ".join(e.detail) if isinstance(e.detail, list) else str(e.detail)
+        return BulkGenerateResult(row=row, status="failed", error=detail)
+    except Exception as e:
+        logger.warning("Bulk record %d failed", row, exc_info=True)
+        return BulkGenerateResult(row=row, status="failed", error=str(e))
+    return BulkGenerateResult(
+        row=row,
+        status="completed",
+        job_id=response.job_id,
+        download_url=response.download_url,
+    )
 
-    return GenerateResponse(job_id=job_id, status="completed", download_url=download_url)
 
+@router.get("/{job_id}/download")
+async def download_pdf(
+    job_id: str,
+):
+    """Stream a generated PDF from storage."""
+    try:
+        UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Generated PDF not found") from None
 
-@router.post("/preview")
+    client = get_db_client()
+    response = await asyncio.to_thread(
+        lambda: (
+            client.table("generated_pdfs")
+            .select("storage_path")
+            .eq("id", job_id)
+            .limit(1)
+            .execute()
+        )
+    )
+    # A just-finished job's record may still be queued in the audit writer; its
+    # PDF is already stored under the job id
+    storage_path = response.data[0]["storage_path"] if response.data else _pdf_path(job_id)
+
+    # Opened before responding, so a missing file is a 404 rather than a broken stream
+    chunks = await get_storage_backend().open_stream(storage_path)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Generated PDF not found")
+    return StreamingResponse(
+        chunks,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'inline; filename="{job_id}.pdf"'},
+    )
+
+
+@router.post("/preview", response_model=PreviewResponse)
 async def preview_template(
     request: GenerateRequest,
 ):
-    """Generate HTML preview of a template."""
-    client = get_supabase_client()
-    compiler = TemplateCompiler()
+    """
+    Generate HTML preview of a template.
+
+    Large data is sampled according to `request.preview` (defaults apply when it
+    is omitted); the response reports what was left out.
+    """
+    client = get_db_client()
+    compiler = TemplateCompiler(preview=request.preview or PreviewOptions())
 
     # Get template
-    template_response = (
-        client.table("templates").select("*").eq("id", request.template_id).single().execute()
-    )
+    with stage("template_lookup"):
+        template_response = (
+            client.table("templates").select("*").eq("id", request.template_id).single().execute()
+        )
     if not template_response.data:
         raise HTTPException(status_code=404, detail="Template not found")
 
@@ -100,6 +506,106 @@ async def preview_template(
     data = request.data or {}
 
     # Compile to HTML
-    html_content = compiler.compile(template["template_json"], data)
+    with stage("compile"):
+        html_content = await asyncio.to_thread(compiler.compile, template["template_json"], data)
+
+    return PreviewResponse(
+        html=html_content, truncated=bool(compiler.elided), elided=compiler.elided
+    )
+
+
+@router.websocket("/preview/ws")
+async def preview_session(websocket: WebSocket):
+    """
+    Incremental live preview for the template editor.
+
+    Client messages:
+        {"type": "init", "template_id": "...", "data": {...}, "preview": {...}}
+        {"type": "init", "template_json": {...}, "data": {...}}  # unsaved editor state
+        {"type": "patch", "nodes": {"<node id>": <serialized node> | null}}
+        {"type": "data", "data": {...}}
+
+    Server messages:
+        {"type": "document", "html": "...", "elided": {...}}  # after init and data changes
+        {"type": "patch", "patches": [{"id": "<node id>", "html": "..."}]}
+        {"type": "error", "detail": "..."}
+    """
+    await websocket.accept()
+    session: PreviewSession | None = None
+
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            try:
+                message = json.loads(frame.get("text") or frame.get("bytes") or "")
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json(
+                    {"type": "error", "detail": "Messages must be JSON objects"}
+                )
+                continue
+            try:
+                message_type = message.get("type")
+
+                if message_type == "init":
+                    template_json = message.get("template_json")
+                    if template_json is None:
+                        client = get_db_client()
+                        response = await asyncio.to_thread(
+                            lambda: (
+                                client.table("templates")
+                                .select("template_json")
+                                .eq("id", message.get("template_id"))
+                                .single()
+                                .execute()
+                            )
+                        )
+                        if not response.data:
+                            await websocket.send_json(
+                                {"type": "error", "detail": "Template not found"}
+                            )
+                            continue
+                        template_json = response.data["template_json"]
+
+                    compiler = TemplateCompiler(
+                        preview=PreviewOptions(**(message.get("preview") or {}))
+                    )
+                    # Compiles run in a thread so a slow template can't stall other requests
+                    with stage("compile"):
+                        session = await asyncio.to_thread(
+                            PreviewSession, template_json, message.get("data") or {}, compiler
+                        )
+                        html = await asyncio.to_thread(session.render_document)
+                    await websocket.send_json(
+                        {"type": "document", "html": html, "elided": compiler.elided}
+                    )
+
+                elif session is None:
+                    await websocket.send_json({"type": "error", "detail": "Send init first"})
+
+                elif message_type == "patch":
+                    with stage("compile"):
+                        patches = await asyncio.to_thread(
+                            session.apply_patch, message.get("nodes") or {}
+                        )
+                    await websocket.send_json({"type": "patch", "patches": patches})
+
+                elif message_type == "data":
+                    with stage("compile"):
+                        html = await asyncio.to_thread(session.set_data, message.get("data") or {})
+                    await websocket.send_json(
+                        {"type": "document", "html": html, "elided": session.compiler.elided}
+                    )
 
-    return {"html": html_content}
+                else:
+                    await websocket.send_json(
+                        {"type": "error", "detail": f"Unknown message type: {message_type}"}
+                    )
+            except (ValueError, TypeError, AttributeError, RecursionError) as e:
+                # Malformed template or message: report it and keep the session open
+                await websocket.send_json({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
@@ -1,20 +1,57 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import json
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from typing import Any
 
-from app.schemas import TemplateCreate, TemplateUpdate, TemplateResponse
-from app.db.supabase import get_supabase_client
+from app.api.v1.pagination import page_response, page_responses, paginate, select_columns
+from app.schemas import (
+    TemplateCreate,
+    TemplatePatch,
+    TemplatePatchResponse,
+    TemplateResponse,
+    TemplateSummary,
+    TemplateUpdate,
+)
+from app.db.client import get_db_client
+from app.dependencies import get_template_builder
+from app.services.template_builds import manifest_path, thumbnail_path
+from app.storage import get_storage_backend
+from app.templates.cache import get_template_cache
+from app.templates.jsonpatch import JsonPatchError, JsonPatchTestFailedError, apply_template_patch
 
 router = APIRouter()
 
+TEMPLATE_COLUMNS = frozenset(
+    {"id", "name", "description", "template_json", "user_id", "is_active",
+     "created_at", "updated_at"}
+)
+# template_json carries the whole serialized editor state; list it only on request
+TEMPLATE_LIST_COLUMNS = TEMPLATE_COLUMNS - {"template_json"}
 
-@router.get("/", response_model=list[TemplateResponse])
+
+@router.get("/", responses=page_responses(TemplateSummary))
 async def list_templates(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns to return"),
     user_id: str = "demo-user",  # TODO: Get from auth
 ):
-    """List all templates for the current user."""
-    client = get_supabase_client()
-    response = client.table("templates").select("*").eq("user_id", user_id).execute()
-    return response.data
+    """
+    List templates for the current user, newest first.
+
+    Pages are `limit` rows long; pass the `X-Next-Cursor` response header back as
+    `cursor` for the next page. `template_json` is only included when named in `fields`.
+    """
+    client = get_db_client()
+    query = (
+        client.table("templates")
+        .select(select_columns(fields, TEMPLATE_COLUMNS, TEMPLATE_LIST_COLUMNS))
+        .eq("user_id", user_id)
+    )
+    response = paginate(query, limit, cursor).execute()
+    return page_response(request, response.data, limit)
 
 
 @router.post("/", response_model=TemplateResponse)
@@ -23,7 +60,7 @@ async def create_template(
     user_id: str = "demo-user",  # TODO: Get from auth
 ):
     """Create a new template."""
-    client = get_supabase_client()
+    client = get_db_client()
     response = (
         client.table("templates")
         .insert(
@@ -36,6 +73,7 @@ async def create_template(
         )
         .execute()
     )
+    get_template_builder().schedule(response.data[0]["id"])
     return response.data[0]
 
 
@@ -45,7 +83,7 @@ async def get_template(
     user_id: str = "demo-user",
 ):
     """Get a template by ID."""
-    client = get_supabase_client()
+    client = get_db_client()
     response = (
         client.table("templates")
         .select("*")
@@ -66,8 +104,9 @@ async def update_template(
     user_id: str = "demo-user",
 ):
     """Update a template."""
-    client = get_supabase_client()
+    client = get_db_client()
     update_data = template.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     response = (
         client.table("templates")
         .update(update_data)
@@ -77,16 +116,85 @@ async def update_template(
     )
     if not response.data:
         raise HTTPException(status_code=404, detail="Template not found")
+    get_template_cache().invalidate(template_id)
+    get_template_builder().schedule(template_id)
     return response.data[0]
 
 
+@router.patch("/{template_id}", response_model=TemplatePatchResponse)
+async def patch_template(
+    template_id: str,
+    patch: TemplatePatch,
+    user_id: str = "demo-user",
+):
+    """
+    Partially update a template, e.g. an editor autosave.
+
+    The patch only applies if the template is still at `patch.updated_at`;
+    otherwise it answers 409 and the client should reload and retry. The write
+    itself is conditional on the same version, so concurrent patches can't
+    overwrite each other.
+    """
+    client = get_db_client()
+    response = (
+        client.table("templates")
+        .select("template_json,updated_at")
+        .eq("id", template_id)
+        .eq("user_id", user_id)
+        .single()
+        .execute()
+    )
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    current_version = response.data["updated_at"]
+    if _parse_timestamp(current_version) != patch.updated_at:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Template was modified", "updated_at": str(current_version)},
+        )
+
+    update_data = patch.model_dump(include={"name", "description"}, exclude_unset=True)
+    changed_nodes: dict[str, Any] | None = {}
+    if patch.operations or patch.nodes:
+        try:
+            update_data["template_json"], changed_nodes = await asyncio.to_thread(
+                apply_template_patch, response.data["template_json"], patch.operations, patch.nodes
+            )
+        except JsonPatchTestFailedError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except JsonPatchError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+    response = (
+        client.table("templates")
+        .update(update_data)
+        .eq("id", template_id)
+        .eq("user_id", user_id)
+        .eq("updated_at", current_version)
+        .execute()
+    )
+    if not response.data:
+        raise HTTPException(status_code=409, detail={"message": "Template was modified"})
+
+    new_version = response.data[0]["updated_at"]
+    cache = get_template_cache()
+    if changed_nodes is None:
+        cache.invalidate(template_id)
+    else:
+        cache.apply_changes(template_id, str(current_version), str(new_version), changed_nodes)
+    get_template_builder().schedule(template_id)
+    return TemplatePatchResponse(id=template_id, updated_at=new_version)
+
+
 @router.delete("/{template_id}")
 async def delete_template(
     template_id: str,
     user_id: str = "demo-user",
 ):
     """Delete a template."""
-    client = get_supabase_client()
+    client = get_db_client()
     response = (
         client.table("templates")
         .delete()
@@ -94,4 +202,57 @@ async def delete_template(
         .eq("user_id", user_id)
         .execute()
     )
+    if response.data:
+        await get_template_builder().discard(template_id)
     return {"deleted": True}
+
+
+@router.get("/{template_id}/build")
+async def get_template_build(
+    template_id: str,
+    user_id: str = "demo-user",
+):
+    """
+    Outcome of the latest background build: validation errors and warnings, and
+    whether a compiled artifact and thumbnail are available.
+    """
+    _ensure_template(template_id, user_id)
+    raw = await get_storage_backend().read(manifest_path(template_id))
+    if raw is None:
+        return {"template_id": template_id, "status": "pending"}
+    return json.loads(raw)
+
+
+@router.get("/{template_id}/thumbnail")
+async def get_template_thumbnail(
+    template_id: str,
+    user_id: str = "demo-user",
+):
+    """PNG thumbnail of the template's first page, rendered when it was last saved."""
+    _ensure_template(template_id, user_id)
+    thumbnail = await get_storage_backend().read(thumbnail_path(template_id))
+    if thumbnail is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not available yet")
+    return Response(
+        content=thumbnail, media_type="image/png", headers={"Cache-Control": "no-cache"}
+    )
+
+
+def _ensure_template(template_id: str, user_id: str) -> None:
+    response = (
+        get_db_client()
+        .table("templates")
+        .select("id")
+        .eq("id", template_id)
+        .eq("user_id", user_id)
+        .limit(1)
+        .execute()
+    )
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
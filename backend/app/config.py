@@ -5,15 +5,89 @@ from functools import lru_cache
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
-    # Supabase
-    supabase_url: str
-    supabase_key: str  # Service role key for backend
+    # Database backend: "supabase" or "memory" (in-process tables for local runs)
+    db_backend: str = "supabase"
+
+    # Supabase (required when db_backend is "supabase")
+    supabase_url: str = ""
+    supabase_key: str = ""  # Service role key for backend
 
     # CORS
     cors_origins: list[str] = ["http://localhost:3000"]
 
     # PDF Generation
     pdf_storage_bucket: str = "generated-pdfs"
+    pdf_max_concurrent_pages: int = 8
+    # Pages go to interactive, then API, then batch renders, shared fairly between
+    # tenants within each; optionally cap the pages one tenant holds at once and
+    # weight tenants' shares (default weight 1.0)
+    pdf_tenant_page_limit: int | None = None
+    pdf_tenant_weights: dict[str, float] = {}
+
+    # Render templates built only from text, tables, spacers and dividers without a
+    # browser (requires the optional reportlab dependency)
+    native_renderer: bool = True
+
+    # Out-of-process render workers (python -m app.pdf.worker), e.g.
+    # ["unix:///tmp/pdfgen/*.sock", "http://render-1:8100"]. Empty renders in-process.
+    render_workers: list[str] = []
+    render_timeout: float = 120.0
+
+    # Parsed template editor states kept in memory, per process
+    template_cache_size: int = 256
+
+    # Compiled binding expressions kept in memory, and optionally their bytecode on disk
+    binding_cache_size: int = 2048
+    binding_bytecode_cache_dir: str | None = None
+
+    # Identical generate requests in flight at once share one render and job
+    coalesce_generate_requests: bool = True
+
+    # Table data at least this many rows long is held column by column while
+    # generating (less memory, faster rendering); None keeps it as a list of records
+    columnar_min_rows: int | None = 1000
+
+    # Compile and thumbnail templates in the background after saves
+    template_build_delay: float = 2.0
+    template_thumbnails: bool = True
+
+    # Storage backend for generated files: "supabase", "local" or "s3"
+    storage_backend: str = "supabase"
+    storage_local_dir: str = ".data/storage"
+    storage_public_base_url: str | None = None
+    storage_multipart_threshold: int = 8 * 1024 * 1024
+    storage_chunk_size: int = 6 * 1024 * 1024
+    storage_upload_retries: int = 3
+
+    # generated_pdfs audit records, written in batches off the request path
+    audit_batch_size: int = 100
+    audit_flush_interval: float = 1.0
+    audit_input_ref_threshold: int | None = 64 * 1024
+
+    # S3-compatible storage (when storage_backend is "s3")
+    s3_endpoint_url: str = "https://s3.amazonaws.com"
+    s3_region: str = "us-east-1"
+    s3_access_key_id: str = ""
+    s3_secret_access_key: str = ""
+
+    # Seconds to wait for each data source of a generate request, unless it sets its own
+    datasource_timeout: float = 30.0
+
+    # Records of a bulk upload generated at once; uploaded rows wait (and the
+    # upload is read no further) while this many are in progress
+    bulk_generate_concurrency: int = 4
+
+    # Connector calls to upstream APIs: tries per call (with jittered exponential
+    # backoff), consecutive failures before the circuit opens and how long it stays
+    # open, and the longest a call queues for its datasource's rate limit
+    connector_retry_attempts: int = 3
+    connector_retry_backoff: float = 0.5
+    connector_retry_max_backoff: float = 10.0
+    connector_breaker_failures: int = 5
+    connector_breaker_reset: float = 30.0
+    connector_rate_limit_max_wait: float = 5.0
+    # Parsed REST responses kept for conditional (ETag / Last-Modified) requests; 0 disables
+    connector_response_cache_bytes: int = 64 * 1024 * 1024
 
     # HubSpot (optional)
     hubspot_client_id: str | None = None
@@ -1,11 +1,38 @@
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
 
+from app.config import get_settings
+from app.connectors.projection import Projection, build_projection, leaf_paths, prune, subtree
+from app.connectors.resilience import UpstreamGuard, shared_breaker, shared_limiter
 from app.schemas import DataResult
 
+T = TypeVar("T")
+
+# Templates see a list result as `{LIST_KEY: [...]}`
+LIST_KEY = "items"
+
+
+class FetchError(Exception):
+    """A connector fetch failed; `errors` has the messages."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
 
 class BaseConnector(ABC):
-    """Abstract base class for all data source connectors."""
+    """
+    Abstract base class for all data source connectors.
+
+    Connectors make their upstream API calls through `call_upstream`, which
+    rate limits, retries and circuit-breaks per upstream account so one slow
+    or failing upstream doesn't hold the service's request capacity.
+    """
+
+    # Default `(calls per second, burst)` against one upstream account; None is
+    # unlimited. Datasources override it with `rate_limit` / `rate_burst` settings.
+    default_rate_limit: tuple[float, int] | None = None
 
     def __init__(self, config: dict[str, Any]):
         """
@@ -18,6 +45,7 @@ class BaseConnector(ABC):
         self.name = config.get("name", "Unknown")
         self.settings = config.get("config", {})
         self.field_mappings = config.get("field_mappings", [])
+        self.projection: Projection | None = None
 
     @abstractmethod
     async def connect(self) -> None:
@@ -42,6 +70,24 @@ class BaseConnector(ABC):
         """
         pass
 
+    async def stream_records(self, query: dict[str, Any]) -> AsyncIterator[Any]:
+        """
+        Fetch data as a stream of transformed records, for results too large to
+        handle as one `DataResult`.
+
+        A list result yields its records and a single record yields itself. The
+        default runs `fetch_data`; connectors that can page or stream upstream
+        override it to yield records as they arrive.
+
+        Raises:
+            FetchError: If the fetch fails
+        """
+        result = await self.fetch_data(query)
+        if not result.success:
+            raise FetchError(result.errors or ["Fetch failed"])
+        for record in result.data if isinstance(result.data, list) else [result.data]:
+            yield record
+
     @abstractmethod
     async def validate_credentials(self) -> bool:
         """
@@ -52,6 +98,61 @@ class BaseConnector(ABC):
         """
         pass
 
+    def upstream_key(self) -> str:
+        """
+        Identifies the upstream account calls are made against. Rate limits and
+        circuit state are shared by every datasource with the same key; override
+        to key by credential.
+        """
+        return f"{self.config.get('type')}:{self.config.get('id') or self.name}"
+
+    @staticmethod
+    def credential_key(connector_type: str, *parts: Any) -> str:
+        """An `upstream_key` for a credential that doesn't keep the secret in memory."""
+        digest = hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+        return f"{connector_type}:{digest[:32]}"
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """
+        Whether an upstream call that raised `error` may succeed if repeated:
+        throttling, timeouts, connection failures and 5xx responses. Retryable
+        errors also count toward opening the circuit.
+        """
+        return False
+
+    def retry_after(self, error: BaseException) -> float | None:
+        """Seconds the upstream asked to wait before retrying (a Retry-After header)."""
+        return None
+
+    async def call_upstream(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Make one upstream API call through the connector middleware.
+
+        Waits for the datasource's rate limit, retries errors `is_retryable`
+        accepts with jittered exponential backoff (honoring `retry_after`), and
+        fails fast with `UpstreamUnavailableError` while the upstream's circuit is open.
+        """
+        settings = get_settings()
+        key = self.upstream_key()
+        rate = self.settings.get("rate_limit")
+        rate_limit = (
+            (float(rate), int(self.settings.get("rate_burst") or max(1, round(float(rate)))))
+            if rate
+            else self.default_rate_limit
+        )
+        guard = UpstreamGuard(
+            str(self.config.get("type", "unknown")),
+            shared_limiter(key, *rate_limit) if rate_limit else None,
+            shared_breaker(
+                key, settings.connector_breaker_failures, settings.connector_breaker_reset
+            ),
+            attempts=settings.connector_retry_attempts,
+            backoff=settings.connector_retry_backoff,
+            max_backoff=settings.connector_retry_max_backoff,
+            max_queue_wait=settings.connector_rate_limit_max_wait,
+        )
+        return await guard.call(fn, self.is_retryable, self.retry_after)
+
     def get_available_fields(self) -> list[str]:
         """
         Return list of fields this connector can provide.
@@ -59,6 +160,90 @@ class BaseConnector(ABC):
         """
         return []
 
+    def set_projection(self, paths: Iterable[str] | None) -> None:
+        """
+        Restrict fetched data to what a template uses.
+
+        Args:
+            paths: Dotted template data paths, e.g. from `template_data_paths`. A
+                list result is bound as `items`, so `items.sku` selects `sku` in
+                each record. None keeps everything.
+        """
+        self.projection = None if paths is None else build_projection(paths)
+
+    def source_fields(self, many: bool | None = None) -> list[str] | None:
+        """
+        Dotted source field paths the projection needs, for requesting only those
+        upstream. None means all fields.
+
+        Args:
+            many: Whether the result will be a list of records, a single record,
+                or None if that isn't known yet (fields for both are returned).
+        """
+        if self.projection is None:
+            return None
+        views = [True, False] if many is None else [many]
+        fields: list[str] = []
+        for record_view in (self._record_view(view) for view in views):
+            if not self.field_mappings:
+                paths = leaf_paths(record_view)
+            else:
+                paths = []
+                for mapping, remainder in self._needed_mappings(record_view):
+                    sub_paths = leaf_paths(remainder, mapping["sourceField"])
+                    paths.extend(sub_paths if sub_paths is not None else [])
+            if paths is None:
+                return None
+            fields.extend(path for path in paths if path not in fields)
+        return fields
+
+    def transform(self, data: Any) -> Any:
+        """
+        Prune fetched data to the projection and apply field mappings.
+
+        List results are transformed record by record.
+        """
+        if isinstance(data, list):
+            record_view = self._record_view(True)
+            return [self._transform_record(item, record_view) for item in data]
+        if isinstance(data, dict):
+            return self._transform_record(data, self._record_view(False))
+        return data
+
+    def _record_view(self, many: bool) -> Projection | None:
+        """The projection as it applies to one record of the result."""
+        return subtree(self.projection, LIST_KEY) if many else self.projection
+
+    def _needed_mappings(
+        self, record_view: Projection | None
+    ) -> list[tuple[dict[str, Any], Projection | None]]:
+        """Field mappings whose template field is used, with what is used below it."""
+        needed = []
+        for mapping in self.field_mappings:
+            source_field = mapping.get("sourceField")
+            template_field = mapping.get("templateField")
+            if not source_field or not template_field:
+                continue
+            remainder = subtree(record_view, template_field)
+            if remainder != {}:
+                needed.append((mapping, remainder))
+        return needed
+
+    def _transform_record(self, record: Any, record_view: Projection | None) -> Any:
+        if not isinstance(record, dict):
+            return record
+        if not self.field_mappings:
+            return prune(record, record_view)
+        if record_view is None:
+            return self.apply_field_mappings(record)
+
+        # Only run the mappings the template reads, and keep only what it reads of them
+        mapped: dict[str, Any] = {}
+        for mapping, remainder in self._needed_mappings(record_view):
+            value = self._get_nested_value(record, mapping["sourceField"])
+            self._set_nested_value(mapped, mapping["templateField"], prune(value, remainder))
+        return mapped
+
     def apply_field_mappings(self, data: dict[str, Any]) -> dict[str, Any]:
         """
         Apply field mappings to transform source data to template fields.
@@ -0,0 +1,235 @@
+import hashlib
+import json
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, Iterable
+
+# Marks a cell whose record had no value for the column
+MISSING: Any = type("Missing", (), {"__repr__": lambda self: "MISSING"})()
+
+# A string column is dictionary-encoded when at most this share of its values are distinct
+_DICTIONARY_RATIO = 0.5
+_INT64 = (-(2**63), 2**63 - 1)
+
+
+class ColumnarTable(Sequence):
+    """
+    A list of flat records stored column by column.
+
+    Each column is kept in the most compact form its values allow: `array('d')`
+    for floats, `array('q')` for integers, and codes into a shared dictionary
+    for strings that repeat (statuses, categories, names). Reading a row builds
+    its dict on demand, so a table can stand in for the list it was built from;
+    the table renderer instead works on whole columns through `map_column`,
+    formatting each distinct value once.
+
+    Cells never go through a type conversion, so rows read back with the same
+    values and types they were built from (keys come back in column order).
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, Sequence[Any]],
+        length: int,
+        dictionaries: dict[str, list[Any]] | None = None,
+    ):
+        """
+        Args:
+            columns: Values per column, or dictionary codes for encoded columns
+            length: Number of rows
+            dictionaries: Distinct values of the dictionary-encoded columns
+        """
+        self.columns = columns
+        self.length = length
+        self.dictionaries = dictionaries or {}
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict[str, Any]]) -> "ColumnarTable":
+        keys = dict.fromkeys(key for record in records for key in record)
+        columns: dict[str, Sequence[Any]] = {}
+        dictionaries: dict[str, list[Any]] = {}
+        for key in keys:
+            values = [record.get(key, MISSING) for record in records]
+            columns[key], dictionary = _encode(values)
+            if dictionary is not None:
+                dictionaries[key] = dictionary
+        return cls(columns, len(records), dictionaries)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ColumnarTable(
+                {key: column[index] for key, column in self.columns.items()},
+                len(range(*index.indices(self.length))),
+                self.dictionaries,
+            )
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("ColumnarTable index out of range")
+        row = {}
+        for key, column in self.columns.items():
+            value = column[index]
+            dictionary = self.dictionaries.get(key)
+            if dictionary is not None:
+                value = dictionary[value]
+            if value is not MISSING:
+                row[key] = value
+        return row
+
+    def __str__(self) -> str:
+        return str(self.to_records())
+
+    def __repr__(self) -> str:
+        return f"ColumnarTable(rows={self.length}, columns={list(self.columns)})"
+
+    def to_records(self) -> list[dict[str, Any]]:
+        return [self[index] for index in range(self.length)]
+
+    def map_column(
+        self,
+        key: str,
+        function: Callable[[Any], Any],
+        vectorized: Callable[[Sequence[Any]], list[Any]] | None = None,
+        missing: Any = None,
+    ) -> list[Any]:
+        """
+        Apply `function` to every cell of a column.
+
+        Dictionary-encoded columns apply it once per distinct value. Numeric
+        columns are handed to `vectorized`, when given, in one call.
+
+        Args:
+            key: The column; an absent column has every cell missing
+            function: Maps one value
+            vectorized: Maps a whole float or integer array at once
+            missing: Result for missing cells
+        """
+        column = self.columns.get(key)
+        if column is None:
+            return [missing] * self.length
+
+        dictionary = self.dictionaries.get(key)
+        if dictionary is not None:
+            mapped = [missing if value is MISSING else function(value) for value in dictionary]
+            return [mapped[code] for code in column]
+        if vectorized is not None and isinstance(column, array):
+            return vectorized(column)
+        return [missing if value is MISSING else function(value) for value in column]
+
+
+def _encode(values: list[Any]) -> tuple[Sequence[Any], list[Any] | None]:
+    """Pick the compact storage for one column: `(column, dictionary or None)`."""
+    types = {type(value) for value in values}
+    if types == {float}:
+        return array("d", values), None
+    if types == {int} and _INT64[0] <= min(values) and max(values) <= _INT64[1]:
+        return array("q", values), None
+    if types <= {str, type(MISSING)} and values:
+        distinct = dict.fromkeys(values)
+        if len(distinct) <= len(values) * _DICTIONARY_RATIO:
+            codes = {value: code for code, value in enumerate(distinct)}
+            return array("I", [codes[value] for value in values]), list(distinct)
+    return values, None
+
+
+def columnarize(data: Any, paths: Iterable[str], min_rows: int = 0) -> Any:
+    """
+    Replace lists of records at dotted `paths` in `data` with `ColumnarTable`s.
+
+    Lists shorter than `min_rows`, or holding anything other than dicts, are
+    left as they are. Dicts along the paths are copied, never modified.
+    """
+    for path in paths:
+        data = _columnarize_path(data, path.split("."), min_rows)
+    return data
+
+
+def _columnarize_path(data: Any, parts: list[str], min_rows: int) -> Any:
+    if not isinstance(data, dict) or parts[0] not in data:
+        return data
+    value = data[parts[0]]
+    if len(parts) > 1:
+        replaced = _columnarize_path(value, parts[1:], min_rows)
+    elif (
+        isinstance(value, list)
+        and len(value) >= min_rows
+        and all(isinstance(item, dict) for item in value)
+    ):
+        replaced = ColumnarTable.from_records(value)
+    else:
+        return data
+    return data if replaced is value else {**data, parts[0]: replaced}
+
+
+def to_records(data: Any) -> Any:
+    """Turn `ColumnarTable`s that `columnarize` placed in `data` back into lists."""
+    if isinstance(data, ColumnarTable):
+        return data.to_records()
+    if not isinstance(data, dict):
+        return data
+    converted = {key: to_records(value) for key, value in data.items()}
+    return data if all(converted[key] is value for key, value in data.items()) else converted
+
+
+def dumps_records(data: Any, sort_keys: bool = False, default: Callable | None = None) -> str:
+    """
+    `json.dumps(to_records(data))`, encoding tables one row at a time.
+
+    The JSON is the same, but a table's records are never all built at once.
+    """
+    if isinstance(data, ColumnarTable):
+        rows = (json.dumps(row, sort_keys=sort_keys, default=default) for row in data)
+        return "[" + ", ".join(rows) + "]"
+    if isinstance(data, dict) and _holds_table(data):
+        keys = sorted(data) if sort_keys else list(data)
+        members = (
+            f"{json.dumps(str(key))}: {dumps_records(data[key], sort_keys, default)}"
+            for key in keys
+        )
+        return "{" + ", ".join(members) + "}"
+    return json.dumps(data, sort_keys=sort_keys, default=default)
+
+
+def _holds_table(data: Any) -> bool:
+    if isinstance(data, ColumnarTable):
+        return True
+    return isinstance(data, dict) and any(_holds_table(value) for value in data.values())
+
+
+def digest(data: Any) -> str:
+    """
+    SHA-256 of `data`, reading `ColumnarTable`s column by column.
+
+    Equal data gives equal digests without turning tables back into records:
+    numeric columns are hashed as their raw arrays and dictionary-encoded ones
+    as their dictionary and codes.
+    """
+    hasher = hashlib.sha256()
+    tables: list[ColumnarTable] = []
+
+    def encode(value: Any) -> Any:
+        if isinstance(value, ColumnarTable):
+            tables.append(value)
+            return {"$table": len(tables) - 1}
+        return _encode_cell(value)
+
+    hasher.update(json.dumps(data, sort_keys=True, default=encode).encode())
+    for table in tables:
+        hasher.update(json.dumps([table.length, list(table.columns)]).encode())
+        for key, column in table.columns.items():
+            dictionary = table.dictionaries.get(key)
+            if dictionary is not None:
+                hasher.update(json.dumps(dictionary, default=_encode_cell).encode())
+            if isinstance(column, array):
+                hasher.update(column.typecode.encode())
+                hasher.update(column.tobytes())
+            else:
+                hasher.update(json.dumps(column, default=_encode_cell).encode())
+    return hasher.hexdigest()
+
+
+def _encode_cell(value: Any) -> Any:
+    return {"$missing": True} if value is MISSING else str(value)
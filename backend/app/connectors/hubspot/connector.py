@@ -1,21 +1,48 @@
-from typing import Any
+import asyncio
+from typing import Any, AsyncIterator
 from hubspot import HubSpot
 from hubspot.crm.contacts import ApiException
+import urllib3
 
-from app.connectors.base import BaseConnector
+from app.connectors.base import BaseConnector, FetchError
 from app.connectors.registry import ConnectorRegistry
 from app.schemas import DataResult
 
+# Most records HubSpot returns per list page
+PAGE_SIZE = 100
+
 
 @ConnectorRegistry.register("hubspot")
 class HubSpotConnector(BaseConnector):
     """Connector for HubSpot CRM data."""
 
+    # HubSpot allows private apps 100 requests per 10 seconds on the base tier
+    default_rate_limit = (10.0, 10)
+
     def __init__(self, config: dict[str, Any]):
         super().__init__(config)
         self._client: HubSpot | None = None
         self.access_token = self.settings.get("access_token", "")
 
+    def upstream_key(self) -> str:
+        """HubSpot limits by app token, so datasources sharing one share its limits."""
+        return self.credential_key("hubspot", self.access_token)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """429s, 5xx responses and network errors from the SDK."""
+        # Each generated CRM module has its own ApiException class; all carry `status`
+        status = getattr(error, "status", None)
+        if isinstance(status, int) and status > 0:
+            return status == 429 or status >= 500
+        return isinstance(error, (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError))
+
+    def retry_after(self, error: BaseException) -> float | None:
+        headers = getattr(error, "headers", None) or {}
+        try:
+            return max(0.0, float(headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            return None
+
     async def connect(self) -> None:
         """Initialize HubSpot client."""
         self._client = HubSpot(access_token=self.access_token)
@@ -59,9 +86,11 @@ class HubSpotConnector(BaseConnector):
                 )
 
             object_type = query.get("object_type", "contacts")
-            properties = query.get("properties", [])
             record_id = query.get("record_id")
             limit = query.get("limit", 100)
+            properties = query.get("properties") or self._projected_properties(
+                many=not record_id
+            )
 
             if record_id:
                 # Fetch single record
@@ -70,11 +99,8 @@ class HubSpotConnector(BaseConnector):
                 # Fetch list of records
                 data = await self._fetch_list(object_type, properties, limit)
 
-            # Apply field mappings
-            if isinstance(data, dict):
-                data = self.apply_field_mappings(data)
-            elif isinstance(data, list):
-                data = [self.apply_field_mappings(item) for item in data]
+            # Prune to the projection and apply field mappings
+            data = self.transform(data)
 
             return DataResult(success=True, data=data, source_type="hubspot")
 
@@ -93,13 +119,58 @@ class HubSpotConnector(BaseConnector):
                 errors=[str(e)],
             )
 
+    async def stream_records(self, query: dict[str, Any]) -> AsyncIterator[Any]:
+        """
+        Fetch records as in `fetch_data`, page by page.
+
+        List queries follow HubSpot's paging cursor, yielding each page's records
+        before requesting the next, until `limit` records (which may exceed one
+        page) or the end of the list.
+        """
+        if query.get("record_id"):
+            async for record in super().stream_records(query):
+                yield record
+            return
+
+        try:
+            await self.connect()
+            api = self._get_api(query.get("object_type", "contacts"))
+            properties = query.get("properties") or self._projected_properties(many=True)
+            record_view = self._record_view(True)
+            remaining = query.get("limit", 100)
+            after = None
+            while remaining > 0:
+                page = await self.call_upstream(
+                    lambda: asyncio.to_thread(
+                        api.basic_api.get_page,
+                        limit=min(remaining, PAGE_SIZE),
+                        after=after,
+                        properties=properties if properties else None,
+                    )
+                )
+                for result in page.results:
+                    yield self._transform_record(result.properties, record_view)
+                remaining -= len(page.results)
+                after = page.paging.next.after if page.paging and page.paging.next else None
+                if not after or not page.results:
+                    break
+        except ApiException as e:
+            raise FetchError([f"HubSpot API error: {e.reason}"]) from e
+        except Exception as e:
+            raise FetchError([str(e)]) from e
+        finally:
+            await self.disconnect()
+
     async def _fetch_single(
         self, object_type: str, record_id: str, properties: list[str]
     ) -> dict[str, Any]:
         """Fetch a single record by ID."""
         api = self._get_api(object_type)
-        result = api.basic_api.get_by_id(
-            record_id, properties=properties if properties else None
+        # The SDK is synchronous; keep it off the event loop
+        result = await self.call_upstream(
+            lambda: asyncio.to_thread(
+                api.basic_api.get_by_id, record_id, properties=properties if properties else None
+            )
         )
         return result.properties
 
@@ -108,11 +179,21 @@ class HubSpotConnector(BaseConnector):
     ) -> list[dict[str, Any]]:
         """Fetch a list of records."""
         api = self._get_api(object_type)
-        result = api.basic_api.get_page(
-            limit=limit, properties=properties if properties else None
+        result = await self.call_upstream(
+            lambda: asyncio.to_thread(
+                api.basic_api.get_page, limit=limit, properties=properties if properties else None
+            )
         )
         return [r.properties for r in result.results]
 
+    def _projected_properties(self, many: bool) -> list[str]:
+        """HubSpot properties the template uses; empty when unknown (HubSpot defaults)."""
+        fields = self.source_fields(many=many)
+        if not fields:
+            return []
+        # Records are flat property maps, so only the top-level name matters
+        return list(dict.fromkeys(field.split(".")[0] for field in fields))
+
     def _get_api(self, object_type: str):
         """Get the appropriate HubSpot API for the object type."""
         if not self._client:
@@ -0,0 +1,55 @@
+from typing import Any, Iterable
+
+# A tree of needed keys. None stands for "the whole value", an empty dict for
+# "nothing"; lists are transparent, so a projection applies to each element.
+Projection = dict[str, "Projection | None"]
+
+
+def build_projection(paths: Iterable[str]) -> Projection:
+    """Build a projection from dotted paths, e.g. `["customer.name", "order.items.sku"]`."""
+    projection: Projection = {}
+    for path in paths:
+        parts = [part for part in path.split(".") if part]
+        if not parts:
+            continue
+        node: Projection = projection
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break  # Already needed whole
+            node = node.setdefault(part, child)
+        else:
+            node[parts[-1]] = None
+    return projection
+
+
+def subtree(projection: Projection | None, path: str) -> Projection | None:
+    """The part of `projection` below a dotted `path`; {} if nothing under it is needed."""
+    for part in path.split("."):
+        if projection is None:
+            return None
+        projection = projection.get(part, {})
+    return projection
+
+
+def prune(data: Any, projection: Projection | None) -> Any:
+    """Drop everything from `data` that `projection` doesn't need."""
+    if projection is None:
+        return data
+    if isinstance(data, dict):
+        return {key: prune(data[key], sub) for key, sub in projection.items() if key in data}
+    if isinstance(data, list):
+        if any(key.isdigit() for key in projection):
+            return data  # Indexed into; keep positions and contents as they are
+        return [prune(item, projection) for item in data]
+    return data
+
+
+def leaf_paths(projection: Projection | None, prefix: str = "") -> list[str] | None:
+    """Dotted paths of the values needed whole; None if that is everything."""
+    if projection is None:
+        return None if not prefix else [prefix]
+    paths: list[str] = []
+    for key, sub in projection.items():
+        paths.extend(leaf_paths(sub, f"{prefix}.{key}" if prefix else key))
+    return paths
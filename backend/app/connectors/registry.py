@@ -1,13 +1,33 @@
+import importlib
+from importlib.metadata import entry_points
 from typing import Type, Any
 
 from app.connectors.base import BaseConnector
 
+# Third-party packages can provide connectors by declaring an entry point in this
+# group, e.g. `salesforce = "my_package.connector:SalesforceConnector"`.
+ENTRY_POINT_GROUP = "pdf_generator.connectors"
+
 
 class ConnectorRegistry:
-    """Registry for data source connectors using the plugin pattern."""
+    """
+    Registry for data source connectors using the plugin pattern.
+
+    Connector modules are imported on first use rather than at startup, so heavy
+    SDKs (e.g. HubSpot) only load in processes that actually need them.
+    """
 
     _connectors: dict[str, Type[BaseConnector]] = {}
 
+    # Connector type -> module that registers it when imported
+    _modules: dict[str, str] = {
+        "hubspot": "app.connectors.hubspot.connector",
+        "rest_api": "app.connectors.rest_api.connector",
+        "manual": "app.connectors.rest_api.connector",
+    }
+
+    _entry_points_loaded = False
+
     @classmethod
     def register(cls, connector_type: str):
         """
@@ -25,13 +45,43 @@ class ConnectorRegistry:
 
         return decorator
 
+    @classmethod
+    def register_module(cls, connector_type: str, module_path: str) -> None:
+        """Declare the module that registers `connector_type`, to be imported on first use."""
+        cls._modules[connector_type] = module_path
+
     @classmethod
     def get(cls, connector_type: str) -> Type[BaseConnector]:
-        """Get a connector class by type."""
+        """Get a connector class by type, importing its module if needed."""
+        if connector_type not in cls._connectors:
+            cls._load(connector_type)
         if connector_type not in cls._connectors:
             raise ValueError(f"Unknown connector type: {connector_type}")
         return cls._connectors[connector_type]
 
+    @classmethod
+    def _load(cls, connector_type: str) -> None:
+        if connector_type not in cls._modules:
+            cls._discover_entry_points()
+
+        module_path = cls._modules.get(connector_type)
+        if module_path is None:
+            return
+
+        module_name, _, attribute = module_path.partition(":")
+        module = importlib.import_module(module_name)
+        # Entry points name the class; register it if the module didn't itself
+        if attribute and connector_type not in cls._connectors:
+            cls._connectors[connector_type] = getattr(module, attribute)
+
+    @classmethod
+    def _discover_entry_points(cls) -> None:
+        if cls._entry_points_loaded:
+            return
+        cls._entry_points_loaded = True
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            cls._modules.setdefault(entry_point.name, entry_point.value)
+
     @classmethod
     def create(cls, config: dict[str, Any]) -> BaseConnector:
         """
@@ -52,5 +102,6 @@ class ConnectorRegistry:
 
     @classmethod
     def list_available(cls) -> list[str]:
-        """List all registered connector types."""
-        return list(cls._connectors.keys())
+        """List all known connector types, including ones not imported yet."""
+        cls._discover_entry_points()
+        return sorted(cls._connectors.keys() | cls._modules.keys())
@@ -0,0 +1,216 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception, stop_after_attempt
+
+from app.metrics import CONNECTOR_UPSTREAM_CALLS
+
+T = TypeVar("T")
+
+
+class UpstreamUnavailableError(Exception):
+    """A call was refused without reaching the upstream: circuit open or rate limit backlog."""
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+
+    Callers reserve a token and sleep until it is due, so waiters are served in
+    arrival order without a lock. A caller that would wait longer than
+    `max_wait` is refused instead of queueing behind the backlog.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket size: calls allowed back to back after a quiet period
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self, max_wait: float | None = None) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+        if max_wait is not None and wait > max_wait:
+            raise UpstreamUnavailableError(f"Rate limited: next call slot in {wait:.1f}s")
+        # The token may be negative: later callers queue behind this reservation
+        self._tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while an upstream is down.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are refused for `reset_timeout` seconds. Then one trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    def before_call(self) -> None:
+        """Raise `UpstreamUnavailableError` if the call must not go out."""
+        if self._opened_at is None:
+            return
+        remaining = self._opened_at + self.reset_timeout - time.monotonic()
+        if remaining > 0 or self._trial:
+            raise UpstreamUnavailableError(
+                f"Circuit open after {self._failures} consecutive failures; "
+                f"retrying upstream in {max(0.0, remaining):.0f}s"
+            )
+        self._trial = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._trial = False
+
+    def record_cancel(self) -> None:
+        """Forget a trial call that never finished, so another may run."""
+        self._trial = False
+
+
+class UpstreamGuard:
+    """Rate limiting, retries with jittered backoff, and a circuit breaker for one upstream."""
+
+    def __init__(
+        self,
+        name: str,
+        limiter: TokenBucket | None,
+        breaker: CircuitBreaker,
+        attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        max_queue_wait: float | None = 5.0,
+    ):
+        """
+        Args:
+            name: Connector type, the metrics label
+            limiter: Shared token bucket; None is unlimited
+            breaker: Shared circuit breaker
+            attempts: Tries per call, the first included
+            backoff: Base of the exponential backoff, in seconds
+            max_backoff: Longest wait between tries, Retry-After hints included
+            max_queue_wait: Longest a call waits for the rate limiter before it is refused
+        """
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_queue_wait = max_queue_wait
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        is_retryable: Callable[[BaseException], bool],
+        retry_after: Callable[[BaseException], float | None],
+    ) -> T:
+        """
+        Call `fn` through the guard.
+
+        Errors `is_retryable` accepts count against the circuit breaker and are
+        retried; other errors are raised at once and don't count, since they
+        say nothing about the upstream's health.
+
+        Raises:
+            UpstreamUnavailableError: The circuit is open or the rate limit backlog is too long
+        """
+
+        def wait(state: RetryCallState) -> float:
+            hint = retry_after(state.outcome.exception())
+            if hint is not None:
+                return min(self.max_backoff, hint)
+            # Full jitter keeps retries from many requests from arriving together
+            ceiling = min(self.max_backoff, self.backoff * 2**state.attempt_number)
+            return random.uniform(0, ceiling)
+
+        def before_sleep(state: RetryCallState) -> None:
+            CONNECTOR_UPSTREAM_CALLS.labels(connector=self.name, result="retried").inc()
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.attempts),
+            wait=wait,
+            retry=retry_if_exception(
+                lambda error: (
+                    not isinstance(error, UpstreamUnavailableError) and is_retryable(error)
+                )
+            ),
+            before_sleep=before_sleep,
+            reraise=True,
+        )
+        return await retrying(self._attempt, fn, is_retryable)
+
+    async def _attempt(
+        self, fn: Callable[[], Awaitable[T]], is_retryable: Callable[[BaseException], bool]
+    ) -> T:
+        try:
+            self.breaker.before_call()
+        except UpstreamUnavailableError:
+            CONNECTOR_UPSTREAM_CALLS.labels(connector=self.name, result="short_circuited").inc()
+            raise
+        try:
+            if self.limiter is not None:
+                await self.limiter.acquire(self.max_queue_wait)
+            result = await fn()
+        except UpstreamUnavailableError:
+            self.breaker.record_cancel()
+            CONNECTOR_UPSTREAM_CALLS.labels(connector=self.name, result="rate_limited").inc()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.record_cancel()
+            raise
+        except Exception as error:
+            if is_retryable(error):
+                self.breaker.record_failure()
+                CONNECTOR_UPSTREAM_CALLS.labels(connector=self.name, result="failure").inc()
+            else:
+                self.breaker.record_success()  # It answered
+                CONNECTOR_UPSTREAM_CALLS.labels(connector=self.name, result="error").inc()
+            raise
+        self.breaker.record_success()
+        CONNECTOR_UPSTREAM_CALLS.labels(connector=self.name, result="success").inc()
+        return result
+
+
+# Shared by every connector instance in the process, per upstream key
+_limiters: dict[tuple[str, float, int], TokenBucket] = {}
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def shared_limiter(key: str, rate: float, burst: int) -> TokenBucket:
+    """The process-wide token bucket for an upstream and limit, created on first use."""
+    limiter = _limiters.get((key, rate, burst))
+    if limiter is None:
+        limiter = _limiters[(key, rate, burst)] = TokenBucket(rate, burst)
+    return limiter
+
+
+def shared_breaker(key: str, failure_threshold: int, reset_timeout: float) -> CircuitBreaker:
+    """The process-wide circuit breaker for an upstream, created on first use."""
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = _breakers[key] = CircuitBreaker(failure_threshold, reset_timeout)
+    return breaker
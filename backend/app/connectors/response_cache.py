@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from app.config import get_settings
+
+
+@dataclass
+class CachedResponse:
+    """A parsed upstream response and the validators to revalidate it with."""
+
+    data: Any
+    etag: str | None
+    last_modified: str | None
+    size: int
+
+    def conditional_headers(self) -> dict[str, str]:
+        """`If-None-Match` / `If-Modified-Since` headers for revalidating this response."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Parsed upstream responses kept for conditional requests.
+
+    Connectors send the stored validators with the next identical request and
+    reuse the parsed data when the upstream answers 304 Not Modified, skipping
+    the download and the JSON parse. Entries are evicted least recently used
+    once their combined response size exceeds `max_bytes`.
+
+    Cached data is shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key: str, entry: CachedResponse) -> None:
+        self.discard(key)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide connector response cache."""
+    return ResponseCache(max_bytes=get_settings().connector_response_cache_bytes)
@@ -1,9 +1,21 @@
-from typing import Any
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator
 import httpx
 
-from app.connectors.base import BaseConnector
+from app.config import get_settings
+from app.connectors.base import BaseConnector, FetchError
 from app.connectors.registry import ConnectorRegistry
+from app.connectors.response_cache import CachedResponse, ResponseCache, get_response_cache
+from app.metrics import record_cache
 from app.schemas import DataResult
+from app.services import ndjson
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
 
 
 @ConnectorRegistry.register("rest_api")
@@ -18,6 +30,46 @@ class RESTAPIConnector(BaseConnector):
         self.auth_value = self.settings.get("auth_value", "")
         self.headers = self.settings.get("headers", {})
         self.timeout = self.settings.get("timeout", 30)
+        # Query parameter the API accepts a field list in (e.g. "fields"); unset disables it
+        self.fields_param = self.settings.get("fields_param")
+        self.fields_separator = self.settings.get("fields_separator", ",")
+
+    def upstream_key(self) -> str:
+        """Datasources sharing a base URL and credential share its limits and circuit."""
+        return self.credential_key("rest_api", self.base_url, self.auth_type, self.auth_value)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Throttling, 5xx responses and network failures; others only for idempotent calls."""
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status in (429, 503):
+                return True  # The request wasn't processed
+            return status in RETRYABLE_STATUSES and self._idempotent(error.request)
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True  # The request never reached the server
+        if isinstance(error, httpx.TransportError):
+            return self._idempotent(error.request)
+        return False
+
+    def retry_after(self, error: BaseException) -> float | None:
+        if not isinstance(error, httpx.HTTPStatusError):
+            return None
+        value = error.response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            until = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (until - datetime.now(timezone.utc)).total_seconds())
+
+    @staticmethod
+    def _idempotent(request: httpx.Request | None) -> bool:
+        return request is not None and request.method in IDEMPOTENT_METHODS
 
     async def connect(self) -> None:
         """Initialize HTTP client."""
@@ -68,6 +120,13 @@ class RESTAPIConnector(BaseConnector):
             "body": null,
             "response_path": "data.items"  # JSONPath to extract data
         }
+
+        With `fields_param` configured, the fields the template uses are requested
+        in that query parameter unless the query sets it already.
+
+        GET responses carrying an `ETag` or `Last-Modified` validator are cached;
+        the next identical request sends them back and reuses the parsed data if
+        the upstream answers 304 Not Modified.
         """
         try:
             await self.connect()
@@ -78,59 +137,153 @@ class RESTAPIConnector(BaseConnector):
                     source_type="rest_api",
                     errors=["Failed to initialize HTTP client"],
                 )
+            data = await self._fetch(query)
+            return DataResult(success=True, data=data, source_type="rest_api")
+        except Exception as e:
+            return DataResult(
+                success=False,
+                data={},
+                source_type="rest_api",
+                errors=[self._error_message(e)],
+            )
+        finally:
+            await self.disconnect()
+
+    async def stream_records(self, query: dict[str, Any]) -> AsyncIterator[Any]:
+        """
+        Fetch records as in `fetch_data`, without building a `DataResult`.
+
+        With `"response_format": "ndjson"` in the query the upstream response is
+        read as newline-delimited JSON, one record per line, and each record is
+        yielded as it arrives instead of after the whole body is downloaded.
+        `response_path` doesn't apply to such responses and they aren't cached.
+        """
+        try:
+            await self.connect()
+            if query.get("response_format") == "ndjson":
+                async for record in self._stream_ndjson(query):
+                    yield record
+                return
+            data = await self._fetch(query)
+            for record in data if isinstance(data, list) else [data]:
+                yield record
+        except Exception as e:
+            raise FetchError([self._error_message(e)]) from e
+        finally:
+            await self.disconnect()
 
-            endpoint = query.get("endpoint", "/")
-            method = query.get("method", "GET").upper()
-            params = query.get("params")
-            body = query.get("body")
-            response_path = query.get("response_path")
+    def _request_args(self, query: dict[str, Any]) -> tuple[str, str, dict[str, Any] | None, Any]:
+        """`(endpoint, method, params, body)` for a query."""
+        endpoint = query.get("endpoint", "/")
+        method = query.get("method", "GET").upper()
+        params = query.get("params")
+        body = query.get("body")
 
-            # Make the request
+        # Ask for just the fields the template uses, if the API supports it
+        fields = self.source_fields() if self.fields_param else None
+        if fields and self.fields_param not in (params or {}):
+            params = {**(params or {}), self.fields_param: self.fields_separator.join(fields)}
+        return endpoint, method, params, body
+
+    async def _fetch(self, query: dict[str, Any]) -> Any:
+        """Make the request and return its transformed data. Requires `connect`."""
+        endpoint, method, params, body = self._request_args(query)
+        response_path = query.get("response_path")
+
+        cache = get_response_cache() if get_settings().connector_response_cache_bytes else None
+        cache_key = None
+        cached = None
+        if cache is not None and method == "GET" and not body:
+            cache_key = self._cache_key(endpoint, params)
+            cached = cache.get(cache_key)
+
+        async def request() -> httpx.Response:
             response = await self._client.request(
                 method=method,
                 url=endpoint,
                 params=params,
                 json=body if body else None,
+                headers=cached.conditional_headers() if cached is not None else None,
             )
-            response.raise_for_status()
+            if not (response.status_code == 304 and cached is not None):
+                response.raise_for_status()
+            return response
+
+        # Rate limited, retried and circuit-broken per upstream
+        response = await self.call_upstream(request)
 
+        if cache_key is not None:
+            record_cache("rest_response", response.status_code == 304)
+        if response.status_code == 304:
+            data = cached.data
+        else:
             data = response.json()
+            if cache_key is not None:
+                self._cache_response(cache, cache_key, response, data)
 
-            # Extract data using response_path if provided
-            if response_path:
-                data = self._extract_path(data, response_path)
+        # Extract data using response_path if provided
+        if response_path:
+            data = self._extract_path(data, response_path)
 
-            # Apply field mappings
-            if isinstance(data, dict):
-                data = self.apply_field_mappings(data)
-            elif isinstance(data, list):
-                data = [self.apply_field_mappings(item) for item in data]
+        # Prune to the projection and apply field mappings
+        return self.transform(data)
 
-            return DataResult(success=True, data=data, source_type="rest_api")
+    async def _stream_ndjson(self, query: dict[str, Any]) -> AsyncIterator[Any]:
+        """Yield transformed records from an NDJSON response as its lines arrive."""
+        endpoint, method, params, body = self._request_args(query)
+        request = self._client.build_request(
+            method, endpoint, params=params, json=body if body else None
+        )
 
-        except httpx.HTTPStatusError as e:
-            return DataResult(
-                success=False,
-                data={},
-                source_type="rest_api",
-                errors=[f"HTTP {e.response.status_code}: {e.response.text}"],
-            )
-        except httpx.RequestError as e:
-            return DataResult(
-                success=False,
-                data={},
-                source_type="rest_api",
-                errors=[f"Request error: {str(e)}"],
-            )
-        except Exception as e:
-            return DataResult(
-                success=False,
-                data={},
-                source_type="rest_api",
-                errors=[str(e)],
-            )
+        async def send() -> httpx.Response:
+            response = await self._client.send(request, stream=True)
+            if response.is_error:
+                # Read the body for the error message before giving up the connection
+                await response.aread()
+                await response.aclose()
+                response.raise_for_status()
+            return response
+
+        # Only opening the response is retried; a failure mid-body ends the stream
+        response = await self.call_upstream(send)
+        record_view = self._record_view(True)
+        try:
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield self._transform_record(ndjson.loads(line), record_view)
         finally:
-            await self.disconnect()
+            await response.aclose()
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        if isinstance(error, httpx.HTTPStatusError):
+            return f"HTTP {error.response.status_code}: {error.response.text}"
+        if isinstance(error, httpx.RequestError):
+            return f"Request error: {str(error)}"
+        return str(error)
+
+    def _cache_key(self, endpoint: str, params: dict[str, Any] | None) -> str:
+        """Identifies a request: datasource, upstream credential, endpoint and parameters."""
+        request = json.dumps(
+            [self.config.get("id") or self.name, self.headers, endpoint, params],
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(request.encode()).hexdigest()
+        return f"{self.upstream_key()}:{digest}"
+
+    @staticmethod
+    def _cache_response(
+        cache: ResponseCache, key: str, response: httpx.Response, data: Any
+    ) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if "no-store" in response.headers.get("Cache-Control", "").lower():
+            etag = last_modified = None
+        if not etag and not last_modified:
+            cache.discard(key)
+            return
+        cache.store(key, CachedResponse(data, etag, last_modified, len(response.content)))
 
     def _extract_path(self, data: Any, path: str) -> Any:
         """Extract nested data using dot notation path."""
@@ -166,11 +319,6 @@ class ManualDataConnector(BaseConnector):
 
         The 'sample_data' field in config contains the manual data.
         """
-        data = self.settings.get("sample_data", {})
-
-        if isinstance(data, dict):
-            data = self.apply_field_mappings(data)
-        elif isinstance(data, list):
-            data = [self.apply_field_mappings(item) for item in data]
+        data = self.transform(self.settings.get("sample_data", {}))
 
         return DataResult(success=True, data=data, source_type="manual")
@@ -0,0 +1,32 @@
+from functools import lru_cache
+from typing import Any, Protocol
+
+from app.config import get_settings
+
+
+class DatabaseClient(Protocol):
+    """
+    The part of the Supabase client interface the API depends on.
+
+    Implemented by the real Supabase client and by `MemoryClient`.
+    """
+
+    def table(self, name: str) -> Any: ...
+
+
+@lru_cache
+def get_db_client() -> DatabaseClient:
+    """Get the configured database backend (`Settings.db_backend`)."""
+    settings = get_settings()
+
+    if settings.db_backend == "memory":
+        from app.db.memory import MemoryClient
+
+        return MemoryClient()
+
+    if settings.db_backend == "supabase":
+        from app.db.supabase import get_supabase_client
+
+        return get_supabase_client()
+
+    raise ValueError(f"Unknown database backend: {settings.db_backend}")
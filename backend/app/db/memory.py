@@ -0,0 +1,247 @@
+import copy
+import operator
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+Predicate = Callable[[dict[str, Any]], bool]
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+}
+
+
+class MemoryResponse:
+    """Mirrors the `.data` attribute of a Supabase API response."""
+
+    def __init__(self, data: Any):
+        self.data = data
+
+
+class MemoryQuery:
+    """
+    In-memory implementation of the Supabase query builder subset used by the API.
+
+    Supports select/insert/update/delete with eq/neq/lt/lte/gt/gte and PostgREST-style
+    `or_` filters, order, limit and single.
+    """
+
+    def __init__(self, client: "MemoryClient", table: str):
+        self._client = client
+        self._table = table
+        self._operation = "select"
+        self._columns: list[str] | None = None
+        self._payload: Any = None
+        self._filters: list[Predicate] = []
+        self._order: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+        self._single = False
+
+    def select(self, columns: str = "*") -> "MemoryQuery":
+        self._operation = "select"
+        if columns.strip() != "*":
+            self._columns = [c.strip() for c in columns.split(",") if c.strip()]
+        return self
+
+    def insert(self, payload: dict[str, Any] | list[dict[str, Any]]) -> "MemoryQuery":
+        self._operation = "insert"
+        self._payload = payload
+        return self
+
+    def update(self, payload: dict[str, Any]) -> "MemoryQuery":
+        self._operation = "update"
+        self._payload = payload
+        return self
+
+    def delete(self) -> "MemoryQuery":
+        self._operation = "delete"
+        return self
+
+    def eq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "neq", value)
+
+    def lt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "lte", value)
+
+    def gt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "gte", value)
+
+    def or_(self, filters: str) -> "MemoryQuery":
+        """Match rows satisfying any of `filters`, e.g. `a.lt.1,and(a.eq.1,b.gt.2)`."""
+        self._filters.append(_parse_logic("or", filters))
+        return self
+
+    def _filter(self, column: str, op: str, value: Any) -> "MemoryQuery":
+        self._filters.append(_condition(column, op, value))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "MemoryQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> "MemoryQuery":
+        self._limit = count
+        return self
+
+    def single(self) -> "MemoryQuery":
+        self._single = True
+        return self
+
+    def execute(self) -> MemoryResponse:
+        with self._client.lock:
+            rows = self._client.tables.setdefault(self._table, [])
+            if self._operation == "insert":
+                result = self._insert(rows)
+            elif self._operation == "update":
+                result = self._update(rows)
+            elif self._operation == "delete":
+                result = self._delete(rows)
+            else:
+                result = self._select(rows)
+            # Callers must never share mutable state with the store
+            result = copy.deepcopy(result)
+
+        if self._single:
+            return MemoryResponse(result[0] if result else None)
+        return MemoryResponse(result)
+
+    def _matches(self, row: dict[str, Any]) -> bool:
+        return all(predicate(row) for predicate in self._filters)
+
+    def _select(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        result = [row for row in rows if self._matches(row)]
+        for column, desc in reversed(self._order):
+            result.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        if self._limit is not None:
+            result = result[: self._limit]
+        if self._columns is not None:
+            result = [{c: row.get(c) for c in self._columns} for row in result]
+        return result
+
+    def _insert(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        now = _now()
+        inserted = []
+        for item in payload:
+            row = {
+                "id": str(uuid.uuid4()),
+                "is_active": True,
+                "created_at": now,
+                "updated_at": now,
+                **copy.deepcopy(item),
+            }
+            rows.append(row)
+            inserted.append(row)
+        return inserted
+
+    def _update(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        updated = []
+        for row in rows:
+            if self._matches(row):
+                row.update(copy.deepcopy(self._payload))
+                if "updated_at" not in self._payload:
+                    row["updated_at"] = _now()
+                updated.append(row)
+        return updated
+
+    def _delete(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        deleted = [row for row in rows if self._matches(row)]
+        rows[:] = [row for row in rows if not self._matches(row)]
+        return deleted
+
+
+class MemoryClient:
+    """Drop-in replacement for the Supabase client with tables held in process memory."""
+
+    def __init__(self):
+        self.tables: dict[str, list[dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+
+
+def _condition(column: str, op: str, value: Any) -> Predicate:
+    compare = _OPERATORS[op]
+    # Values arrive as they would over PostgREST, so compare by string form, or
+    # as instants when both are timestamps, whatever their precision or offset
+    expected = _comparable(value)
+
+    def predicate(row: dict[str, Any]) -> bool:
+        if row.get(column) is None:
+            return False
+        actual = _comparable(row[column])
+        if isinstance(actual, datetime) != isinstance(expected, datetime):
+            return compare(str(row[column]), str(value))
+        return compare(actual, expected)
+
+    return predicate
+
+
+def _comparable(value: Any) -> Any:
+    """`value` as a timezone-aware datetime if it is one, else its string form."""
+    if isinstance(value, datetime):
+        return value if value.tzinfo is not None else str(value)
+    text = str(value)
+    try:
+        timestamp = datetime.fromisoformat(text)
+    except ValueError:
+        return text
+    return timestamp if timestamp.tzinfo is not None else text
+
+
+def _split_top_level(filters: str) -> list[str]:
+    """Split on commas that aren't nested inside parentheses or double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in filters:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _parse_logic(kind: str, filters: str) -> Predicate:
+    """Parse the PostgREST logic tree syntax used by `or_` into a row predicate."""
+    predicates = []
+    for part in _split_top_level(filters):
+        if part.startswith(("and(", "or(")) and part.endswith(")"):
+            nested, _, inner = part.partition("(")
+            predicates.append(_parse_logic(nested, inner[:-1]))
+            continue
+        column, op, value = part.split(".", 2)
+        if op not in _OPERATORS:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        predicates.append(_condition(column, op, value))
+
+    combine = any if kind == "or" else all
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
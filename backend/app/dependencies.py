@@ -1,19 +1,72 @@
 """Shared dependencies for the application."""
 
-from app.pdf.engine import PDFEngine
+from typing import TYPE_CHECKING
+
+from app.pdf.base import RenderBackend
+from app.services.audit import AuditWriter
+from app.services.template_builds import TemplateBuilder
+
+if TYPE_CHECKING:
+    from app.pdf.native import NativeRenderer
 
 # Global PDF engine instance
-_pdf_engine: PDFEngine | None = None
+_pdf_engine: RenderBackend | None = None
+
+# Global native renderer instance; None when unavailable
+_native_renderer: "NativeRenderer | None" = None
+
+# Global audit writer instance
+_audit_writer: AuditWriter | None = None
+
+# Global template builder instance
+_template_builder: TemplateBuilder | None = None
 
 
-def set_pdf_engine(engine: PDFEngine) -> None:
+def set_pdf_engine(engine: RenderBackend) -> None:
     """Set the global PDF engine instance."""
     global _pdf_engine
     _pdf_engine = engine
 
 
-def get_pdf_engine() -> PDFEngine:
+def get_pdf_engine() -> RenderBackend:
     """Get the PDF engine instance."""
     if _pdf_engine is None:
         raise RuntimeError("PDF Engine not initialized")
     return _pdf_engine
+
+
+def set_native_renderer(renderer: "NativeRenderer | None") -> None:
+    """Set the global native renderer instance."""
+    global _native_renderer
+    _native_renderer = renderer
+
+
+def get_native_renderer() -> "NativeRenderer | None":
+    """Get the native renderer instance, or None if templates always render in the browser."""
+    return _native_renderer
+
+
+def set_audit_writer(writer: AuditWriter) -> None:
+    """Set the global audit writer instance."""
+    global _audit_writer
+    _audit_writer = writer
+
+
+def get_audit_writer() -> AuditWriter:
+    """Get the audit writer instance."""
+    if _audit_writer is None:
+        raise RuntimeError("Audit writer not initialized")
+    return _audit_writer
+
+
+def set_template_builder(builder: TemplateBuilder) -> None:
+    """Set the global template builder instance."""
+    global _template_builder
+    _template_builder = builder
+
+
+def get_template_builder() -> TemplateBuilder:
+    """Get the template builder instance."""
+    if _template_builder is None:
+        raise RuntimeError("Template builder not initialized")
+    return _template_builder
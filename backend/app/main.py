@@ -1,25 +1,105 @@
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from typing import TYPE_CHECKING
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.config import get_settings
+from app.pdf.base import RenderBackend
 from app.pdf.engine import PDFEngine
-from app.dependencies import set_pdf_engine
+from app.db.client import get_db_client
+from app.dependencies import (
+    set_audit_writer,
+    set_native_renderer,
+    set_pdf_engine,
+    set_template_builder,
+)
+from app.metrics import ServerTimingMiddleware
+from app.services.audit import AuditWriter
+from app.services.template_builds import TemplateBuilder
+from app.storage import get_storage_backend
+from app.templates.cache import get_template_cache
+
+if TYPE_CHECKING:
+    from app.pdf.native import NativeRenderer
+
+
+async def warm_up_pdf_engine(pdf_engine: RenderBackend) -> None:
+    """Launch the browser in the background; /ready reports success once it is up."""
+    try:
+        await pdf_engine.initialize()
+        print("PDF Engine initialized")
+    except Exception as e:
+        print(f"PDF Engine failed to initialize: {e}")
+
+
+def create_pdf_engine() -> RenderBackend:
+    """Render in-process, or through render workers when `render_workers` is set."""
+    settings = get_settings()
+    if settings.render_workers:
+        from app.pdf.remote import RenderWorkerPool
+
+        return RenderWorkerPool(settings.render_workers, timeout=settings.render_timeout)
+    return PDFEngine(
+        max_concurrent_pages=settings.pdf_max_concurrent_pages,
+        tenant_page_limit=settings.pdf_tenant_page_limit,
+        tenant_weights=settings.pdf_tenant_weights,
+    )
+
+
+def create_native_renderer() -> "NativeRenderer | None":
+    """The browser-free renderer for simple templates, if enabled and reportlab is installed."""
+    if not get_settings().native_renderer:
+        return None
+    try:
+        from app.pdf.native import NativeRenderer
+    except ImportError:
+        print("Native renderer unavailable: reportlab is not installed")
+        return None
+    return NativeRenderer()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan - initialize and cleanup resources."""
-    # Startup: Initialize PDF engine with Playwright
-    pdf_engine = PDFEngine()
-    await pdf_engine.initialize()
+    # Startup: Start PDF engine warmup without blocking startup on Chromium launch
+    settings = get_settings()
+    pdf_engine = create_pdf_engine()
     set_pdf_engine(pdf_engine)
-    print("PDF Engine initialized")
+    warmup = asyncio.create_task(warm_up_pdf_engine(pdf_engine))
+    set_native_renderer(create_native_renderer())
+
+    audit_writer = AuditWriter(
+        get_db_client(),
+        get_storage_backend(),
+        batch_size=settings.audit_batch_size,
+        flush_interval=settings.audit_flush_interval,
+        input_ref_threshold=settings.audit_input_ref_threshold,
+    )
+    audit_writer.start()
+    set_audit_writer(audit_writer)
+
+    template_builder = TemplateBuilder(
+        get_db_client(),
+        get_storage_backend(),
+        pdf_engine,
+        get_template_cache(),
+        delay=settings.template_build_delay,
+        thumbnails=settings.template_thumbnails,
+    )
+    set_template_builder(template_builder)
 
     yield
 
     # Shutdown: Cleanup
+    warmup.cancel()
+    await asyncio.gather(warmup, return_exceptions=True)
+    await template_builder.close()
+    await audit_writer.close()
     await pdf_engine.shutdown()
+    await get_storage_backend().close()
     print("PDF Engine shutdown complete")
 
 
@@ -40,8 +120,12 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Server-Timing", "ETag", "X-Next-Cursor"],
     )
 
+    # Per-stage timings reported back to clients
+    app.add_middleware(ServerTimingMiddleware)
+
     # Import and include API routes here to avoid circular imports
     from app.api.v1.router import api_router
     app.include_router(api_router, prefix="/api/v1")
@@ -50,10 +134,28 @@ def create_app() -> FastAPI:
     async def health_check():
         from app.dependencies import get_pdf_engine
         try:
-            get_pdf_engine()
+            pdf_engine_ready = get_pdf_engine().is_ready
+        except RuntimeError:
+            pdf_engine_ready = False
+        if pdf_engine_ready:
             return {"status": "healthy", "pdf_engine": True}
+        return {"status": "degraded", "pdf_engine": False}
+
+    @app.get("/ready")
+    async def readiness_check():
+        """Readiness probe: succeeds only once the browser can take render jobs."""
+        from app.dependencies import get_pdf_engine
+        try:
+            pdf_engine_ready = get_pdf_engine().is_ready
         except RuntimeError:
-            return {"status": "degraded", "pdf_engine": False}
+            pdf_engine_ready = False
+        if pdf_engine_ready:
+            return {"status": "ready"}
+        return JSONResponse(status_code=503, content={"status": "starting"})
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
     return app
 
@@ -0,0 +1,32 @@
+from app.metrics.registry import (
+    BROWSER_PAGES_ACTIVE,
+    BROWSER_PAGES_CAPACITY,
+    BROWSER_QUEUE_DEPTH,
+    CACHE_REQUESTS,
+    CONNECTOR_UPSTREAM_CALLS,
+    PDF_OPTIMIZED_RATIO,
+    PDF_SIZE_BYTES,
+    RENDER_QUEUE_WAIT_SECONDS,
+    RENDERS,
+    SINGLEFLIGHT_CALLS,
+    STAGE_SECONDS,
+    record_cache,
+)
+from app.metrics.timing import ServerTimingMiddleware, stage
+
+__all__ = [
+    "BROWSER_PAGES_ACTIVE",
+    "BROWSER_PAGES_CAPACITY",
+    "BROWSER_QUEUE_DEPTH",
+    "CACHE_REQUESTS",
+    "CONNECTOR_UPSTREAM_CALLS",
+    "PDF_OPTIMIZED_RATIO",
+    "PDF_SIZE_BYTES",
+    "RENDER_QUEUE_WAIT_SECONDS",
+    "RENDERS",
+    "SINGLEFLIGHT_CALLS",
+    "STAGE_SECONDS",
+    "ServerTimingMiddleware",
+    "record_cache",
+    "stage",
+]
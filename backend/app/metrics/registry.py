@@ -0,0 +1,75 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Pipeline stages: template_lookup, datasource_lookup, connector_fetch, render_plan,
+# request_key, compile, set_content, page_pdf, pdf_optimize, upload, db_insert
+STAGE_SECONDS = Histogram(
+    "pdfgen_stage_duration_seconds",
+    "Time spent in each PDF generation pipeline stage",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+BROWSER_PAGES_ACTIVE = Gauge(
+    "pdfgen_browser_pages_active",
+    "Number of browser pages currently rendering",
+)
+
+BROWSER_PAGES_CAPACITY = Gauge(
+    "pdfgen_browser_pages_capacity",
+    "Maximum number of browser pages that may render concurrently",
+)
+
+BROWSER_QUEUE_DEPTH = Gauge(
+    "pdfgen_browser_queue_depth",
+    "Number of render jobs waiting for a free browser page",
+)
+
+RENDER_QUEUE_WAIT_SECONDS = Histogram(
+    "pdfgen_render_queue_wait_seconds",
+    "Time renders waited for a browser page, by priority class",
+    ["priority"],
+    buckets=(0, 0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+CACHE_REQUESTS = Counter(
+    "pdfgen_cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ["cache", "result"],
+)
+
+PDF_SIZE_BYTES = Histogram(
+    "pdfgen_pdf_size_bytes",
+    "Size of generated PDF documents",
+    buckets=(10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000, 20_000_000),
+)
+
+RENDERS = Counter(
+    "pdfgen_renders_total",
+    "PDF renders by renderer (browser, native, or native_fallback when native gave up)",
+    ["renderer"],
+)
+
+PDF_OPTIMIZED_RATIO = Histogram(
+    "pdfgen_pdf_optimized_ratio",
+    "Size of post-processed PDFs relative to the rendered file",
+    buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 1.0, 1.1),
+)
+
+SINGLEFLIGHT_CALLS = Counter(
+    "pdfgen_singleflight_calls_total",
+    "Coalesced calls by flight and result (run, or shared when an identical call in "
+    "flight was joined instead of repeating the work)",
+    ["flight", "result"],
+)
+
+CONNECTOR_UPSTREAM_CALLS = Counter(
+    "pdfgen_connector_upstream_calls_total",
+    "Connector calls to upstream APIs by connector type and result (success, error, "
+    "failure, retried, short_circuited by an open circuit, rate_limited)",
+    ["connector", "result"],
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a lookup against the named cache."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
@@ -0,0 +1,74 @@
+from abc import ABC, abstractmethod
+from contextlib import AbstractAsyncContextManager
+from typing import Any
+
+from app.pdf.scheduler import DEFAULT_TENANT, RenderPriority
+from app.schemas import PDFOptions
+
+
+class RenderBackend(ABC):
+    """
+    Abstract base class for HTML-to-PDF renderers.
+
+    A render is split into checking out capacity (`page`) and rendering on it
+    (`render_pdf`) so callers can reserve capacity while their HTML is still
+    being prepared. Capacity is granted by priority class, then fairly between
+    tenants (see `RenderScheduler`).
+    """
+
+    @abstractmethod
+    async def initialize(self) -> None:
+        """Start the renderer. May run in the background; renders wait for it."""
+        pass
+
+    @abstractmethod
+    async def shutdown(self) -> None:
+        """Release all resources. Call at application shutdown."""
+        pass
+
+    @property
+    @abstractmethod
+    def is_ready(self) -> bool:
+        """Whether render capacity is available."""
+        pass
+
+    @abstractmethod
+    async def wait_until_ready(self) -> None:
+        """Wait for `initialize` to finish, raising if the renderer isn't available."""
+        pass
+
+    @abstractmethod
+    def page(
+        self,
+        priority: RenderPriority = RenderPriority.API,
+        tenant: str = DEFAULT_TENANT,
+        **context_options: Any,
+    ) -> AbstractAsyncContextManager[Any]:
+        """Check out render capacity; the yielded handle is passed to `render_pdf`."""
+        pass
+
+    @abstractmethod
+    async def render_pdf(self, page: Any, html_content: str, options: PDFOptions) -> bytes:
+        """Render HTML content to a PDF on checked-out capacity."""
+        pass
+
+    @abstractmethod
+    async def generate_screenshot(
+        self,
+        html_content: str,
+        priority: RenderPriority = RenderPriority.INTERACTIVE,
+        tenant: str = DEFAULT_TENANT,
+    ) -> bytes:
+        """Generate a PNG screenshot thumbnail of the HTML content."""
+        pass
+
+    async def generate_pdf(
+        self,
+        html_content: str,
+        options: PDFOptions,
+        priority: RenderPriority = RenderPriority.API,
+        tenant: str = DEFAULT_TENANT,
+    ) -> bytes:
+        """Generate a PDF from HTML content."""
+        async with self.page(priority, tenant) as page:
+            return await self.render_pdf(page, html_content, options)
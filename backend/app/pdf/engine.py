@@ -1,22 +1,96 @@
-from playwright.async_api import async_playwright, Browser, Playwright
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
+from app.metrics import BROWSER_PAGES_CAPACITY, PDF_SIZE_BYTES, stage
+from app.pdf.base import RenderBackend
+from app.pdf.scheduler import DEFAULT_TENANT, RenderPriority, RenderScheduler
 from app.schemas import PDFOptions
 
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, Playwright
 
-class PDFEngine:
-    """Playwright-based PDF generation engine."""
 
-    def __init__(self):
-        self._playwright: Playwright | None = None
-        self._browser: Browser | None = None
+class PDFEngine(RenderBackend):
+    """
+    Playwright-based PDF generation engine.
 
-    async def initialize(self):
-        """Initialize the browser instance. Call once at application startup."""
-        self._playwright = await async_playwright().start()
-        self._browser = await self._playwright.chromium.launch(
-            headless=True,
-            args=["--no-sandbox", "--disable-dev-shm-usage"],
+    Pages are handed out by a `RenderScheduler`: by priority class first, then
+    fairly between tenants, with an optional cap on pages per tenant.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_pages: int = 8,
+        ready_timeout: float = 60.0,
+        tenant_page_limit: int | None = None,
+        tenant_weights: dict[str, float] | None = None,
+    ):
+        self._playwright: "Playwright | None" = None
+        self._browser: "Browser | None" = None
+        self._max_concurrent_pages = max_concurrent_pages
+        self._scheduler = RenderScheduler(
+            max_concurrent_pages, tenant_limit=tenant_page_limit, tenant_weights=tenant_weights
         )
+        self._ready = asyncio.Event()
+        self._ready_timeout = ready_timeout
+        BROWSER_PAGES_CAPACITY.set(max_concurrent_pages)
+
+    async def initialize(self):
+        """
+        Initialize the browser instance. Call once at application startup.
+
+        May run in the background: pages requested before it finishes wait for it.
+        """
+        # Imported here so importing the app doesn't pay for loading Playwright
+        from playwright.async_api import async_playwright
+
+        try:
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=True,
+                args=["--no-sandbox", "--disable-dev-shm-usage"],
+            )
+
+            # The first context and page are much slower than later ones; pay that now
+            context = await self._browser.new_context()
+            try:
+                page = await context.new_page()
+                await page.set_content("<p></p>")
+            finally:
+                await context.close()
+        finally:
+            # Also set on failure so waiters fail fast instead of timing out
+            self._ready.set()
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of pages rendering concurrently."""
+        return self._max_concurrent_pages
+
+    @property
+    def active(self) -> int:
+        """Number of pages currently checked out."""
+        return self._scheduler.active
+
+    @property
+    def queued(self) -> int:
+        """Number of callers waiting for a page."""
+        return self._scheduler.queued
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the browser is up and pages can be rendered."""
+        return self._ready.is_set() and self._browser is not None
+
+    async def wait_until_ready(self) -> None:
+        """Wait for `initialize` to finish, raising if the browser isn't available."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), self._ready_timeout)
+        except asyncio.TimeoutError:
+            pass
+        if not self.is_ready:
+            raise RuntimeError("PDF Engine not initialized. Call initialize() first.")
 
     async def shutdown(self):
         """Clean up resources. Call at application shutdown."""
@@ -25,19 +99,39 @@ class PDFEngine:
         if self._playwright:
             await self._playwright.stop()
 
-    async def generate_pdf(self, html_content: str, options: PDFOptions) -> bytes:
-        """Generate a PDF from HTML content."""
-        if not self._browser:
-            raise RuntimeError("PDF Engine not initialized. Call initialize() first.")
+    @asynccontextmanager
+    async def page(
+        self,
+        priority: RenderPriority = RenderPriority.API,
+        tenant: str = DEFAULT_TENANT,
+        **context_options: Any,
+    ) -> AsyncIterator["Page"]:
+        """
+        Check out a fresh page in its own browser context.
 
-        context = await self._browser.new_context()
-        page = await context.new_page()
+        Waits for the browser to be ready and for a page slot, scheduled by
+        `priority` and `tenant`; the context is closed and the slot released on exit.
+        """
+        await self.wait_until_ready()
 
+        await self._scheduler.acquire(priority, tenant)
         try:
-            # Set HTML content
+            context = await self._browser.new_context(**context_options)
+            try:
+                yield await context.new_page()
+            finally:
+                await context.close()
+        finally:
+            self._scheduler.release(tenant)
+
+    async def render_pdf(self, page: "Page", html_content: str, options: PDFOptions) -> bytes:
+        """Render HTML content to a PDF on a checked-out page."""
+        # Set HTML content
+        with stage("set_content"):
             await page.set_content(html_content, wait_until="networkidle")
 
-            # Generate PDF
+        # Generate PDF
+        with stage("page_pdf"):
             pdf_bytes = await page.pdf(
                 format=options.page_size,
                 landscape=options.orientation == "landscape",
@@ -50,23 +144,20 @@ class PDFEngine:
                 print_background=True,
             )
 
-            return pdf_bytes
-        finally:
-            await context.close()
+        PDF_SIZE_BYTES.observe(len(pdf_bytes))
+        return pdf_bytes
 
-    async def generate_screenshot(self, html_content: str) -> bytes:
+    async def generate_screenshot(
+        self,
+        html_content: str,
+        priority: RenderPriority = RenderPriority.INTERACTIVE,
+        tenant: str = DEFAULT_TENANT,
+    ) -> bytes:
         """Generate a screenshot thumbnail of the HTML content."""
-        if not self._browser:
-            raise RuntimeError("PDF Engine not initialized")
-
-        context = await self._browser.new_context(
-            viewport={"width": 794, "height": 1123}  # A4 dimensions
-        )
-        page = await context.new_page()
-
-        try:
+        async with self.page(
+            priority,
+            tenant,
+            viewport={"width": 794, "height": 1123},  # A4 dimensions
+        ) as page:
             await page.set_content(html_content, wait_until="networkidle")
-            screenshot = await page.screenshot(type="png")
-            return screenshot
-        finally:
-            await context.close()
+            return await page.screenshot(type="png")
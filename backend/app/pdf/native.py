@@ -0,0 +1,545 @@
+import io
+import re
+from bisect import bisect_right
+from html import escape
+from html.parser import HTMLParser
+from itertools import accumulate
+from typing import Any
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (
+    BaseDocTemplate,
+    Flowable,
+    Frame,
+    HRFlowable,
+    PageTemplate,
+    Paragraph,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from app.connectors.columnar import ColumnarTable
+from app.metrics import PDF_SIZE_BYTES
+from app.schemas import PDFOptions
+from app.templates.compiler import TemplateCompiler
+
+# Components laid out natively; templates using anything else render in the browser
+NATIVE_COMPONENTS = frozenset(
+    {"Container", "TextBlock", "TableBlock", "SpacerBlock", "DividerBlock"}
+)
+
+# Playwright's page formats, in inches
+PAGE_FORMATS = {
+    "letter": (8.5, 11),
+    "legal": (8.5, 14),
+    "tabloid": (11, 17),
+    "ledger": (17, 11),
+    "a0": (33.1, 46.8),
+    "a1": (23.4, 33.1),
+    "a2": (16.54, 23.4),
+    "a3": (11.7, 16.54),
+    "a4": (8.27, 11.7),
+    "a5": (5.83, 8.27),
+    "a6": (4.13, 5.83),
+}
+
+# Points per unit of the CSS lengths Playwright accepts for margins
+_UNITS = {"px": 0.75, "in": 72.0, "cm": 72 / 2.54, "mm": 72 / 25.4}
+_LENGTH = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(px|in|cm|mm)?\s*$")
+PX = _UNITS["px"]
+
+# Document defaults from the compiler's HTML shell
+BODY_FONT_SIZE = 14 * PX
+BODY_LEADING = BODY_FONT_SIZE * 1.5
+BODY_COLOR = "#1a1a1a"
+
+# Block tags TipTap emits and their font size relative to the text block
+_BLOCKS = {"p": 1.0, "h1": 2.0, "h2": 1.5, "h3": 1.17, "h4": 1.0, "h5": 0.83, "h6": 0.67}
+# Inline tags and the reportlab paragraph markup they map to
+_INLINE = {
+    "b": "b",
+    "strong": "b",
+    "i": "i",
+    "em": "i",
+    "u": "u",
+    "s": "strike",
+    "strike": "strike",
+    "code": 'font face="Courier"',
+}
+_ALIGNMENTS = {"left": TA_LEFT, "center": TA_CENTER, "right": TA_RIGHT, "justify": TA_JUSTIFY}
+
+
+class NativeRenderError(ValueError):
+    """The template or its data uses something the native renderer can't lay out."""
+
+
+class NativeRenderer:
+    """
+    Lays out simple Craft.js templates as PDF directly, without a browser.
+
+    Covers templates built only from `NATIVE_COMPONENTS` whose text uses the
+    basic markup the editor produces (paragraphs, headings, bold, italic,
+    underline, strikethrough, code, line breaks) in the standard PDF fonts'
+    character set. Sizes, padding, borders and colors follow the HTML the
+    compiler produces, with Helvetica, Times or Courier standing in for the
+    template's font; line breaks can fall differently than in the browser.
+    Long tables break across pages with their header repeated, as in print.
+    """
+
+    def supports(self, nodes: dict[str, Any], options: PDFOptions) -> bool:
+        """Whether a template and page setup qualify. Data can still force a fallback."""
+        try:
+            _page_layout(options)
+        except NativeRenderError:
+            return False
+        if not isinstance(nodes.get("ROOT"), dict):
+            return False
+
+        seen: set[str] = set()
+        stack = ["ROOT"]
+        while stack:
+            node_id = stack.pop()
+            if node_id in seen:
+                return False  # Cycles and shared nodes are left to the browser path
+            seen.add(node_id)
+            node = nodes[node_id]
+            if not isinstance(node, dict):
+                return False
+            name = TemplateCompiler._resolved_name(node)
+            if name not in NATIVE_COMPONENTS:
+                return False
+            if name == "TextBlock":
+                text = node.get("props", {}).get("text", "")
+                if not isinstance(text, str):
+                    return False
+                try:
+                    _text_blocks(text)
+                except NativeRenderError:
+                    return False
+            stack.extend(TemplateCompiler._child_ids(node, nodes))
+        return True
+
+    def render(self, nodes: dict[str, Any], data: dict[str, Any], options: PDFOptions) -> bytes:
+        """
+        Render a template that `supports` accepted. CPU-bound; run it in a thread.
+
+        Raises:
+            NativeRenderError: If bound data brings in something unsupported
+                (markup, characters outside the standard fonts)
+        """
+        compiler = TemplateCompiler()
+        (width, height), (top, right, bottom, left) = _page_layout(options)
+
+        story: list[Flowable] = []
+        self._append_flowables(compiler, nodes["ROOT"], nodes, data, width - left - right, story)
+
+        buffer = io.BytesIO()
+        document = BaseDocTemplate(
+            buffer,
+            pagesize=(width, height),
+            leftMargin=left,
+            rightMargin=right,
+            topMargin=top,
+            bottomMargin=bottom,
+        )
+        frame = Frame(
+            left,
+            bottom,
+            width - left - right,
+            height - top - bottom,
+            leftPadding=0,
+            rightPadding=0,
+            topPadding=0,
+            bottomPadding=0,
+        )
+        document.addPageTemplates([PageTemplate(frames=[frame])])
+        document.build(story)
+
+        pdf_bytes = buffer.getvalue()
+        PDF_SIZE_BYTES.observe(len(pdf_bytes))
+        return pdf_bytes
+
+    def _append_flowables(
+        self,
+        compiler: TemplateCompiler,
+        node: dict,
+        nodes: dict,
+        data: dict,
+        frame_width: float,
+        story: list[Flowable],
+    ) -> None:
+        name = compiler._resolved_name(node)
+        props = node.get("props", {})
+        if name == "TextBlock":
+            text = compiler._replace_bindings(props.get("text", ""), data)
+            story.extend(_text_flowables(text, props))
+        elif name == "TableBlock":
+            story.append(_table_flowable(compiler, props, data, frame_width))
+        elif name == "SpacerBlock":
+            story.append(Spacer(0, float(props.get("height", 40)) * PX))
+        elif name == "DividerBlock":
+            story.append(_divider_flowable(props))
+        else:  # Container
+            for child_id in compiler._child_ids(node, nodes):
+                self._append_flowables(compiler, nodes[child_id], nodes, data, frame_width, story)
+
+
+def _page_layout(options: PDFOptions) -> tuple[tuple[float, float], tuple[float, ...]]:
+    """`((width, height), (top, right, bottom, left))` in points."""
+    page_format = PAGE_FORMATS.get(options.page_size.lower())
+    if page_format is None:
+        raise NativeRenderError(f"Unknown page size {options.page_size!r}")
+    width, height = page_format[0] * 72, page_format[1] * 72
+    if options.orientation == "landscape":
+        width, height = height, width
+    margins = tuple(
+        _length(margin)
+        for margin in (
+            options.margin_top,
+            options.margin_right,
+            options.margin_bottom,
+            options.margin_left,
+        )
+    )
+    if margins[0] + margins[2] >= height or margins[1] + margins[3] >= width:
+        raise NativeRenderError("Margins leave no room for content")
+    return (width, height), margins
+
+
+def _length(value: str) -> float:
+    match = _LENGTH.match(str(value))
+    if match is None:
+        raise NativeRenderError(f"Unsupported length {value!r}")
+    return float(match.group(1)) * _UNITS[match.group(2) or "px"]
+
+
+def _color(value: Any) -> colors.Color:
+    try:
+        return colors.toColor(str(value).strip())
+    except ValueError:
+        raise NativeRenderError(f"Unsupported color {value!r}")
+
+
+def _font(family: str, bold: bool = False) -> str:
+    """The standard PDF font closest to a CSS font-family list."""
+    family = family.lower()
+    if "mono" in family or "courier" in family:
+        base = "Courier"
+    elif ("serif" in family and "sans-serif" not in family) or "times" in family:
+        base = "Times-Roman"
+    else:
+        base = "Helvetica"
+    if not bold:
+        return base
+    return "Times-Bold" if base == "Times-Roman" else f"{base}-Bold"
+
+
+def _check_encodable(text: str) -> None:
+    try:
+        text.encode("cp1252")
+    except UnicodeEncodeError:
+        raise NativeRenderError("Text uses characters outside the standard PDF fonts")
+
+
+class _TextMarkup(HTMLParser):
+    """Translates a text block's HTML into reportlab paragraph markup, block by block."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # (font scale, markup parts) per block
+        self.blocks: list[tuple[float, list[str]]] = []
+        self._parts: list[str] | None = None
+        self._open: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag in _BLOCKS:
+            if self._open:
+                raise NativeRenderError(f"<{tag}> inside inline markup")
+            self._parts = []
+            self.blocks.append((_BLOCKS[tag], self._parts))
+            if tag != "p":
+                # Headings are bold
+                self._open.append(tag)
+                self._parts.append("<b>")
+        elif tag == "br":
+            self._current().append("<br/>")
+        elif tag in _INLINE:
+            self._current().append(f"<{_INLINE[tag]}>")
+            self._open.append(tag)
+        else:
+            raise NativeRenderError(f"<{tag}> isn't supported")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _BLOCKS:
+            if tag != "p" and self._open == [tag]:
+                self._open.pop()
+                self._current().append("</b>")
+            if self._open:
+                raise NativeRenderError(f"Unclosed markup in <{tag}>")
+            self._parts = None
+        elif tag in _INLINE:
+            if not self._open or self._open[-1] != tag:
+                raise NativeRenderError(f"Mismatched </{tag}>")
+            self._open.pop()
+            self._current().append(f"</{_INLINE[tag].split()[0]}>")
+        elif tag != "br":
+            raise NativeRenderError(f"</{tag}> isn't supported")
+
+    def handle_data(self, data: str) -> None:
+        _check_encodable(data)
+        self._current().append(escape(data, quote=False))
+
+    def _current(self) -> list[str]:
+        if self._parts is None:
+            # Text outside any block tag forms an anonymous block, as in HTML
+            self._parts = []
+            self.blocks.append((1.0, self._parts))
+        return self._parts
+
+
+def _text_blocks(text: str) -> list[tuple[float, str]]:
+    """`(font scale, paragraph markup)` per visible block of a text block's HTML."""
+    parser = _TextMarkup()
+    parser.feed(text)
+    parser.close()
+    if parser._open:
+        raise NativeRenderError("Unclosed inline markup")
+    blocks = []
+    for scale, parts in parser.blocks:
+        markup = "".join(parts)
+        # Blocks with neither text nor line breaks take no space in the browser
+        if "<br/>" in parts or re.sub(r"<[^>]*>", "", markup).strip():
+            blocks.append((scale, markup))
+    return blocks
+
+
+def _text_flowables(text: str, props: dict) -> list[Flowable]:
+    font_size = float(props.get("fontSize", 16)) * PX
+    line_height = float(props.get("lineHeight", 1.5))
+    alignment = _ALIGNMENTS.get(str(props.get("textAlign", "left")))
+    if alignment is None:
+        raise NativeRenderError(f"Unsupported alignment {props.get('textAlign')!r}")
+    color = _color(props.get("color", "#000000"))
+    font = _font(str(props.get("fontFamily", "sans-serif")))
+
+    flowables: list[Flowable] = []
+    for scale, markup in _text_blocks(text):
+        size = font_size * scale
+        style = ParagraphStyle(
+            "text",
+            fontName=font,
+            fontSize=size,
+            leading=size * line_height,
+            alignment=alignment,
+            textColor=color,
+        )
+        flowables.append(Paragraph(markup, style))
+    return flowables
+
+
+def _divider_flowable(props: dict) -> Flowable:
+    margin = float(props.get("margin", 16)) * PX
+    style = str(props.get("style", "solid"))
+    dash = {"dashed": (3, 3), "dotted": (1, 2)}.get(style)
+    if dash is None and style != "solid":
+        raise NativeRenderError(f"Unsupported divider style {style!r}")
+    return HRFlowable(
+        width="100%",
+        thickness=float(props.get("thickness", 1)) * PX,
+        color=_color(props.get("color", "#e0e0e0")),
+        spaceBefore=margin,
+        spaceAfter=margin,
+        dash=dash,
+    )
+
+
+def _cell_text(value: str) -> str:
+    if "<" in value:
+        raise NativeRenderError("Table cells with markup render in the browser")
+    _check_encodable(value)
+    # Whitespace collapses, as in HTML
+    return " ".join(value.split())
+
+
+def _table_flowable(
+    compiler: TemplateCompiler, props: dict, data: dict, frame_width: float
+) -> Flowable:
+    columns = props.get("columns", [])
+    border = _color(props.get("borderColor", "#e0e0e0"))
+    table_data = compiler._get_bound_value(props.get("dataPath", ""), data)
+    if not isinstance(table_data, (list, ColumnarTable)):
+        table_data = []
+    if not columns:
+        # The browser draws an empty bordered table of zero-width rows
+        return Spacer(0, 0)
+
+    cells = []
+    for col in columns:
+        format_value, format_array = compiler._column_formatter(col.get("format", {}))
+        key = col.get("key", "")
+        if isinstance(table_data, ColumnarTable):
+            texts = table_data.map_column(key, format_value, format_array, missing="")
+        else:
+            texts = [format_value(row.get(key, "")) for row in table_data]
+        cells.append([_cell_text(text) for text in texts])
+    header = [_cell_text(str(col.get("header", ""))) for col in columns]
+
+    return _PagedTable(
+        header,
+        list(zip(*cells)) if cells[0] else [],
+        _column_widths(columns, frame_width),
+        [str(col.get("align", "left")) for col in columns],
+        props,
+        border,
+    )
+
+
+def _column_widths(columns: list[dict], frame_width: float) -> list[float]:
+    """Fixed widths for percentage and pixel columns; the rest share what is left."""
+    widths: list[float | None] = []
+    for col in columns:
+        width = str(col.get("width", "auto")).strip()
+        if width.endswith("%"):
+            widths.append(float(width[:-1]) / 100 * frame_width)
+        elif width == "auto":
+            widths.append(None)
+        else:
+            widths.append(_length(width))
+    fixed = sum(width for width in widths if width is not None)
+    flexible = widths.count(None)
+    share = max(0.0, frame_width - fixed) / flexible if flexible else 0.0
+    resolved = [share if width is None else width for width in widths]
+    if sum(resolved) > frame_width:
+        # Overconstrained, as with 100% plus fixed columns: scale down to fit
+        scale = frame_width / sum(resolved)
+        resolved = [width * scale for width in resolved]
+    return resolved
+
+
+class _PagedTable(Flowable):
+    """
+    A table that splits across pages in O(rows).
+
+    reportlab's Table re-measures every remaining row on each page break, which
+    is quadratic for long tables. Rows here are measured once; a split cuts the
+    prefix that fits and lays out only that part as a Table.
+    """
+
+    _PADDING_X = 12 * PX
+    _PADDING_Y = 8 * PX
+
+    def __init__(
+        self,
+        header: list[str],
+        rows: list[tuple[str, ...]],
+        widths: list[float],
+        aligns: list[str],
+        props: dict,
+        border: colors.Color,
+        heights: list[float] | None = None,
+    ):
+        super().__init__()
+        self.header = header
+        self.rows = rows
+        self.widths = widths
+        self.aligns = aligns
+        self.props = props
+        self.border = border
+        self.header_height = self._row_height(header, bold=True)
+        self.heights = heights if heights is not None else [self._row_height(row) for row in rows]
+        self._offsets = list(accumulate(self.heights, initial=0.0))
+
+    def wrap(self, available_width: float, available_height: float) -> tuple[float, float]:
+        self.width = sum(self.widths)
+        self.height = self.header_height + self._offsets[-1]
+        return self.width, self.height
+
+    def split(self, available_width: float, available_height: float) -> list[Flowable]:
+        fit = bisect_right(self._offsets, available_height - self.header_height) - 1
+        if fit <= 0:
+            # Not even the header and one row fit; start on the next page
+            return []
+        return [
+            self._copy(self.rows[:fit], self.heights[:fit]),
+            self._copy(self.rows[fit:], self.heights[fit:]),
+        ]
+
+    def draw(self) -> None:
+        table = self._table()
+        table.wrapOn(self.canv, self.width, self.height)
+        table.drawOn(self.canv, 0, 0)
+
+    def _copy(self, rows: list[tuple[str, ...]], heights: list[float]) -> "_PagedTable":
+        return _PagedTable(
+            self.header, rows, self.widths, self.aligns, self.props, self.border, heights
+        )
+
+    def _row_height(self, row: list[str] | tuple[str, ...], bold: bool = False) -> float:
+        font = _font("sans-serif", bold)
+        lines = 1
+        for text, width in zip(row, self.widths):
+            available = max(1.0, width - 2 * self._PADDING_X)
+            if stringWidth(text, font, BODY_FONT_SIZE) > available:
+                paragraph = self._paragraph(text, bold, "left")
+                lines = max(lines, len(paragraph.breakLines(available).lines))
+        return lines * BODY_LEADING + 2 * self._PADDING_Y
+
+    def _paragraph(self, text: str, bold: bool, align: str) -> Paragraph:
+        style = ParagraphStyle(
+            "cell",
+            fontName=_font("sans-serif", bold),
+            fontSize=BODY_FONT_SIZE,
+            leading=BODY_LEADING,
+            alignment=_ALIGNMENTS.get(align, TA_LEFT),
+        )
+        return Paragraph(escape(text, quote=False), style)
+
+    def _table(self) -> Table:
+        def cell(text: str, width: float, align: str, bold: bool = False) -> Any:
+            # Plain strings are far cheaper; only text that needs wrapping gets a Paragraph
+            available = width - 2 * self._PADDING_X
+            if stringWidth(text, _font("sans-serif", bold), BODY_FONT_SIZE) <= available:
+                return text
+            return self._paragraph(text, bold, align)
+
+        header = [
+            cell(text, width, align, bold=True)
+            for text, width, align in zip(self.header, self.widths, self.aligns)
+        ]
+        # Rows measured as a single line have nothing to wrap
+        single_line = BODY_LEADING + 2 * self._PADDING_Y
+        body = []
+        for row, height in zip(self.rows, self.heights):
+            if height == single_line:
+                body.append(list(row))
+            else:
+                body.append([cell(*column) for column in zip(row, self.widths, self.aligns)])
+        table = Table(
+            [header, *body],
+            colWidths=self.widths,
+            rowHeights=[self.header_height, *self.heights],
+        )
+        style = [
+            ("BOX", (0, 0), (-1, -1), PX, self.border),
+            ("LINEBELOW", (0, 0), (-1, -1), PX, self.border),
+            ("BACKGROUND", (0, 0), (-1, 0), _color(self.props.get("headerBg", "#f5f5f5"))),
+            ("TEXTCOLOR", (0, 0), (-1, 0), _color(self.props.get("headerColor", "#000000"))),
+            ("TEXTCOLOR", (0, 1), (-1, -1), _color(BODY_COLOR)),
+            ("FONTNAME", (0, 0), (-1, 0), _font("sans-serif", bold=True)),
+            ("FONTNAME", (0, 1), (-1, -1), _font("sans-serif")),
+            ("FONTSIZE", (0, 0), (-1, -1), BODY_FONT_SIZE),
+            ("LEADING", (0, 0), (-1, -1), BODY_LEADING),
+            ("LEFTPADDING", (0, 0), (-1, -1), self._PADDING_X),
+            ("RIGHTPADDING", (0, 0), (-1, -1), self._PADDING_X),
+            ("TOPPADDING", (0, 0), (-1, -1), self._PADDING_Y),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), self._PADDING_Y),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ]
+        for index, align in enumerate(self.aligns):
+            style.append(("ALIGN", (index, 0), (index, -1), align.upper()))
+        table.setStyle(TableStyle(style))
+        return table
@@ -0,0 +1,273 @@
+import hashlib
+import io
+import math
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, Iterator
+
+from app.metrics import PDF_OPTIMIZED_RATIO
+from app.schemas import PDFOptimizeOptions, PDFOptimizeReport
+
+if TYPE_CHECKING:
+    import pikepdf
+
+# Only downsample images drawn at more than this multiple of the target resolution
+DOWNSAMPLE_THRESHOLD = 1.5
+
+_IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def optimize_pdf(pdf_bytes: bytes, options: PDFOptimizeOptions) -> tuple[bytes, PDFOptimizeReport]:
+    """
+    Shrink a rendered PDF.
+
+    Points identical streams (embedded fonts, images) at a single copy,
+    downsamples images drawn above `options.image_dpi`, recompresses streams into
+    object streams, and linearizes for fast web view. CPU-bound; run it in a thread.
+
+    Raises:
+        ImportError: If pikepdf isn't installed
+        pikepdf.PdfError: If the PDF can't be parsed
+    """
+    # Imported here: pikepdf is an optional dependency
+    import pikepdf
+
+    start = time.perf_counter()
+    report = PDFOptimizeReport(
+        original_bytes=len(pdf_bytes), optimized_bytes=len(pdf_bytes), seconds=0.0
+    )
+    with pikepdf.open(io.BytesIO(pdf_bytes)) as pdf:
+        # Deduplicate first so each shared image is resampled once, for its largest use
+        if options.deduplicate:
+            report.streams_deduplicated = _deduplicate_streams(pdf)
+        if options.image_dpi and options.image_dpi > 0:
+            report.images_downsampled = _downsample_images(
+                pdf, options.image_dpi, options.image_quality
+            )
+
+        output = io.BytesIO()
+        pdf.save(
+            output,
+            compress_streams=options.recompress,
+            recompress_flate=options.recompress,
+            object_stream_mode=(
+                pikepdf.ObjectStreamMode.generate
+                if options.recompress
+                else pikepdf.ObjectStreamMode.preserve
+            ),
+            linearize=options.linearize,
+        )
+    optimized = output.getvalue()
+
+    # Linearization is worth a few bytes; otherwise never hand back a bigger file
+    if len(optimized) < len(pdf_bytes) or options.linearize:
+        report.optimized_bytes = len(optimized)
+    else:
+        optimized = pdf_bytes
+    report.seconds = time.perf_counter() - start
+    PDF_OPTIMIZED_RATIO.observe(report.optimized_bytes / max(1, report.original_bytes))
+    return optimized, report
+
+
+def _deduplicate_streams(pdf: "pikepdf.Pdf") -> int:
+    """Point references to byte-identical streams at one copy; returns copies dropped."""
+    import pikepdf
+
+    canonical: dict[tuple[bytes, str], pikepdf.Stream] = {}
+    replacements: dict[tuple[int, int], pikepdf.Stream] = {}
+    for obj in pdf.objects:
+        if not isinstance(obj, pikepdf.Stream) or obj.get("/Type") in ("/XRef", "/ObjStm"):
+            continue
+        attributes = sorted(
+            (key, _unparse(value)) for key, value in obj.stream_dict.items() if key != "/Length"
+        )
+        key = (hashlib.sha256(obj.read_raw_bytes()).digest(), repr(attributes))
+        first = canonical.setdefault(key, obj)
+        if first.objgen != obj.objgen:
+            replacements[obj.objgen] = first
+
+    if replacements:
+        for obj in pdf.objects:
+            _replace_references(obj, replacements)
+    # Copies nothing points at any more are left out when the file is written
+    return len(replacements)
+
+
+def _unparse(value: Any) -> str:
+    import pikepdf
+
+    if isinstance(value, pikepdf.Object):
+        return value.unparse(resolved=False).decode("latin-1")
+    return repr(value)
+
+
+def _replace_references(obj: Any, replacements: dict[tuple[int, int], Any]) -> None:
+    import pikepdf
+
+    if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream)):
+        keys = list(obj.keys())
+        get, put = obj.get, obj.__setitem__
+    elif isinstance(obj, pikepdf.Array):
+        keys = list(range(len(obj)))
+        get, put = obj.__getitem__, obj.__setitem__
+    else:
+        return
+
+    for key in keys:
+        value = get(key)
+        if not isinstance(value, pikepdf.Object):
+            continue
+        if value.is_indirect:
+            replacement = replacements.get(value.objgen)
+            if replacement is not None:
+                put(key, replacement)
+        else:
+            # Direct containers are part of this object; indirect ones are visited on their own
+            _replace_references(value, replacements)
+
+
+def _downsample_images(pdf: "pikepdf.Pdf", dpi: int, quality: int) -> int:
+    """Downsample images drawn above `dpi`; returns how many were resampled."""
+    import pikepdf
+
+    # Largest drawn size in points per image, over every placement
+    drawn: dict[tuple[int, int], tuple[pikepdf.Stream, float, float]] = {}
+    # Images painted some other way (patterns) keep their resolution
+    excluded: set[tuple[int, int]] = set()
+    for page in pdf.pages:
+        for image, width, height in _image_placements(page.obj, page.resources, _IDENTITY, set()):
+            _, drawn_width, drawn_height = drawn.get(image.objgen, (image, 0.0, 0.0))
+            drawn[image.objgen] = (image, max(width, drawn_width), max(height, drawn_height))
+        for pattern in _dict_values(page.resources.get("/Pattern")):
+            resources = pattern.get("/Resources")
+            if isinstance(resources, pikepdf.Dictionary):
+                excluded.update(image.objgen for image in _dict_values(resources.get("/XObject")))
+
+    resampled = 0
+    for objgen, (image, width, height) in drawn.items():
+        if objgen in excluded or width <= 0 or height <= 0:
+            continue
+        target = (
+            max(1, math.ceil(width / 72 * dpi)),
+            max(1, math.ceil(height / 72 * dpi)),
+        )
+        if int(image.Width) <= target[0] * DOWNSAMPLE_THRESHOLD and (
+            int(image.Height) <= target[1] * DOWNSAMPLE_THRESHOLD
+        ):
+            continue
+        if _resample_image(image, target, quality):
+            resampled += 1
+    return resampled
+
+
+def _image_placements(
+    content: Any,
+    resources: Any,
+    ctm: tuple[float, ...],
+    forms: set[tuple[int, int]],
+) -> Iterator[tuple[Any, float, float]]:
+    """Yield `(image, width, height)` in points for each image `content` draws."""
+    import pikepdf
+
+    xobjects = resources.get("/XObject") if resources is not None else None
+    stack: list[tuple[float, ...]] = []
+    for operands, operator in pikepdf.parse_content_stream(content):
+        operator = str(operator)
+        if operator == "q":
+            stack.append(ctm)
+        elif operator == "Q":
+            ctm = stack.pop() if stack else _IDENTITY
+        elif operator == "cm":
+            ctm = _multiply(tuple(float(value) for value in operands), ctm)
+        elif operator == "Do" and xobjects is not None:
+            xobject = xobjects.get(operands[0])
+            if not isinstance(xobject, pikepdf.Stream):
+                continue
+            if xobject.get("/Subtype") == "/Image":
+                yield xobject, math.hypot(ctm[0], ctm[1]), math.hypot(ctm[2], ctm[3])
+            elif xobject.get("/Subtype") == "/Form" and xobject.objgen not in forms:
+                matrix = tuple(float(value) for value in xobject.get("/Matrix", _IDENTITY))
+                yield from _image_placements(
+                    xobject,
+                    xobject.get("/Resources", resources),
+                    _multiply(matrix, ctm),
+                    forms | {xobject.objgen},
+                )
+
+
+def _multiply(m: tuple[float, ...], n: tuple[float, ...]) -> tuple[float, ...]:
+    """The product of two PDF transformation matrices, `m` applied first."""
+    a, b, c, d, e, f = m
+    A, B, C, D, E, F = n  # noqa: N806
+    return (
+        a * A + b * C,
+        a * B + b * D,
+        c * A + d * C,
+        c * B + d * D,
+        e * A + f * C + E,
+        e * B + f * D + F,
+    )
+
+
+def _dict_values(dictionary: Any) -> list[Any]:
+    import pikepdf
+
+    if not isinstance(dictionary, (pikepdf.Dictionary, pikepdf.Stream)):
+        return []
+    return [dictionary[key] for key in dictionary.keys()]
+
+
+def _resample_image(image: Any, size: tuple[int, int], quality: int) -> bool:
+    """Resample an 8-bit gray or RGB image in place; False if it can't be."""
+    import pikepdf
+    from PIL import Image
+
+    if image.get("/ImageMask") or image.get("/Decode") is not None:
+        return False
+    if int(image.get("/BitsPerComponent", 8)) != 8:
+        return False
+    try:
+        picture = pikepdf.PdfImage(image).as_pil_image()
+    except Exception:
+        return False  # Filters or color spaces Pillow can't decode
+    smask = image.get("/SMask")
+    if isinstance(smask, pikepdf.Stream) and picture.mode in ("LA", "RGBA"):
+        # pikepdf folds the soft mask in as alpha; the mask is resampled on its own
+        picture = picture.convert(picture.mode[:-1])
+    if picture.mode not in ("L", "RGB"):
+        return False
+
+    if isinstance(smask, pikepdf.Stream):
+        if int(smask.get("/BitsPerComponent", 8)) != 8 or smask.get("/Decode") is not None:
+            return False
+        try:
+            mask = pikepdf.PdfImage(smask).as_pil_image()
+        except Exception:
+            return False
+        if mask.mode != "L":
+            return False
+        _write_image(smask, mask.resize(size, Image.LANCZOS), jpeg=False, quality=quality)
+
+    filters = image.get("/Filter")
+    jpeg = filters == "/DCTDecode" or (
+        isinstance(filters, pikepdf.Array) and "/DCTDecode" in list(filters)
+    )
+    _write_image(image, picture.resize(size, Image.LANCZOS), jpeg=jpeg, quality=quality)
+    return True
+
+
+def _write_image(stream: Any, picture: Any, jpeg: bool, quality: int) -> None:
+    """Replace an image stream's pixels, keeping its color space."""
+    import pikepdf
+
+    if jpeg:
+        # Photos stay lossy, anything else stays lossless
+        buffer = io.BytesIO()
+        picture.save(buffer, "JPEG", quality=quality, optimize=True)
+        stream.write(buffer.getvalue(), filter=pikepdf.Name.DCTDecode)
+    else:
+        stream.write(zlib.compress(picture.tobytes()), filter=pikepdf.Name.FlateDecode)
+    if "/DecodeParms" in stream:
+        del stream["/DecodeParms"]
+    stream.Width, stream.Height = picture.size
+    stream.BitsPerComponent = 8
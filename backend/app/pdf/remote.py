@@ -0,0 +1,230 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator
+from uuid import uuid4
+
+import httpx
+
+from app.pdf.base import RenderBackend
+from app.pdf.scheduler import DEFAULT_TENANT, RenderPriority
+from app.schemas import PDFOptions
+
+
+class RenderWorker:
+    """Client for one render worker (see `app.pdf.worker`)."""
+
+    def __init__(self, url: str, timeout: float = 120.0):
+        """
+        Args:
+            url: `unix:///path/to/socket` for a local worker or `http(s)://host:port`
+            timeout: Seconds to wait for a render
+        """
+        self.url = url
+        self.is_local = url.startswith("unix://")
+        if self.is_local:
+            transport = httpx.AsyncHTTPTransport(uds=url.removeprefix("unix://"))
+            self.client = httpx.AsyncClient(
+                base_url="http://render-worker", transport=transport, timeout=timeout
+            )
+        else:
+            self.client = httpx.AsyncClient(base_url=url, timeout=timeout)
+
+        self.ready = False
+        self.capacity = 1
+        self.busy = 0  # Active + queued pages reported by the worker
+        self.inflight = 0  # Renders this process has outstanding on the worker
+        self.spool_dir: Path | None = None
+
+    @property
+    def load(self) -> float:
+        """Estimated utilization; other API processes' work shows up in `busy`."""
+        return max(self.busy, self.inflight) / max(1, self.capacity)
+
+    async def refresh(self) -> None:
+        """Update readiness and load from the worker's status endpoint."""
+        try:
+            response = await self.client.get("/status", timeout=5.0)
+            response.raise_for_status()
+            status = response.json()
+        except (httpx.HTTPError, ValueError):
+            self.ready = False
+            return
+
+        self.ready = status["ready"]
+        self.capacity = status["capacity"]
+        self.busy = status["active"] + status["queued"]
+        # Files can only be handed over when the worker shares our filesystem and
+        # accepts them (TCP workers don't)
+        spool_dir = Path(status["spool_dir"]) if status.get("spool_dir") else None
+        self.spool_dir = spool_dir if self.is_local and spool_dir and spool_dir.is_dir() else None
+
+    async def render(
+        self,
+        kind: str,
+        html_content: str,
+        options: PDFOptions,
+        priority: RenderPriority = RenderPriority.API,
+        tenant: str = DEFAULT_TENANT,
+    ) -> bytes:
+        """Render on the worker, exchanging payloads through spool files when possible."""
+        job: dict[str, Any] = {
+            "options": options.model_dump(),
+            "priority": int(priority),
+            "tenant": tenant,
+        }
+        html_path = None
+        if self.spool_dir is not None:
+            html_path = self.spool_dir / f"pdfgen-{uuid4().hex}.html"
+            await asyncio.to_thread(html_path.write_text, html_content)
+            job.update(html_path=str(html_path), output_to_file=True)
+        else:
+            job["html"] = html_content
+
+        try:
+            response = await self.client.post(f"/render/{kind}", json=job)
+            response.raise_for_status()
+        except httpx.TransportError:
+            self.ready = False
+            raise
+        finally:
+            if html_path is not None:
+                html_path.unlink(missing_ok=True)
+
+        if not job.get("output_to_file"):
+            return response.content
+
+        output = Path(response.json()["path"])
+        try:
+            return await asyncio.to_thread(output.read_bytes)
+        finally:
+            output.unlink(missing_ok=True)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+@dataclass
+class WorkerLease:
+    """Capacity reserved on a worker, and who it was reserved for."""
+
+    worker: RenderWorker
+    priority: RenderPriority
+    tenant: str
+
+
+class RenderWorkerPool(RenderBackend):
+    """
+    Dispatches renders to out-of-process render workers.
+
+    Each render goes to the ready worker with the lowest estimated load. Worker
+    status is polled in the background so load from other API processes sharing
+    the same workers is taken into account. Priority and tenant travel with the
+    render, and each worker's scheduler queues it accordingly.
+
+    `unix:///dir/*.sock` patterns are expanded again at every poll, so workers
+    started after the API (or restarted on new sockets) are picked up; the pool
+    is not ready while no worker is.
+    """
+
+    def __init__(self, urls: list[str], timeout: float = 120.0, poll_interval: float = 2.0):
+        if not urls:
+            raise ValueError("At least one render worker URL is required")
+        self.urls = urls
+        self.timeout = timeout
+        self.workers = [RenderWorker(url, timeout) for url in expand_worker_urls(urls)]
+        self.poll_interval = poll_interval
+        self._ready = asyncio.Event()
+        self._poller: asyncio.Task | None = None
+
+    async def initialize(self) -> None:
+        """Start polling worker status; ready once any worker is."""
+        self._poller = asyncio.create_task(self._poll())
+        await self._ready.wait()
+
+    async def _poll(self) -> None:
+        while True:
+            await self._discover()
+            await asyncio.gather(*(worker.refresh() for worker in self.workers))
+            if any(worker.ready for worker in self.workers):
+                self._ready.set()
+            else:
+                self._ready.clear()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _discover(self) -> None:
+        """Add workers whose sockets appeared and drop those whose sockets are gone."""
+        known = {worker.url: worker for worker in self.workers}
+        workers = [
+            known.pop(url, None) or RenderWorker(url, self.timeout)
+            for url in expand_worker_urls(self.urls)
+        ]
+        for worker in known.values():
+            if worker.inflight:
+                workers.append(worker)  # Dropped once its renders finish
+            else:
+                await worker.close()
+        self.workers = workers
+
+    async def shutdown(self) -> None:
+        if self._poller:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+        await asyncio.gather(*(worker.close() for worker in self.workers))
+
+    @property
+    def is_ready(self) -> bool:
+        return any(worker.ready for worker in self.workers)
+
+    async def wait_until_ready(self) -> None:
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError("No render workers available") from None
+
+    @asynccontextmanager
+    async def page(
+        self,
+        priority: RenderPriority = RenderPriority.API,
+        tenant: str = DEFAULT_TENANT,
+        **context_options: Any,
+    ) -> AsyncIterator[WorkerLease]:
+        """Reserve capacity on the least-loaded ready worker."""
+        await self.wait_until_ready()
+        candidates = [worker for worker in self.workers if worker.ready]
+        if not candidates:
+            raise RuntimeError("No render workers available")
+
+        worker = min(candidates, key=lambda w: w.load)
+        worker.inflight += 1
+        try:
+            yield WorkerLease(worker, priority, tenant)
+        finally:
+            worker.inflight -= 1
+
+    async def render_pdf(self, page: WorkerLease, html_content: str, options: PDFOptions) -> bytes:
+        return await page.worker.render("pdf", html_content, options, page.priority, page.tenant)
+
+    async def generate_screenshot(
+        self,
+        html_content: str,
+        priority: RenderPriority = RenderPriority.INTERACTIVE,
+        tenant: str = DEFAULT_TENANT,
+    ) -> bytes:
+        async with self.page(priority, tenant) as lease:
+            return await lease.worker.render(
+                "screenshot", html_content, PDFOptions(), priority, tenant
+            )
+
+
+def expand_worker_urls(urls: list[str]) -> list[str]:
+    """Expand `unix:///dir/*.sock` glob patterns into the sockets that exist."""
+    expanded = []
+    for url in urls:
+        if url.startswith("unix://") and "*" in url:
+            pattern = Path(url.removeprefix("unix://"))
+            expanded += [f"unix://{p}" for p in sorted(pattern.parent.glob(pattern.name))]
+        else:
+            expanded.append(url)
+    return expanded
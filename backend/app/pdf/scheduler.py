@@ -0,0 +1,176 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator
+
+from app.metrics import BROWSER_PAGES_ACTIVE, BROWSER_QUEUE_DEPTH, RENDER_QUEUE_WAIT_SECONDS
+
+# Tenant for work that isn't attributed to a user
+DEFAULT_TENANT = "default"
+
+
+class RenderPriority(IntEnum):
+    """Render classes, most urgent first. A lower class only runs when no higher one waits."""
+
+    INTERACTIVE = 0  # A person is watching: editor previews, thumbnails
+    API = 1  # Single generate requests
+    BATCH = 2  # Bulk runs
+
+
+class _Waiter:
+    __slots__ = ("future", "tenant", "priority", "finish")
+
+    def __init__(self, tenant: str, priority: RenderPriority, finish: float):
+        self.future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self.tenant = tenant
+        self.priority = priority
+        self.finish = finish
+
+
+class RenderScheduler:
+    """
+    Hands out a fixed number of render slots (browser pages).
+
+    Priority classes are strict: a waiting interactive render always gets the
+    next free slot before API or batch work. Within a class, tenants share
+    slots by weighted fair queuing (self-clocked, one unit of cost per render),
+    so a tenant queueing thousands of renders delays everyone else's by at most
+    one render each instead of all of them. Each tenant can also be capped at a
+    number of slots held at once, leaving the rest free for others even when
+    nobody else is waiting yet.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        tenant_limit: int | None = None,
+        tenant_weights: dict[str, float] | None = None,
+    ):
+        """
+        Args:
+            capacity: Slots in total
+            tenant_limit: Most slots one tenant may hold at once; None is no cap
+            tenant_weights: Relative shares per tenant within a class (default 1.0)
+        """
+        self.capacity = capacity
+        self.tenant_limit = tenant_limit
+        self.tenant_weights = tenant_weights or {}
+        self._free = capacity
+        self._held: dict[str, int] = {}
+        # Per class: tenant -> its waiters in arrival order
+        self._queues: list[dict[str, deque[_Waiter]]] = [{} for _ in RenderPriority]
+        # Per class: virtual time, and each tenant's last finish tag
+        self._virtual_time = [0.0 for _ in RenderPriority]
+        self._finish: list[dict[str, float]] = [{} for _ in RenderPriority]
+        self._waiting = 0
+
+    @property
+    def active(self) -> int:
+        """Slots currently held."""
+        return self.capacity - self._free
+
+    @property
+    def queued(self) -> int:
+        """Callers waiting for a slot."""
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: RenderPriority = RenderPriority.API, tenant: str = DEFAULT_TENANT
+    ) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block."""
+        await self.acquire(priority, tenant)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+    async def acquire(
+        self, priority: RenderPriority = RenderPriority.API, tenant: str = DEFAULT_TENANT
+    ) -> None:
+        """Wait for a slot; pair with `release`."""
+        priority = RenderPriority(priority)
+        start = time.perf_counter()
+        if self._waiting == 0 and self._free > 0 and self._under_limit(tenant):
+            self._take(tenant)
+            RENDER_QUEUE_WAIT_SECONDS.labels(priority=priority.name.lower()).observe(0.0)
+            return
+
+        weight = self.tenant_weights.get(tenant, 1.0)
+        finish = max(self._virtual_time[priority], self._finish[priority].get(tenant, 0.0))
+        finish += 1.0 / weight if weight > 0 else 1.0
+        self._finish[priority][tenant] = finish
+        waiter = _Waiter(tenant, priority, finish)
+        self._queues[priority].setdefault(tenant, deque()).append(waiter)
+        self._waiting += 1
+        BROWSER_QUEUE_DEPTH.set(self._waiting)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller gave up: pass the slot on
+                self.release(tenant)
+            else:
+                self._remove(waiter)
+            raise
+        RENDER_QUEUE_WAIT_SECONDS.labels(priority=priority.name.lower()).observe(
+            time.perf_counter() - start
+        )
+
+    def release(self, tenant: str = DEFAULT_TENANT) -> None:
+        """Give back a slot taken by `acquire`."""
+        self._free += 1
+        BROWSER_PAGES_ACTIVE.dec()
+        held = self._held.get(tenant, 0) - 1
+        if held > 0:
+            self._held[tenant] = held
+        else:
+            self._held.pop(tenant, None)
+        self._dispatch()
+
+    def _under_limit(self, tenant: str) -> bool:
+        return self.tenant_limit is None or self._held.get(tenant, 0) < self.tenant_limit
+
+    def _take(self, tenant: str) -> None:
+        self._free -= 1
+        BROWSER_PAGES_ACTIVE.inc()
+        self._held[tenant] = self._held.get(tenant, 0) + 1
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiters: highest class first, smallest finish tag within it."""
+        while self._free > 0 and self._waiting > 0:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return  # Everyone waiting is at their tenant's cap
+            self._remove(waiter)
+            self._virtual_time[waiter.priority] = waiter.finish
+            self._take(waiter.tenant)
+            waiter.future.set_result(None)
+
+    def _next_waiter(self) -> _Waiter | None:
+        for queues in self._queues:
+            heads = [
+                waiters[0]
+                for tenant, waiters in queues.items()
+                if waiters and self._under_limit(tenant)
+            ]
+            if heads:
+                return min(heads, key=lambda waiter: waiter.finish)
+        return None
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queues = self._queues[waiter.priority]
+        waiters = queues.get(waiter.tenant)
+        if not waiters or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        self._waiting -= 1
+        BROWSER_QUEUE_DEPTH.set(self._waiting)
+        if not waiters:
+            del queues[waiter.tenant]
+            # Once a class drains, old finish tags carry no information
+            if not queues:
+                self._finish[waiter.priority].clear()
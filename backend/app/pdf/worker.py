@@ -0,0 +1,279 @@
+"""
+Standalone render worker.
+
+Runs a PDFEngine (and its Chromium) in its own process behind a small HTTP API,
+so API processes can share render capacity instead of each owning a browser.
+
+    python -m app.pdf.worker --uds /tmp/pdfgen/render-0.sock
+    python -m app.pdf.worker --count 4 --socket-dir /tmp/pdfgen
+    python -m app.pdf.worker --host 0.0.0.0 --port 8100
+    python -m app.pdf.worker --tenant-page-limit 2 --tenant-weight acme=3 --tenant-weight demo=0.5
+
+Local workers exchange large payloads through files in a shared spool directory
+(tmpfs-backed /dev/shm by default) instead of copying them through the socket.
+Only workers on a Unix socket do; over TCP anyone who can reach the port could
+otherwise have files read or written. Spool files left behind, e.g. by renders
+the API gave up on, are removed once they are `--spool-max-age` seconds old.
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from uuid import uuid4
+
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel
+
+from app.config import get_settings
+from app.pdf.engine import PDFEngine
+from app.pdf.scheduler import DEFAULT_TENANT, RenderPriority
+from app.schemas import PDFOptions
+
+# Names of the files workers and API processes exchange in the spool directory
+SPOOL_FILE_PATTERN = re.compile(r"pdfgen-[0-9a-f]{32}\.(html|out)")
+SPOOL_SWEEP_INTERVAL = 60.0
+
+
+def default_spool_dir() -> str:
+    """Shared memory when available, otherwise the system temp directory."""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def sweep_spool(spool: Path, max_age: float) -> int:
+    """Delete spool files older than `max_age` seconds; returns how many went."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in spool.glob("pdfgen-*"):
+        if not SPOOL_FILE_PATTERN.fullmatch(path.name):
+            continue
+        try:
+            if path.lstat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass  # Consumed or swept by another process meanwhile
+    return removed
+
+
+class RenderJob(BaseModel):
+    # Exactly one of html / html_path is set
+    html: str | None = None
+    html_path: str | None = None
+    options: PDFOptions = PDFOptions()
+    # Who the render is for; the worker's pages are scheduled by these
+    priority: RenderPriority = RenderPriority.API
+    tenant: str = DEFAULT_TENANT
+    # Write the result to a spool file and return its path instead of the bytes
+    output_to_file: bool = False
+
+
+def create_worker_app(
+    max_concurrent_pages: int = 8,
+    spool_dir: str | None = None,
+    tenant_page_limit: int | None = None,
+    tenant_weights: dict[str, float] | None = None,
+    spool_files: bool = True,
+    spool_max_age: float = 600.0,
+) -> FastAPI:
+    """
+    Build the render worker application.
+
+    Args:
+        spool_files: Accept `html_path` and `output_to_file`; only safe when the
+            listener is reachable by the API processes alone, i.e. a Unix socket
+        spool_max_age: Seconds after which unclaimed spool files are deleted
+    """
+    spool = Path(spool_dir or default_spool_dir()).resolve()
+    engine = PDFEngine(
+        max_concurrent_pages=max_concurrent_pages,
+        tenant_page_limit=tenant_page_limit,
+        tenant_weights=tenant_weights,
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await engine.initialize()
+        sweeper = asyncio.create_task(sweep_periodically()) if spool_files else None
+        yield
+        if sweeper is not None:
+            sweeper.cancel()
+            with suppress(asyncio.CancelledError):
+                await sweeper
+        await engine.shutdown()
+
+    async def sweep_periodically() -> None:
+        while True:
+            await asyncio.to_thread(sweep_spool, spool, spool_max_age)
+            await asyncio.sleep(min(SPOOL_SWEEP_INTERVAL, spool_max_age))
+
+    app = FastAPI(title="PDF render worker", lifespan=lifespan)
+
+    def spool_path(path: str) -> Path:
+        """The spool file `path` names; anything else in the spool dir is off limits."""
+        candidate = Path(path)
+        if (
+            candidate.parent.resolve() != spool
+            or not SPOOL_FILE_PATTERN.fullmatch(candidate.name)
+            or not candidate.name.endswith(".html")
+            or candidate.is_symlink()
+        ):
+            raise HTTPException(status_code=400, detail="Not a spool file")
+        return spool / candidate.name
+
+    def read_html(job: RenderJob) -> str:
+        if not spool_files and (job.html_path or job.output_to_file):
+            raise HTTPException(status_code=400, detail="Spool files are disabled")
+        if job.html_path:
+            path = spool_path(job.html_path)
+            try:
+                return path.read_text()
+            finally:
+                path.unlink(missing_ok=True)
+        if job.html is None:
+            raise HTTPException(status_code=400, detail="html or html_path is required")
+        return job.html
+
+    def respond(job: RenderJob, content: bytes, media_type: str):
+        if not job.output_to_file:
+            return Response(content=content, media_type=media_type)
+        path = spool / f"pdfgen-{uuid4().hex}.out"
+        path.write_bytes(content)
+        return {"path": str(path), "size": len(content)}
+
+    @app.get("/status")
+    async def status():
+        return {
+            "ready": engine.is_ready,
+            "capacity": engine.capacity,
+            "active": engine.active,
+            "queued": engine.queued,
+            "spool_dir": str(spool) if spool_files else None,
+        }
+
+    @app.post("/render/pdf")
+    async def render_pdf(job: RenderJob):
+        pdf_bytes = await engine.generate_pdf(read_html(job), job.options, job.priority, job.tenant)
+        return respond(job, pdf_bytes, "application/pdf")
+
+    @app.post("/render/screenshot")
+    async def render_screenshot(job: RenderJob):
+        png_bytes = await engine.generate_screenshot(read_html(job), job.priority, job.tenant)
+        return respond(job, png_bytes, "image/png")
+
+    return app
+
+
+def _serve_many(args: argparse.Namespace) -> None:
+    """Run `--count` workers on Unix sockets under `--socket-dir` until interrupted."""
+    socket_dir = Path(args.socket_dir)
+    socket_dir.mkdir(parents=True, exist_ok=True)
+    processes = []
+    for index in range(args.count):
+        command = [
+            sys.executable,
+            "-m",
+            "app.pdf.worker",
+            "--uds",
+            str(socket_dir / f"render-{index}.sock"),
+            "--max-pages",
+            str(args.max_pages),
+        ]
+        if args.spool_dir:
+            command += ["--spool-dir", args.spool_dir]
+        command += ["--spool-max-age", str(args.spool_max_age)]
+        if args.tenant_page_limit:
+            command += ["--tenant-page-limit", str(args.tenant_page_limit)]
+        for weight in args.tenant_weight or []:
+            command += ["--tenant-weight", weight]
+        processes.append(subprocess.Popen(command))
+
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+def _tenant_weights(values: list[str]) -> dict[str, float]:
+    """Parse `--tenant-weight TENANT=WEIGHT` options."""
+    weights = {}
+    for value in values:
+        tenant, _, weight = value.rpartition("=")
+        try:
+            if not tenant:
+                raise ValueError
+            weights[tenant] = float(weight)
+        except ValueError:
+            raise SystemExit(f"--tenant-weight expects TENANT=WEIGHT, got {value!r}") from None
+    return weights
+
+
+def main() -> None:
+    # Scheduling defaults to the PDF_* settings the API processes use
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.pdf.worker")
+    parser.add_argument("--uds", help="Unix socket path to listen on")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--count", type=int, help="Start this many workers on Unix sockets")
+    parser.add_argument("--socket-dir", default=os.path.join(tempfile.gettempdir(), "pdfgen"))
+    parser.add_argument("--max-pages", type=int, default=8, help="Concurrent pages per worker")
+    parser.add_argument("--spool-dir", help="Directory shared with the API for payloads")
+    parser.add_argument(
+        "--spool-max-age",
+        type=float,
+        default=600.0,
+        help="Seconds after which unclaimed spool files are deleted",
+    )
+    parser.add_argument(
+        "--tenant-page-limit",
+        type=int,
+        default=settings.pdf_tenant_page_limit,
+        help="Most concurrent pages one tenant may hold",
+    )
+    parser.add_argument(
+        "--tenant-weight",
+        action="append",
+        metavar="TENANT=WEIGHT",
+        help="Relative page share of a tenant; repeatable, replaces PDF_TENANT_WEIGHTS",
+    )
+    args = parser.parse_args()
+
+    if args.count:
+        _serve_many(args)
+        return
+
+    import uvicorn
+
+    tenant_weights = (
+        _tenant_weights(args.tenant_weight) if args.tenant_weight else settings.pdf_tenant_weights
+    )
+    app = create_worker_app(
+        args.max_pages,
+        args.spool_dir,
+        args.tenant_page_limit,
+        tenant_weights,
+        # Over TCP, payloads travel in the requests; file paths would let any client
+        # that reaches the port read or fill the spool directory
+        spool_files=bool(args.uds),
+        spool_max_age=args.spool_max_age,
+    )
+    if args.uds:
+        Path(args.uds).unlink(missing_ok=True)
+        uvicorn.run(app, uds=args.uds, log_level="warning")
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
 
 class TemplateBase(BaseModel):
@@ -30,6 +30,50 @@ class TemplateResponse(TemplateBase):
         from_attributes = True
 
 
+class TemplatePatch(BaseModel):
+    """
+    Partial template update, applied on top of the version the client last saw.
+
+    `operations` is an RFC 6902 JSON Patch against `template_json`; paths below
+    `/editorState/` address the parsed Craft.js node map. `nodes` replaces whole
+    Craft.js nodes by id (None deletes), which is what the editor produces.
+    """
+
+    updated_at: datetime  # Version the patch is based on
+    name: str | None = None
+    description: str | None = None
+    operations: list[dict[str, Any]] = []
+    nodes: dict[str, dict[str, Any] | None] = {}
+
+
+class TemplatePatchResponse(BaseModel):
+    id: str
+    updated_at: datetime
+
+
+class TemplateSummary(BaseModel):
+    """A template as listed: only the projected columns are present."""
+
+    id: str
+    created_at: datetime
+    name: str | None = None
+    description: str | None = None
+    template_json: dict[str, Any] | None = None
+    user_id: str | None = None
+    is_active: bool | None = None
+    updated_at: datetime | None = None
+
+
+class PDFOptimizeOptions(BaseModel):
+    # Post-processing of the rendered PDF; requires the optional pikepdf dependency
+    deduplicate: bool = True
+    recompress: bool = True
+    # Downsample images drawn at more than this resolution; None keeps them as they are
+    image_dpi: int | None = 150
+    image_quality: int = 85
+    linearize: bool = True
+
+
 class PDFOptions(BaseModel):
     page_size: str = "A4"
     orientation: str = "portrait"
@@ -37,6 +81,34 @@ class PDFOptions(BaseModel):
     margin_bottom: str = "40px"
     margin_left: str = "40px"
     margin_right: str = "40px"
+    optimize: PDFOptimizeOptions | None = None
+
+
+class PDFOptimizeReport(BaseModel):
+    original_bytes: int
+    optimized_bytes: int
+    seconds: float
+    images_downsampled: int = 0
+    streams_deduplicated: int = 0
+
+
+class PreviewOptions(BaseModel):
+    # None disables a limit
+    max_table_rows: int | None = 50
+    max_list_items: int | None = 100
+    max_pages: int | None = None
+
+
+class DataSourceBinding(BaseModel):
+    datasource_id: str
+    query: dict[str, Any] | None = None
+    # Where the result goes in the template data (dotted keys nest); None merges it
+    # into the top level
+    key: str | None = None
+    # Seconds to wait for this source; defaults to the datasource_timeout setting
+    timeout: float | None = Field(None, gt=0)
+    # A failed required source fails the request; optional ones are left out and reported
+    required: bool = True
 
 
 class GenerateRequest(BaseModel):
@@ -44,13 +116,48 @@ class GenerateRequest(BaseModel):
     data: dict[str, Any] | None = None
     datasource_id: str | None = None
     datasource_query: dict[str, Any] | None = None
+    # Several data sources fetched concurrently and merged, in addition to datasource_id
+    datasources: list[DataSourceBinding] | None = None
     options: PDFOptions | None = None
+    preview: PreviewOptions | None = None
+    # Render queue class: "batch" for bulk runs. The interactive class is the
+    # server's to assign (editor thumbnails), so callers can't jump ahead of it.
+    priority: Literal["api", "batch"] = "api"
+
+
+class PreviewResponse(BaseModel):
+    html: str
+    truncated: bool = False
+    # What sampling left out: {"tables": {path: {"total", "shown"}}, "lists": {...}, "pages": {...}}
+    elided: dict[str, Any] = {}
 
 
 class GenerateResponse(BaseModel):
     job_id: str
     status: str
     download_url: str | None = None
+    size_bytes: int | None = None
+    optimization: PDFOptimizeReport | None = None
+    # Optional data sources that failed and were left out
+    data_errors: list[str] = []
+
+
+class BulkGenerateResult(BaseModel):
+    # 1-based record number in the uploaded file
+    row: int
+    status: Literal["completed", "failed"]
+    job_id: str | None = None
+    download_url: str | None = None
+    error: str | None = None
+
+
+class BulkGenerateResponse(BaseModel):
+    total: int
+    completed: int
+    failed: int
+    results: list[BulkGenerateResult]
+    # Why reading the upload stopped early, if it did; records before it were generated
+    error: str | None = None
 
 
 class DataSourceBase(BaseModel):
@@ -75,6 +182,20 @@ class DataSourceResponse(DataSourceBase):
         from_attributes = True
 
 
+class DataSourceSummary(BaseModel):
+    """A data source as listed: only the projected columns are present."""
+
+    id: str
+    created_at: datetime
+    name: str | None = None
+    type: str | None = None
+    config: dict[str, Any] | None = None
+    field_mappings: list[dict[str, Any]] | None = None
+    user_id: str | None = None
+    is_active: bool | None = None
+    last_synced_at: datetime | None = None
+
+
 class DataResult(BaseModel):
     success: bool
     data: dict[str, Any] | list[dict[str, Any]]
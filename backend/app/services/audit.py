@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any
+
+from app.connectors.columnar import dumps_records, to_records
+from app.db.client import DatabaseClient
+from app.metrics import stage
+from app.storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """
+    Buffered, batched writer for `generated_pdfs` records.
+
+    Requests enqueue a record and return immediately; a background task inserts
+    records in batches once `batch_size` records are pending or `flush_interval`
+    seconds have passed. Large `input_data` payloads are written to storage once
+    per content hash and the record keeps only a reference. `input_data` may
+    hold `ColumnarTable`s; they are written as the records they hold.
+    """
+
+    def __init__(
+        self,
+        client: DatabaseClient,
+        storage: StorageBackend,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_pending: int = 10_000,
+        input_ref_threshold: int | None = 64 * 1024,
+        retries: int = 3,
+        stored_hash_limit: int = 10_000,
+    ):
+        """
+        Args:
+            client: Database client records are inserted with
+            storage: Storage backend for externalized input data
+            batch_size: Maximum records per insert
+            flush_interval: Maximum seconds a record waits before being written
+            max_pending: Queue bound; `record` waits when it is full
+            input_ref_threshold: Serialized `input_data` at least this large is stored
+                by hash reference instead of inline. None always stores inline.
+            retries: Insert attempts per batch before the batch is dropped
+            stored_hash_limit: Content hashes of stored inputs remembered to skip
+                re-uploading them; the least recently used are forgotten
+        """
+        self.client = client
+        self.storage = storage
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.input_ref_threshold = input_ref_threshold
+        self.retries = retries
+        self.stored_hash_limit = stored_hash_limit
+        # None in the queue stops the flush loop
+        self._queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(maxsize=max_pending)
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._stored_hashes: OrderedDict[str, None] = OrderedDict()
+
+    def start(self) -> None:
+        """Start the background flush loop. Call once at application startup."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def record(self, row: dict[str, Any]) -> None:
+        """Queue a record for insertion."""
+        await self._queue.put(row)
+
+    async def close(self) -> None:
+        """Write all pending records and stop. Call at application shutdown."""
+        if self._task is not None:
+            # Queued behind pending records; the loop writes what it holds and returns
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+        # Records queued after the stop marker, or with the loop never started
+        while not self._queue.empty():
+            await self._write(self._drain(self.batch_size))
+
+    def _drain(self, limit: int) -> list[dict[str, Any]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is None:
+                self._stopping = True
+                break
+            batch.append(row)
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stopping:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    self._stopping = True
+                    break
+                batch.append(row)
+                batch.extend(self._drain(self.batch_size - len(batch)))
+            await self._write(batch)
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        if not batch:
+            return
+
+        rows = [await self._externalize_input(row) for row in batch]
+        for attempt in range(1, self.retries + 1):
+            try:
+                with stage("db_insert"):
+                    await asyncio.to_thread(
+                        lambda: self.client.table("generated_pdfs").insert(rows).execute()
+                    )
+                return
+            except Exception:
+                if attempt == self.retries:
+                    logger.exception("Dropping %d generated_pdfs records", len(rows))
+                    return
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+    async def _externalize_input(self, row: dict[str, Any]) -> dict[str, Any]:
+        """Replace a large `input_data` payload with a content-hash reference."""
+        input_data = row.get("input_data")
+        if self.input_ref_threshold is None or not input_data:
+            return _inline_input(row)
+
+        # Tables are encoded row by row rather than converted back to records first
+        payload = dumps_records(input_data, sort_keys=True, default=str).encode()
+        if len(payload) < self.input_ref_threshold:
+            return _inline_input(row)
+
+        digest = hashlib.sha256(payload).hexdigest()
+        path = f"inputs/{digest}.json"
+        if digest in self._stored_hashes:
+            self._stored_hashes.move_to_end(digest)
+        else:
+            try:
+                await self.storage.upload(path, payload, "application/json")
+            except Exception:
+                logger.exception("Failed to store input data %s; keeping it inline", digest)
+                return _inline_input(row)
+            self._stored_hashes[digest] = None
+            if len(self._stored_hashes) > self.stored_hash_limit:
+                self._stored_hashes.popitem(last=False)
+
+        ref = {"$ref": f"sha256:{digest}", "storage_path": path, "size": len(payload)}
+        return {**row, "input_data": ref}
+
+
+def _inline_input(row: dict[str, Any]) -> dict[str, Any]:
+    """The row with any tables in its `input_data` turned into records, to insert as is."""
+    input_data = row.get("input_data")
+    records = to_records(input_data)
+    return row if records is input_data else {**row, "input_data": records}
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from typing import Any
+
+from app.connectors.base import LIST_KEY
+from app.connectors.registry import ConnectorRegistry
+from app.db.client import DatabaseClient
+from app.schemas import DataSourceBinding
+
+logger = logging.getLogger(__name__)
+
+
+class DataSourceError(Exception):
+    """Required data sources failed; `errors` has one message per failure."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+async def lookup_datasources(
+    client: DatabaseClient, bindings: list[DataSourceBinding]
+) -> list[dict[str, Any] | None]:
+    """The `data_sources` row for each binding, looked up concurrently; None if missing."""
+
+    async def lookup(datasource_id: str) -> dict[str, Any] | None:
+        response = await asyncio.to_thread(
+            lambda: (
+                client.table("data_sources").select("*").eq("id", datasource_id).limit(1).execute()
+            )
+        )
+        return response.data[0] if response.data else None
+
+    rows = await asyncio.gather(*(lookup(binding.datasource_id) for binding in bindings))
+    return list(rows)
+
+
+async def resolve_data(
+    bindings: list[DataSourceBinding],
+    datasources: list[dict[str, Any] | None],
+    base: dict[str, Any],
+    paths: set[str] | None,
+    timeout: float,
+) -> tuple[dict[str, Any], list[str]]:
+    """
+    Fetch several data sources concurrently and merge them into one data context.
+
+    Each result is placed under its binding's `key` (dotted keys nest), or merged
+    into the top level when the key is None; later bindings win on conflicts.
+    `base` is copied, never modified.
+
+    Args:
+        bindings: What to fetch and where to put it
+        datasources: The `data_sources` row per binding, from `lookup_datasources`
+        base: Data the request supplied directly
+        paths: Template data paths, to project each fetch to what the template
+            reads; None fetches everything
+        timeout: Seconds per source when its binding doesn't set one
+
+    Returns:
+        `(data, errors)`, with a message per optional source that failed
+
+    Raises:
+        DataSourceError: If a required source failed
+    """
+    results = await asyncio.gather(
+        *(
+            _fetch(binding, datasource, paths, binding.timeout or timeout)
+            for binding, datasource in zip(bindings, datasources)
+        )
+    )
+
+    data = dict(base)
+    required_errors: list[str] = []
+    optional_errors: list[str] = []
+    for binding, (value, error) in zip(bindings, results):
+        if error is not None:
+            (required_errors if binding.required else optional_errors).append(error)
+        elif binding.key:
+            data = _place(data, binding.key.split("."), value)
+        else:
+            data.update(value if isinstance(value, dict) else {LIST_KEY: value})
+    if required_errors:
+        raise DataSourceError(required_errors + optional_errors)
+    return data, optional_errors
+
+
+async def _fetch(
+    binding: DataSourceBinding,
+    datasource: dict[str, Any] | None,
+    paths: set[str] | None,
+    timeout: float,
+) -> tuple[Any, str | None]:
+    """`(data, None)` on success, `(None, message)` on failure."""
+    if datasource is None:
+        return None, f"Data source {binding.datasource_id} not found"
+    label = datasource.get("name") or binding.datasource_id
+    try:
+        connector = ConnectorRegistry.create(datasource)
+        if paths is not None:
+            connector.set_projection(_source_paths(paths, binding.key))
+        result = await asyncio.wait_for(connector.fetch_data(binding.query or {}), timeout)
+    except asyncio.TimeoutError:
+        return None, f"{label}: timed out after {timeout:g}s"
+    except Exception as error:
+        logger.warning("Data source %s failed", binding.datasource_id, exc_info=True)
+        return None, f"{label}: {error}"
+    if not result.success:
+        return None, f"{label}: {'; '.join(result.errors) or 'fetch failed'}"
+    return result.data, None
+
+
+def _source_paths(paths: set[str], key: str | None) -> set[str] | None:
+    """Template paths as seen from a source placed at `key`; None if all of it is read."""
+    if not key:
+        return paths
+    prefix = f"{key}."
+    if any(prefix.startswith(f"{path}.") for path in paths):
+        return None
+    relative = {path[len(prefix) :] for path in paths if path.startswith(prefix)}
+    # A list result is projected through `items`; the template reads it without that
+    return relative | {f"{LIST_KEY}.{path}" for path in relative}
+
+
+def _place(data: dict[str, Any], parts: list[str], value: Any) -> dict[str, Any]:
+    """A copy of `data` with `value` at the key path `parts`, copying dicts along it."""
+    if len(parts) == 1:
+        return {**data, parts[0]: value}
+    child = data.get(parts[0])
+    return {**data, parts[0]: _place(child if isinstance(child, dict) else {}, parts[1:], value)}
@@ -0,0 +1,323 @@
+"""
+Incremental parsing of uploaded CSV / NDJSON record files.
+
+Uploads are read straight from the request body as it arrives: the multipart
+stream is split into parts, and a file part into records, without buffering
+more than one unfinished record.
+"""
+
+import codecs
+import csv
+import io
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, AsyncIterator
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.connectors.base import BaseConnector
+from app.services import ndjson
+
+# Longest record accepted, so a file without line breaks can't fill memory
+MAX_RECORD_BYTES = 1024 * 1024
+# Longest non-file form field accepted
+MAX_FIELD_BYTES = 64 * 1024
+
+# Characters that can decide where a CSV record ends
+_CSV_SPECIAL = re.compile(r'[",\r\n]')
+
+BOOLEANS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+# Field mapping `type`s and the values they accept once parsed
+FIELD_TYPES: dict[str, type | tuple[type, ...]] = {
+    "string": str,
+    "number": (int, float),
+    "date": str,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+class IngestError(ValueError):
+    """The upload can't be read any further."""
+
+
+class RecordError(ValueError):
+    """One record can't be used; the rest of the upload is unaffected."""
+
+
+@dataclass
+class UploadPart:
+    """One part of a multipart upload."""
+
+    name: str
+    filename: str | None
+    content_type: str | None
+
+
+async def iter_multipart(
+    content_type: str, body: AsyncIterator[bytes]
+) -> AsyncIterator[tuple[UploadPart, bytes | None]]:
+    """
+    Split a multipart/form-data body into parts as it arrives.
+
+    Yields `(part, chunk)` for each piece of a part's content in order, then
+    `(part, None)` when the part ends.
+
+    Raises:
+        IngestError: If the body isn't multipart/form-data or is malformed
+    """
+    media_type, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        raise IngestError("Expected a multipart/form-data upload")
+
+    events: list[tuple[UploadPart, bytes | None]] = []
+    headers: dict[bytes, bytes] = {}
+    header_field = bytearray()
+    header_value = bytearray()
+    current: list[UploadPart] = []
+    ended: list[bool] = []
+
+    def on_part_begin() -> None:
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+        filename = disposition.get(b"filename")
+        part_type = headers.get(b"content-type")
+        current[:] = [
+            UploadPart(
+                name=disposition.get(b"name", b"").decode(),
+                filename=filename.decode() if filename is not None else None,
+                content_type=part_type.decode() if part_type else None,
+            )
+        ]
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        events.append((current[0], data[start:end]))
+
+    def on_part_end() -> None:
+        events.append((current[0], None))
+
+    def on_end() -> None:
+        ended.append(True)
+
+    parser = MultipartParser(
+        boundary,
+        callbacks={
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_end": on_end,
+        },
+    )
+    try:
+        async for chunk in body:
+            parser.write(chunk)
+            for event in events:
+                yield event
+            events.clear()
+        parser.finalize()
+    except MultipartParseError as e:
+        raise IngestError(f"Malformed multipart body: {e}") from e
+    if not ended:
+        raise IngestError("Upload ended before the closing multipart boundary")
+    for event in events:
+        yield event
+
+
+def upload_format(part: UploadPart, requested: str | None = None) -> str:
+    """
+    "csv" or "ndjson": as requested, else from the part's content type or extension.
+
+    Raises:
+        IngestError: If the format can't be told
+    """
+    if requested:
+        if requested not in ("csv", "ndjson"):
+            raise IngestError(f"Unsupported format: {requested}")
+        return requested
+    content_type = (part.content_type or "").split(";")[0].strip().lower()
+    filename = (part.filename or "").lower()
+    if content_type == "text/csv" or filename.endswith(".csv"):
+        return "csv"
+    if content_type in (ndjson.MEDIA_TYPE, "application/jsonl") or filename.endswith(
+        (".ndjson", ".jsonl")
+    ):
+        return "ndjson"
+    raise IngestError("Can't tell the file format; send format=csv or format=ndjson")
+
+
+class RecordParser:
+    """
+    Turns an uploaded file, fed chunk by chunk, into records.
+
+    `feed` returns the records completed by a chunk, each a dict or a
+    `RecordError` for a record that couldn't be parsed. Only the unfinished
+    tail of the input is kept between chunks.
+    """
+
+    def __init__(self, file_format: str):
+        self.file_format = file_format
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._pending = ""
+        self._header: list[str] | None = None
+
+    def feed(self, chunk: bytes, final: bool = False) -> list[dict[str, Any] | RecordError]:
+        """
+        Raises:
+            IngestError: If the file isn't UTF-8, or a record exceeds `MAX_RECORD_BYTES`
+        """
+        try:
+            text = self._pending + self._decoder.decode(chunk, final)
+        except UnicodeDecodeError as e:
+            raise IngestError(f"Upload isn't valid UTF-8: {e}") from e
+        cut = len(text) if final else self._record_boundary(text)
+        complete, self._pending = text[:cut], text[cut:]
+        if len(self._pending) > MAX_RECORD_BYTES:
+            raise IngestError(f"Record longer than {MAX_RECORD_BYTES} bytes")
+        if not complete:
+            return []
+        if self.file_format == "csv":
+            return self._csv_records(complete)
+        return [self._json_record(line) for line in complete.splitlines() if line.strip()]
+
+    def _record_boundary(self, text: str) -> int:
+        """Where the last complete record in `text` ends."""
+        if self.file_format != "csv":
+            return text.rfind("\n") + 1
+        # A line break ends a CSV record unless it is inside a quoted field. As
+        # in `csv.reader`, only a quote that starts a field opens one; any other
+        # quote outside a quoted field (`5" oak plank`) is just a character.
+        end = field_start = 0
+        quoted = False
+        closed_at = -2
+        for match in _CSV_SPECIAL.finditer(text):
+            char, pos = match.group(), match.start()
+            if char == '"':
+                if quoted:
+                    quoted, closed_at = False, pos
+                elif pos == field_start or pos == closed_at + 1:
+                    # Opens the field, or is the second half of an escaped `""`
+                    quoted = True
+            elif not quoted:
+                field_start = pos + 1
+                if char == "\n":
+                    end = pos + 1
+        return end
+
+    def _csv_records(self, text: str) -> list[dict[str, Any] | RecordError]:
+        records: list[dict[str, Any] | RecordError] = []
+        for row in csv.reader(io.StringIO(text, newline="")):
+            if not row:
+                continue
+            if self._header is None:
+                self._header = [name.strip() for name in row]
+                continue
+            if len(row) > len(self._header):
+                records.append(
+                    RecordError(f"{len(row)} fields, but the header has {len(self._header)}")
+                )
+                continue
+            record: dict[str, Any] = {}
+            try:
+                for name, value in zip(self._header, row):
+                    # Dotted headers ("customer.name") nest, as template paths do
+                    BaseConnector._set_nested_value(record, name, value)
+            except TypeError:
+                records.append(RecordError("Header has both a column and columns below it"))
+                continue
+            records.append(record)
+        return records
+
+    @staticmethod
+    def _json_record(line: str) -> dict[str, Any] | RecordError:
+        try:
+            record = ndjson.loads(line)
+        except ValueError as e:
+            return RecordError(f"Invalid JSON: {e}")
+        if not isinstance(record, dict):
+            return RecordError("Each line must be a JSON object")
+        return record
+
+
+def map_record(record: dict[str, Any], field_mappings: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Coerce a record's fields to their mapping's `type` and map them to template fields.
+
+    Text is parsed to the mapping's type (string, number, date, boolean, array or
+    object); empty text is None for all but strings. Without mappings the record
+    is used as is.
+
+    Raises:
+        RecordError: If a value doesn't match its mapping's type
+    """
+    if not field_mappings:
+        return record
+    mapped: dict[str, Any] = {}
+    for mapping in field_mappings:
+        source_field = mapping.get("sourceField")
+        template_field = mapping.get("templateField")
+        if not source_field or not template_field:
+            continue
+        value = BaseConnector._get_nested_value(record, source_field)
+        try:
+            value = coerce(value, mapping.get("type"))
+        except (TypeError, ValueError) as e:
+            raise RecordError(f"{source_field}: {e}") from e
+        BaseConnector._set_nested_value(mapped, template_field, value)
+    return mapped
+
+
+def coerce(value: Any, field_type: str | None) -> Any:
+    """Convert text to a field mapping type; values already typed (from JSON) are checked."""
+    if value is None or field_type not in FIELD_TYPES:
+        return value
+    if isinstance(value, str) and field_type != "string":
+        text = value.strip()
+        if not text:
+            return None
+        value = _parse_text(text, field_type)
+    expected = FIELD_TYPES[field_type]
+    if not isinstance(value, expected) or (field_type == "number" and isinstance(value, bool)):
+        raise ValueError(f"expected {field_type}, got {type(value).__name__}")
+    return value
+
+
+def _parse_text(text: str, field_type: str) -> Any:
+    if field_type == "number":
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"not a number: {text!r}") from None
+    if field_type == "boolean":
+        if text.lower() not in BOOLEANS:
+            raise ValueError(f"not a boolean: {text!r}")
+        return BOOLEANS[text.lower()]
+    if field_type == "date":
+        # Kept as ISO text, which the template `date` filter reads
+        parse = datetime.fromisoformat if "T" in text or " " in text else date.fromisoformat
+        return parse(text.replace("Z", "+00:00")).isoformat()
+    return ndjson.loads(text)  # array / object
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from app.metrics import stage
+
+StageFn = Callable[..., Awaitable[Any]]
+
+
+class StageGraph:
+    """
+    A small dependency graph of async stages.
+
+    Each stage starts as soon as the stages it depends on have finished, so
+    independent I/O overlaps. A stage function receives its dependencies'
+    results as keyword arguments named after them. Every stage is timed with
+    `app.metrics.stage` under its own name; waiting on dependencies is not
+    included in that time.
+    """
+
+    def __init__(self):
+        self._stages: dict[str, tuple[StageFn, tuple[str, ...]]] = {}
+
+    def add(self, name: str, fn: StageFn, after: tuple[str, ...] = ()) -> None:
+        """Add a stage. Dependencies must already have been added."""
+        missing = [dep for dep in after if dep not in self._stages]
+        if missing:
+            raise ValueError(f"Stage {name!r} depends on unknown stages: {missing}")
+        self._stages[name] = (fn, after)
+
+    async def run(self) -> dict[str, Any]:
+        """Run all stages and return their results by name."""
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> Any:
+            fn, after = self._stages[name]
+            kwargs = {dep: await tasks[dep] for dep in after}
+            with stage(name):
+                return await fn(**kwargs)
+
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(run_stage(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            # Let cancelled stages run their cleanup before propagating
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.metrics import SINGLEFLIGHT_CALLS
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key runs the work in its own task; callers that
+    arrive while it is still running wait for that task and receive the same
+    result or exception. Nothing is cached: once the work finishes the next
+    call runs it again. The work is cancelled only when every caller waiting
+    on it has been cancelled.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Label for the `pdfgen_singleflight_calls_total` metric
+        """
+        self.name = name
+        self._flights: dict[Hashable, tuple[asyncio.Task, list[int]]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Run `fn`, or join the call already in flight for `key`.
+
+        Returns:
+            `(result, shared)`, where `shared` is True when another call's result was reused
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            task = asyncio.ensure_future(fn())
+            flight = self._flights[key] = (task, [0])
+            task.add_done_callback(lambda _: self._forget(key, task))
+        SINGLEFLIGHT_CALLS.labels(flight=self.name, result="shared" if shared else "run").inc()
+
+        task, waiters = flight
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if waiters[0] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        flight = self._flights.get(key)
+        if flight is not None and flight[0] is task:
+            del self._flights[key]
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any
+
+from app.db.client import DatabaseClient
+from app.metrics import stage
+from app.pdf.base import RenderBackend
+from app.pdf.scheduler import DEFAULT_TENANT
+from app.storage import StorageBackend
+from app.templates.artifact import TemplateArtifact, validate_template
+from app.templates.cache import TemplateCache
+from app.templates.compiler import TemplateCompiler
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_path(template_id: str) -> str:
+    return f"templates/{template_id}/artifact.json"
+
+
+def thumbnail_path(template_id: str) -> str:
+    return f"templates/{template_id}/thumbnail.png"
+
+
+def manifest_path(template_id: str) -> str:
+    return f"templates/{template_id}/build.json"
+
+
+class TemplateBuilder:
+    """
+    Compiles templates ahead of time, in the background, after they are saved.
+
+    A build validates the Craft.js structure, stores a compiled `TemplateArtifact`
+    and a thumbnail next to each other in storage, and writes a manifest with the
+    outcome. Saves within `delay` seconds of each other (editor autosaves) are
+    coalesced into one build of the latest version.
+    """
+
+    def __init__(
+        self,
+        client: DatabaseClient,
+        storage: StorageBackend,
+        pdf_engine: RenderBackend,
+        cache: TemplateCache,
+        delay: float = 2.0,
+        max_concurrent: int = 2,
+        thumbnails: bool = True,
+    ):
+        """
+        Args:
+            client: Database client templates are read with
+            storage: Storage backend artifacts, thumbnails and manifests go to
+            pdf_engine: Renders thumbnails; skipped while it isn't ready
+            cache: Receives each built artifact so this process uses it right away
+            delay: Seconds to wait for further saves before building
+            max_concurrent: Builds running at once, bounding browser pages used
+            thumbnails: Whether to render thumbnails
+        """
+        self.client = client
+        self.storage = storage
+        self.pdf_engine = pdf_engine
+        self.cache = cache
+        self.delay = delay
+        self.thumbnails = thumbnails
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._dirty: set[str] = set()
+        self._rejected: dict[str, str] = {}  # template id -> version that failed validation
+
+    def schedule(self, template_id: str) -> None:
+        """Build the template's latest version after the debounce delay."""
+        self._dirty.add(template_id)
+        if template_id not in self._tasks:
+            self._tasks[template_id] = asyncio.create_task(self._run(template_id))
+
+    async def discard(self, template_id: str) -> None:
+        """Cancel pending builds for a deleted template and remove what was stored."""
+        self._dirty.discard(template_id)
+        task = self._tasks.pop(template_id, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.cache.invalidate(template_id)
+        for path in (
+            artifact_path(template_id),
+            thumbnail_path(template_id),
+            manifest_path(template_id),
+        ):
+            try:
+                await self.storage.delete(path)
+            except Exception:
+                logger.warning("Failed to delete %s", path, exc_info=True)
+
+    async def artifact_for(self, template: dict[str, Any]) -> TemplateArtifact | None:
+        """
+        The compiled artifact for a template row's current version, if one exists.
+
+        Checks the cache, then storage. When neither has it, a build is queued and
+        the caller compiles from scratch this time.
+        """
+        template_id, version = template["id"], str(template["updated_at"])
+        artifact = self.cache.artifact(template_id, version)
+        if artifact is not None:
+            return artifact
+        if not isinstance(template["template_json"].get("editorState"), str):
+            return None  # Simple templates aren't precompiled
+        if self._rejected.get(template_id) == version:
+            return None
+
+        try:
+            raw = await self.storage.read(artifact_path(template_id))
+            artifact = TemplateArtifact.from_json(raw) if raw is not None else None
+        except Exception:
+            logger.warning("Failed to load artifact for template %s", template_id, exc_info=True)
+            artifact = None
+        if artifact is not None and artifact.version == version:
+            self.cache.store_artifact(template_id, artifact)
+            return artifact
+
+        if template_id not in self._tasks:
+            self.schedule(template_id)
+        return None
+
+    async def build(self, template_id: str) -> dict[str, Any] | None:
+        """Build the template's current version now, returning the manifest written."""
+        async with self._slots:
+            response = await asyncio.to_thread(
+                lambda: (
+                    self.client.table("templates")
+                    .select("id,user_id,template_json,updated_at")
+                    .eq("id", template_id)
+                    .limit(1)
+                    .execute()
+                )
+            )
+            if not response.data:
+                return None  # Deleted before the build ran
+            template = response.data[0]
+            version = str(template["updated_at"])
+            template_json = template["template_json"]
+
+            with stage("template_validate"):
+                errors, warnings = validate_template(template_json)
+            manifest: dict[str, Any] = {
+                "template_id": template_id,
+                "version": version,
+                "status": "invalid" if errors else "ready",
+                "errors": errors,
+                "warnings": warnings,
+                "artifact": None,
+                "thumbnail": None,
+            }
+
+            if errors:
+                self._rejected[template_id] = version
+            else:
+                self._rejected.pop(template_id, None)
+                html = await self._build_artifact(template_id, template_json, version, manifest)
+                if self.thumbnails and self.pdf_engine.is_ready:
+                    with stage("template_thumbnail"):
+                        thumbnail = await self.pdf_engine.generate_screenshot(
+                            html, tenant=template.get("user_id") or DEFAULT_TENANT
+                        )
+                    await self.storage.upload(thumbnail_path(template_id), thumbnail, "image/png")
+                    manifest["thumbnail"] = thumbnail_path(template_id)
+
+            manifest["built_at"] = datetime.now(timezone.utc).isoformat()
+            await self.storage.upload(
+                manifest_path(template_id), json.dumps(manifest).encode(), "application/json"
+            )
+            return manifest
+
+    async def close(self) -> None:
+        """Cancel pending builds. Call at application shutdown."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _build_artifact(
+        self,
+        template_id: str,
+        template_json: dict[str, Any],
+        version: str,
+        manifest: dict[str, Any],
+    ) -> str:
+        """Compile and store the artifact; returns the template rendered without data."""
+        compiler = TemplateCompiler()
+        if not isinstance(template_json.get("editorState"), str):
+            return await asyncio.to_thread(compiler.compile, template_json, {})
+
+        with stage("template_build"):
+            artifact = await asyncio.to_thread(TemplateArtifact.build, template_json, version)
+        path = artifact_path(template_id)
+        await self.storage.upload(path, artifact.to_json(), "application/json")
+        self.cache.store_artifact(template_id, artifact)
+        manifest["artifact"] = path
+        return await asyncio.to_thread(artifact.render, compiler, {})
+
+    async def _run(self, template_id: str) -> None:
+        try:
+            while template_id in self._dirty:
+                await asyncio.sleep(self.delay)
+                self._dirty.discard(template_id)
+                try:
+                    await self.build(template_id)
+                except Exception:
+                    logger.exception("Build failed for template %s", template_id)
+        finally:
+            if self._tasks.get(template_id) is asyncio.current_task():
+                del self._tasks[template_id]
@@ -0,0 +1,4 @@
+from app.storage.base import StorageBackend
+from app.storage.factory import get_storage_backend
+
+__all__ = ["StorageBackend", "get_storage_backend"]
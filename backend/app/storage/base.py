@@ -0,0 +1,153 @@
+import asyncio
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# Either the object contents or a local file to read them from
+UploadSource = bytes | Path
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transport failures, throttling and 5xx responses are worth retrying."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError))
+
+
+def is_missing(exc: BaseException) -> bool:
+    """Whether a read failed because the object doesn't exist."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        # Supabase Storage answers 400 "Object not found" for missing objects
+        return exc.response.status_code in (400, 404)
+    return isinstance(exc, FileNotFoundError)
+
+
+class StorageBackend(ABC):
+    """Abstract base class for object storage used for generated files."""
+
+    def __init__(
+        self,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        chunk_size: int = 6 * 1024 * 1024,
+        retries: int = 3,
+    ):
+        """
+        Args:
+            multipart_threshold: Objects at least this large are uploaded in chunks
+            chunk_size: Size of each chunk for multipart uploads and streaming reads
+            retries: Attempts per upload before giving up
+        """
+        self.multipart_threshold = multipart_threshold
+        self.chunk_size = chunk_size
+        self.retries = retries
+
+    async def upload(
+        self, path: str, source: UploadSource, content_type: str = "application/octet-stream"
+    ) -> None:
+        """
+        Upload an object, retrying transient failures with jittered backoff.
+
+        Large objects are sent in chunks so a file source never has to be read
+        into memory as a whole.
+        """
+        size = len(source) if isinstance(source, bytes) else source.stat().st_size
+
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(self.retries),
+            wait=wait_random_exponential(multiplier=0.2, max=5),
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        ):
+            with attempt:
+                if size >= self.multipart_threshold:
+                    await self._upload_multipart(path, source, size, content_type)
+                else:
+                    data = source if isinstance(source, bytes) else await _read_file(source)
+                    await self._upload(path, data, content_type)
+
+    @abstractmethod
+    async def _upload(self, path: str, data: bytes, content_type: str) -> None:
+        """Upload a small object in a single request."""
+        pass
+
+    async def _upload_multipart(
+        self, path: str, source: UploadSource, size: int, content_type: str
+    ) -> None:
+        """Upload a large object in chunks. Backends without chunked uploads send it whole."""
+        data = source if isinstance(source, bytes) else await _read_file(source)
+        await self._upload(path, data, content_type)
+
+    @abstractmethod
+    def stream(self, path: str) -> AsyncIterator[bytes]:
+        """Stream an object's contents in chunks of about `chunk_size` bytes."""
+        pass
+
+    async def read(self, path: str) -> bytes | None:
+        """Read a small object whole, or return None if it doesn't exist."""
+        try:
+            return b"".join([chunk async for chunk in self.stream(path)])
+        except Exception as e:
+            if is_missing(e):
+                return None
+            raise
+
+    async def open_stream(self, path: str) -> AsyncIterator[bytes] | None:
+        """
+        Start streaming an object, or return None if it doesn't exist.
+
+        The first chunk is read before returning, so a missing object is known
+        before a response is committed to.
+        """
+        chunks = self.stream(path)
+        try:
+            first = await anext(chunks, b"")
+        except Exception as e:
+            if is_missing(e):
+                return None
+            raise
+
+        async def rest() -> AsyncIterator[bytes]:
+            try:
+                if first:
+                    yield first
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await chunks.aclose()
+
+        return rest()
+
+    @abstractmethod
+    async def delete(self, path: str) -> None:
+        """Delete an object."""
+        pass
+
+    @abstractmethod
+    def get_public_url(self, path: str) -> str:
+        """Return a URL clients can download the object from."""
+        pass
+
+    async def close(self) -> None:
+        """Release network resources. Call at application shutdown."""
+        pass
+
+    async def iter_chunks(
+        self, source: UploadSource, chunk_size: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Yield `chunk_size` pieces of an upload source (`self.chunk_size` by default)."""
+        chunk_size = chunk_size or self.chunk_size
+        if isinstance(source, bytes):
+            for offset in range(0, len(source), chunk_size):
+                yield source[offset : offset + chunk_size]
+            return
+
+        with open(source, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+
+
+async def _read_file(path: Path) -> bytes:
+    return await asyncio.to_thread(path.read_bytes)
@@ -0,0 +1,42 @@
+from functools import lru_cache
+
+from app.config import get_settings
+from app.storage.base import StorageBackend
+
+
+@lru_cache
+def get_storage_backend() -> StorageBackend:
+    """Get the configured storage backend (`Settings.storage_backend`)."""
+    settings = get_settings()
+    common = {
+        "multipart_threshold": settings.storage_multipart_threshold,
+        "chunk_size": settings.storage_chunk_size,
+        "retries": settings.storage_upload_retries,
+    }
+
+    if settings.storage_backend == "supabase":
+        from app.storage.supabase import SupabaseStorage
+
+        return SupabaseStorage(
+            settings.supabase_url, settings.supabase_key, settings.pdf_storage_bucket, **common
+        )
+
+    if settings.storage_backend == "local":
+        from app.storage.local import LocalStorage
+
+        return LocalStorage(settings.storage_local_dir, settings.storage_public_base_url, **common)
+
+    if settings.storage_backend == "s3":
+        from app.storage.s3 import S3Storage
+
+        return S3Storage(
+            endpoint_url=settings.s3_endpoint_url,
+            bucket=settings.pdf_storage_bucket,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+            region=settings.s3_region,
+            public_base_url=settings.storage_public_base_url,
+            **common,
+        )
+
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
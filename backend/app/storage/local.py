@@ -0,0 +1,72 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncIterator
+from uuid import uuid4
+
+from app.storage.base import StorageBackend, UploadSource
+
+
+class LocalStorage(StorageBackend):
+    """Stores objects as files under a local directory."""
+
+    def __init__(self, root: str | Path, public_base_url: str | None = None, **kwargs):
+        """
+        Args:
+            root: Directory objects are written under
+            public_base_url: URL prefix the directory is served from, if any
+        """
+        super().__init__(**kwargs)
+        self.root = Path(root)
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+
+    def _resolve(self, path: str) -> Path:
+        target = (self.root / path).resolve()
+        if not target.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Path escapes storage root: {path}")
+        return target
+
+    async def _upload(self, path: str, data: bytes, content_type: str) -> None:
+        await asyncio.to_thread(self._write, self._resolve(path), [data])
+
+    async def _upload_multipart(
+        self, path: str, source: UploadSource, size: int, content_type: str
+    ) -> None:
+        target = self._resolve(path)
+        tmp = self._temp_path(target)
+        try:
+            with open(tmp, "wb") as f:
+                async for chunk in self.iter_chunks(source):
+                    await asyncio.to_thread(f.write, chunk)
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def _write(self, target: Path, chunks: list[bytes]) -> None:
+        # Write to a sibling temp file and rename so readers never see partial objects
+        tmp = self._temp_path(target)
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    @staticmethod
+    def _temp_path(target: Path) -> Path:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target.with_name(f".{target.name}.{uuid4().hex}.tmp")
+
+    async def stream(self, path: str) -> AsyncIterator[bytes]:
+        with open(self._resolve(path), "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, self.chunk_size):
+                yield chunk
+
+    async def delete(self, path: str) -> None:
+        await asyncio.to_thread(self._resolve(path).unlink, missing_ok=True)
+
+    def get_public_url(self, path: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{path}"
+        return self._resolve(path).as_uri()
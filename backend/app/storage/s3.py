@@ -0,0 +1,195 @@
+import hashlib
+import hmac
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import AsyncIterator
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from app.storage.base import StorageBackend, UploadSource
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible object storage (AWS S3, MinIO, R2, ...) using SigV4-signed requests.
+
+    Large objects are sent with the multipart upload API.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key_id: str,
+        secret_access_key: str,
+        region: str = "us-east-1",
+        public_base_url: str | None = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self._host = urlsplit(self.endpoint_url).netloc
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+        return self._client
+
+    def _key_path(self, path: str) -> str:
+        # Path-style addressing works for every S3-compatible service
+        return f"/{quote(self.bucket)}/{quote(path, safe='/~')}"
+
+    def _signed(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, str] | None = None,
+        payload_hash: str = EMPTY_SHA256,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[str, dict[str, str]]:
+        """Return the request URL and SigV4-signed headers."""
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date = now.strftime("%Y%m%d")
+
+        canonical_uri = self._key_path(path)
+        canonical_query = "&".join(
+            f"{quote(k, safe='~')}={quote(v, safe='~')}" for k, v in sorted((params or {}).items())
+        )
+        all_headers = {
+            **{k.lower(): v for k, v in (headers or {}).items()},
+            "host": self._host,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+        }
+        signed_headers = ";".join(sorted(all_headers))
+        canonical_headers = "".join(f"{k}:{all_headers[k].strip()}\n" for k in sorted(all_headers))
+        canonical_request = "\n".join(
+            [
+                method,
+                canonical_uri,
+                canonical_query,
+                canonical_headers,
+                signed_headers,
+                payload_hash,
+            ]
+        )
+
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                amz_date,
+                scope,
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+        signing_key = f"AWS4{self.secret_access_key}".encode()
+        for part in (date, self.region, "s3", "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        all_headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del all_headers["host"]
+        url = f"{self.endpoint_url}{canonical_uri}"
+        if canonical_query:
+            url += f"?{canonical_query}"
+        return url, all_headers
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, str] | None = None,
+        content: bytes = b"",
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        payload_hash = hashlib.sha256(content).hexdigest()
+        url, signed = self._signed(method, path, params, payload_hash, headers)
+        response = await self.client.request(method, url, content=content, headers=signed)
+        response.raise_for_status()
+        return response
+
+    async def _upload(self, path: str, data: bytes, content_type: str) -> None:
+        await self._request("PUT", path, content=data, headers={"Content-Type": content_type})
+
+    async def _upload_multipart(
+        self, path: str, source: UploadSource, size: int, content_type: str
+    ) -> None:
+        response = await self._request(
+            "POST", path, params={"uploads": ""}, headers={"Content-Type": content_type}
+        )
+        upload_id = _find_text(response.content, "UploadId")
+
+        try:
+            parts = []
+            part_number = 0
+            async for chunk in self.iter_chunks(source):
+                part_number += 1
+                response = await self._request(
+                    "PUT",
+                    path,
+                    params={"partNumber": str(part_number), "uploadId": upload_id},
+                    content=chunk,
+                )
+                parts.append((part_number, response.headers["ETag"]))
+
+            body = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for number, etag in parts
+            )
+            await self._request(
+                "POST",
+                path,
+                params={"uploadId": upload_id},
+                content=f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode(),
+                headers={"Content-Type": "application/xml"},
+            )
+        except Exception:
+            # Don't leave orphaned parts accruing storage costs
+            try:
+                await self._request("DELETE", path, params={"uploadId": upload_id})
+            except httpx.HTTPError:
+                pass
+            raise
+
+    async def stream(self, path: str) -> AsyncIterator[bytes]:
+        url, headers = self._signed("GET", path)
+        async with self.client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                yield chunk
+
+    async def delete(self, path: str) -> None:
+        await self._request("DELETE", path)
+
+    def get_public_url(self, path: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{quote(path, safe='/~')}"
+        return f"{self.endpoint_url}{self._key_path(path)}"
+
+    async def close(self) -> None:
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+
+def _find_text(xml: bytes, tag: str) -> str:
+    """Find the text of the first element named `tag`, ignoring XML namespaces."""
+    for element in ET.fromstring(xml).iter():
+        if element.tag.rsplit("}", 1)[-1] == tag and element.text:
+            return element.text
+    raise ValueError(f"Missing <{tag}> in S3 response")
@@ -0,0 +1,203 @@
+import json
+import re
+from typing import Any
+
+from app.templates.compiler import TemplateCompiler
+
+ARTIFACT_FORMAT = 1
+
+# Components TemplateCompiler knows how to render; anything else renders only its children
+KNOWN_COMPONENTS = frozenset(
+    {
+        "Container",
+        "TextBlock",
+        "ImageBlock",
+        "TableBlock",
+        "RowBlock",
+        "ColumnBlock",
+        "SpacerBlock",
+        "DividerBlock",
+    }
+)
+
+# Jinja expressions, statements and comments all make a text depend on rendering
+_BINDING = re.compile(r"\{[{%#]")
+# Stands in for a component's children while splitting its markup around them
+_CHILDREN = "\x00children\x00"
+
+
+class TemplateArtifact:
+    """
+    A Craft.js template compiled ahead of time for one template version.
+
+    Everything that doesn't depend on the bound data (the document shell, layout
+    containers, images, static text) is rendered once into HTML segments; only
+    data-bound components are rendered per request. `render` produces exactly
+    what `TemplateCompiler.compile` would.
+    """
+
+    def __init__(self, version: str, segments: list[str | dict[str, Any]]):
+        """
+        Args:
+            version: `updated_at` of the template the artifact was built from
+            segments: Static HTML strings and `{"component": name, "props": {...}}`
+                entries for data-bound components, in document order
+        """
+        self.version = version
+        self.segments = segments
+
+    @classmethod
+    def build(cls, template_json: dict[str, Any], version: str) -> "TemplateArtifact":
+        """Compile a Craft.js template; raises ValueError if it can't be parsed."""
+        try:
+            nodes = json.loads(template_json.get("editorState") or "")
+        except (json.JSONDecodeError, TypeError):
+            raise ValueError("Template has no valid Craft.js editor state")
+        if not isinstance(nodes, dict):
+            raise ValueError("Template editor state must be a node map")
+
+        compiler = TemplateCompiler()
+        shell = compiler._wrap_html(_CHILDREN, template_json.get("pageSettings", {}))
+        head, tail = shell.split(_CHILDREN)
+
+        segments: list[str | dict[str, Any]] = [head]
+        if "ROOT" in nodes:
+            _append_segments(compiler, nodes["ROOT"], nodes, segments)
+        segments.append(tail)
+        return cls(version, _merge_static(segments))
+
+    def render(self, compiler: TemplateCompiler, data: dict[str, Any]) -> str:
+        """Render the full HTML document for `data`."""
+        return "".join(
+            segment
+            if isinstance(segment, str)
+            else compiler._render_component(segment["component"], segment["props"], "", data)
+            for segment in self.segments
+        )
+
+    def to_json(self) -> bytes:
+        return json.dumps(
+            {"format": ARTIFACT_FORMAT, "version": self.version, "segments": self.segments},
+            separators=(",", ":"),
+        ).encode()
+
+    @classmethod
+    def from_json(cls, raw: bytes) -> "TemplateArtifact | None":
+        """Load a stored artifact, or None if it was written in another format."""
+        document = json.loads(raw)
+        if document.get("format") != ARTIFACT_FORMAT:
+            return None
+        return cls(document["version"], document["segments"])
+
+
+def validate_template(template_json: dict[str, Any]) -> tuple[list[str], list[str]]:
+    """
+    Check a template's Craft.js structure.
+
+    Returns:
+        `(errors, warnings)`. Errors make the template unrenderable (unparseable
+        state, reference cycles); warnings are parts the compiler will skip.
+    """
+    editor_state = template_json.get("editorState")
+    if not editor_state:
+        return [], []
+    if not isinstance(editor_state, str):
+        return ["editorState must be a serialized string"], []
+    try:
+        nodes = json.loads(editor_state)
+    except json.JSONDecodeError as e:
+        return [f"editorState is not valid JSON: {e}"], []
+    if not isinstance(nodes, dict):
+        return ["editorState must be a node map"], []
+    if "ROOT" not in nodes:
+        return [], ["Template has no ROOT node and renders empty"]
+
+    errors: list[str] = []
+    warnings: list[str] = []
+    visited: set[str] = set()
+    # Iterative depth-first walk; `path` holds the ancestors of the node on top
+    stack: list[tuple[str, bool]] = [("ROOT", False)]
+    path: list[str] = []
+    while stack:
+        node_id, leaving = stack.pop()
+        if leaving:
+            path.pop()
+            continue
+        if node_id in path:
+            errors.append(f"Node {node_id} contains itself")
+            continue
+        if node_id in visited:
+            warnings.append(f"Node {node_id} is rendered more than once")
+            continue
+        visited.add(node_id)
+
+        node = nodes[node_id]
+        if not isinstance(node, dict):
+            errors.append(f"Node {node_id} is not an object")
+            continue
+        name = TemplateCompiler._resolved_name(node)
+        if name not in KNOWN_COMPONENTS:
+            warnings.append(f"Node {node_id} has unknown component {name!r}")
+        references = list(node.get("nodes", [])) + list(node.get("linkedNodes", {}).values())
+        for child_id in references:
+            if child_id not in nodes:
+                warnings.append(f"Node {node_id} references missing node {child_id}")
+
+        path.append(node_id)
+        stack.append((node_id, True))
+        for child_id in reversed(TemplateCompiler._child_ids(node, nodes)):
+            stack.append((child_id, False))
+
+    return errors, warnings
+
+
+def _is_data_bound(name: str, props: dict[str, Any]) -> bool:
+    if name == "TableBlock":
+        return True
+    if name == "TextBlock":
+        text = props.get("text", "")
+        return not isinstance(text, str) or _BINDING.search(text) is not None
+    return False
+
+
+def _append_segments(
+    compiler: TemplateCompiler,
+    node: dict[str, Any],
+    nodes: dict[str, Any],
+    segments: list[str | dict[str, Any]],
+) -> None:
+    name = compiler._resolved_name(node)
+    props = node.get("props", {})
+    if _is_data_bound(name, props):
+        # Data-bound components ignore their children
+        segments.append({"component": name, "props": props})
+        return
+
+    children: list[str | dict[str, Any]] = []
+    for child_id in compiler._child_ids(node, nodes):
+        _append_segments(compiler, nodes[child_id], nodes, children)
+
+    if all(isinstance(child, str) for child in children):
+        segments.append(compiler._render_component(name, props, "".join(children), {}))
+        return
+
+    # Split the component's own markup around wherever it places its children
+    head, *rest = compiler._render_component(name, props, _CHILDREN, {}).split(_CHILDREN)
+    segments.append(head)
+    for tail in rest:
+        segments.extend(children)
+        segments.append(tail)
+
+
+def _merge_static(segments: list[str | dict[str, Any]]) -> list[str | dict[str, Any]]:
+    """Join adjacent static segments and drop empty ones."""
+    merged: list[str | dict[str, Any]] = []
+    for segment in segments:
+        if isinstance(segment, str):
+            if not segment:
+                continue
+            if merged and isinstance(merged[-1], str):
+                merged[-1] += segment
+                continue
+        merged.append(segment)
+    return merged
@@ -0,0 +1,112 @@
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from app.config import get_settings
+from app.metrics import record_cache
+from app.templates.artifact import TemplateArtifact
+
+
+class TemplateCache:
+    """
+    Parsed Craft.js node maps and compiled artifacts, keyed by template id and
+    version (`updated_at`).
+
+    Parsing `editorState` is the first step of every compile, and large templates
+    spend a noticeable share of compile time in `json.loads`. Entries are only
+    served for the exact version they were parsed from, so a stale entry left by
+    another process is never used. Partial updates carry the entry forward by
+    replacing just the changed nodes instead of evicting it.
+
+    Node maps are shared between readers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, dict[str, Any]]] = OrderedDict()
+        self._artifacts: OrderedDict[str, TemplateArtifact] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def nodes(self, template_id: str, version: str, editor_state: str) -> dict[str, Any]:
+        """Return the parsed `editor_state` for this template version, parsing on a miss."""
+        with self._lock:
+            entry = self._entries.get(template_id)
+            hit = entry is not None and entry[0] == version
+            if hit:
+                self._entries.move_to_end(template_id)
+        record_cache("template_nodes", hit)
+        if hit:
+            return entry[1]
+
+        nodes = json.loads(editor_state)
+        self._store(template_id, version, nodes)
+        return nodes
+
+    def artifact(self, template_id: str, version: str) -> TemplateArtifact | None:
+        """Return the compiled artifact for this template version, if cached."""
+        with self._lock:
+            artifact = self._artifacts.get(template_id)
+            hit = artifact is not None and artifact.version == version
+            if hit:
+                self._artifacts.move_to_end(template_id)
+        record_cache("template_artifact", hit)
+        return artifact if hit else None
+
+    def store_artifact(self, template_id: str, artifact: TemplateArtifact) -> None:
+        with self._lock:
+            current = self._artifacts.get(template_id)
+            if current is not None and current.version > artifact.version:
+                return  # A build for a newer version already landed
+            self._artifacts[template_id] = artifact
+            self._artifacts.move_to_end(template_id)
+            while len(self._artifacts) > self.max_entries:
+                self._artifacts.popitem(last=False)
+
+    def apply_changes(
+        self,
+        template_id: str,
+        old_version: str,
+        new_version: str,
+        changes: dict[str, dict[str, Any] | None],
+    ) -> None:
+        """
+        Move a cached entry to `new_version` after a node-level update.
+
+        Only the changed nodes are replaced. Without an entry for `old_version`
+        there is nothing to carry forward and the next compile parses afresh.
+        The artifact is dropped; the template builder compiles the new version.
+        """
+        with self._lock:
+            self._artifacts.pop(template_id, None)
+            entry = self._entries.get(template_id)
+            if entry is None or entry[0] != old_version:
+                self._entries.pop(template_id, None)
+                return
+            # Copy the map so compiles still reading the old version are unaffected
+            nodes = dict(entry[1])
+            for node_id, node in changes.items():
+                if node is None:
+                    nodes.pop(node_id, None)
+                else:
+                    nodes[node_id] = node
+            self._entries[template_id] = (new_version, nodes)
+
+    def invalidate(self, template_id: str) -> None:
+        with self._lock:
+            self._entries.pop(template_id, None)
+            self._artifacts.pop(template_id, None)
+
+    def _store(self, template_id: str, version: str, nodes: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[template_id] = (version, nodes)
+            self._entries.move_to_end(template_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@lru_cache
+def get_template_cache() -> TemplateCache:
+    """Get the process-wide template cache."""
+    return TemplateCache(max_entries=get_settings().template_cache_size)
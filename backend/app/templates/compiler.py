@@ -1,17 +1,51 @@
+import logging
+import math
 import re
-from typing import Any
-from jinja2 import Environment, BaseLoader
+from collections.abc import Iterable, Iterator, Mapping
+from contextvars import ContextVar
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Callable
+from jinja2 import BaseLoader, ChainableUndefined, FileSystemBytecodeCache, Template, nodes
+from jinja2.exceptions import SecurityError
+from jinja2.sandbox import SandboxedEnvironment
+from markupsafe import escape
+
+from app.config import get_settings
+from app.connectors.columnar import ColumnarTable, to_records
+from app.schemas import PreviewOptions
+
+# Printable area of an A4 page at 96dpi with the default 40px margins
+PAGE_CONTENT_WIDTH = 714
+PAGE_CONTENT_HEIGHT = 1043
+
+# Limits on rendering one binding text, since template authors are untrusted
+MAX_BINDING_ITERATIONS = 100_000  # Loop iterations, all loops of the text together
+MAX_BINDING_OUTPUT = 1_000_000  # Characters rendered
+MAX_BINDING_SEQUENCE = 1_000_000  # Length of a string or list built with `*`
+MAX_BINDING_POWER_BITS = 64 * 1024  # Size of an integer built with `**`
+
+# Part of the on-disk bytecode cache file names; bump it when the code generated
+# for binding texts changes, so stale bytecode is never loaded
+BINDING_CODE_VERSION = 2
+
+logger = logging.getLogger(__name__)
 
 
 class TemplateCompiler:
     """Compiles JSON templates to HTML with data binding."""
 
-    def __init__(self):
-        self.env = Environment(loader=BaseLoader(), autoescape=True)
-        # Register custom filters
-        self.env.filters["currency"] = self._format_currency
-        self.env.filters["date"] = self._format_date
-        self.env.filters["number"] = self._format_number
+    def __init__(self, preview: PreviewOptions | None = None):
+        """
+        Args:
+            preview: Sampling limits for previews. When set, long tables and lists
+                are cut short and what was left out is recorded in `elided`.
+        """
+        self.preview = preview
+        self.elided: dict[str, Any] = {}
+        self.env = get_binding_environment()
+        self._binding_data: dict | None = None
+        self._binding_vars: dict[str, Any] = {}
 
     def compile(self, template_json: dict[str, Any], data: dict[str, Any]) -> str:
         """Compile a JSON template to HTML with data."""
@@ -23,48 +57,68 @@ class TemplateCompiler:
 
             try:
                 nodes = json.loads(editor_state)
-                body_html = self._compile_craft_nodes(nodes, data)
             except json.JSONDecodeError:
                 body_html = "<p>Invalid template data</p>"
+            else:
+                return self.compile_nodes(nodes, template_json.get("pageSettings", {}), data)
         else:
             # Simple template format
+            if self.preview is not None:
+                data = self.sample_data(data)
             body_html = self._compile_simple_template(template_json, data)
 
         # Build complete HTML document
         return self._wrap_html(body_html, template_json.get("pageSettings", {}))
 
+    def compile_nodes(self, nodes: dict, page_settings: dict, data: dict[str, Any]) -> str:
+        """Compile an already parsed Craft.js node map to an HTML document."""
+        if self.preview is not None:
+            data = self.sample_data(data, self._table_paths(nodes))
+        return self._wrap_html(self._compile_craft_nodes(nodes, data), page_settings)
+
     def _compile_craft_nodes(self, nodes: dict, data: dict) -> str:
         """Compile Craft.js node tree to HTML."""
         if not nodes or "ROOT" not in nodes:
             return ""
 
         root = nodes["ROOT"]
+        if self.preview is not None and self.preview.max_pages:
+            return self._render_first_pages(root, nodes, data, self.preview.max_pages)
         return self._render_node(root, nodes, data)
 
     def _render_node(self, node: dict, all_nodes: dict, data: dict) -> str:
         """Recursively render a Craft.js node to HTML."""
+        children_html = "".join(
+            self._render_node(all_nodes[child_id], all_nodes, data)
+            for child_id in self._child_ids(node, all_nodes)
+        )
+        return self._render_component(
+            self._resolved_name(node), node.get("props", {}), children_html, data
+        )
+
+    @staticmethod
+    def _resolved_name(node: dict) -> str:
+        """Get the component name of a Craft.js node."""
         node_type = node.get("type", {})
         if isinstance(node_type, dict):
-            resolved_name = node_type.get("resolvedName", "")
-        else:
-            resolved_name = str(node_type)
-
-        props = node.get("props", {})
+            return node_type.get("resolvedName", "")
+        return str(node_type)
 
-        # Render children
-        children_html = ""
-        if "nodes" in node:
-            for child_id in node["nodes"]:
-                if child_id in all_nodes:
-                    children_html += self._render_node(all_nodes[child_id], all_nodes, data)
-
-        # Also check linkedNodes (for Craft.js canvas elements)
-        if "linkedNodes" in node:
-            for linked_id in node["linkedNodes"].values():
-                if linked_id in all_nodes:
-                    children_html += self._render_node(all_nodes[linked_id], all_nodes, data)
-
-        # Render based on component type
+    @staticmethod
+    def _child_ids(node: dict, all_nodes: dict) -> list[str]:
+        """Ids of a node's children, followed by its linked nodes (Craft.js canvas elements)."""
+        child_ids = [child_id for child_id in node.get("nodes", []) if child_id in all_nodes]
+        child_ids += [
+            linked_id
+            for linked_id in node.get("linkedNodes", {}).values()
+            if linked_id in all_nodes
+        ]
+        return child_ids
+
+    def _render_component(
+        self, resolved_name: str, props: dict, children_html: str, data: dict
+    ) -> str:
+        """Render a single component given its already-rendered children."""
         if resolved_name == "TextBlock":
             return self._render_text_block(props, data)
         elif resolved_name == "ImageBlock":
@@ -124,9 +178,19 @@ class TemplateCompiler:
 
         # Get table data from bindings
         table_data = self._get_bound_value(data_path, data)
-        if not isinstance(table_data, list):
+        if not isinstance(table_data, (list, ColumnarTable)):
             table_data = []
 
+        elided_rows = 0
+        if self.preview is not None and self.preview.max_table_rows is not None:
+            elided_rows = max(0, len(table_data) - self.preview.max_table_rows)
+            if elided_rows:
+                self.elided.setdefault("tables", {})[self._normalize_path(data_path)] = {
+                    "total": len(table_data),
+                    "shown": self.preview.max_table_rows,
+                }
+                table_data = table_data[: self.preview.max_table_rows]
+
         # Build table HTML
         html = f'<table style="width: 100%; border-collapse: collapse; border: 1px solid {border_color};">'
 
@@ -138,6 +202,9 @@ class TemplateCompiler:
 
         # Body
         html += "<tbody>"
+        if isinstance(table_data, ColumnarTable):
+            html += self._render_columnar_rows(table_data, columns, border_color)
+            table_data = []
         for row in table_data:
             html += "<tr>"
             for col in columns:
@@ -150,10 +217,71 @@ class TemplateCompiler:
                     value = self._format_number(value, fmt.get("decimals", 2))
                 html += f'<td style="padding: 8px 12px; border-bottom: 1px solid {border_color}; text-align: {col.get("align", "left")};">{value}</td>'
             html += "</tr>"
+        if elided_rows:
+            html += (
+                f'<tr><td colspan="{max(1, len(columns))}" '
+                'style="padding: 8px 12px; color: #888; font-style: italic;">'
+                f"&hellip; {elided_rows:,} more rows</td></tr>"
+            )
         html += "</tbody></table>"
 
         return html
 
+    def _render_columnar_rows(
+        self, table: ColumnarTable, columns: list[dict], border_color: str
+    ) -> str:
+        """Render table body rows column by column, formatting each column in one pass."""
+        if not columns:
+            return "<tr></tr>" * len(table)
+
+        cells = []
+        for index, col in enumerate(columns):
+            opening = (
+                f'<td style="padding: 8px 12px; border-bottom: 1px solid {border_color}; '
+                f'text-align: {col.get("align", "left")};">'
+            )
+            closing = "</td>"
+            if index == 0:
+                opening = "<tr>" + opening
+            if index == len(columns) - 1:
+                closing += "</tr>"
+            format_value, format_array = self._column_formatter(col.get("format", {}))
+
+            # Cells are whole <td> elements, so dictionary-encoded columns share them
+            cells.append(
+                table.map_column(
+                    col.get("key", ""),
+                    lambda value: opening + format_value(value) + closing,
+                    format_array
+                    and (
+                        lambda values: [opening + text + closing for text in format_array(values)]
+                    ),
+                    missing=opening + closing,
+                )
+            )
+        return "".join(chain.from_iterable(zip(*cells)))
+
+    def _column_formatter(self, fmt: dict) -> tuple[Callable[[Any], str], Callable | None]:
+        """
+        A table column's cell formatter, and an equivalent one for whole float or
+        integer arrays, if it has one.
+        """
+        if fmt.get("type") == "currency":
+            return self._format_currency, lambda values: [f"${value:,.2f}" for value in values]
+        if fmt.get("type") == "number":
+            decimals = fmt.get("decimals", 2)
+            spec = f",.{decimals}f"
+            try:
+                format(0.0, spec)
+            except (ValueError, TypeError):
+                # `_format_number` falls back to str() for every value
+                return str, None
+            return (
+                lambda value: self._format_number(value, decimals),
+                lambda values: [format(value, spec) for value in values],
+            )
+        return str, None
+
     def _render_row_block(self, props: dict, children: str) -> str:
         """Render a row layout block."""
         gap = props.get("gap", 16)
@@ -194,6 +322,104 @@ class TemplateCompiler:
 
         return f'<hr style="border: none; border-top: {thickness}px {style} {color}; margin: {margin}px 0;" />'
 
+    def sample_data(self, data: Any, exempt: frozenset[str] = frozenset(), path: str = "") -> Any:
+        """
+        Cut lists longer than `preview.max_list_items` short, recording their full length.
+
+        Lists at `exempt` paths (tables) are left whole; tables apply their own row limit.
+        Containers are copied only along paths that change.
+        """
+        limit = self.preview.max_list_items if self.preview else None
+        if limit is None:
+            return data
+
+        if isinstance(data, dict):
+            sampled = {}
+            changed = False
+            for key, value in data.items():
+                child_path = f"{path}.{key}" if path else str(key)
+                sampled[key] = self.sample_data(value, exempt, child_path)
+                changed = changed or sampled[key] is not value
+            return sampled if changed else data
+
+        if isinstance(data, list):
+            items = data
+            if path not in exempt and len(data) > limit:
+                self.elided.setdefault("lists", {})[path] = {"total": len(data), "shown": limit}
+                items = data[:limit]
+            sampled_items = [
+                self.sample_data(item, exempt, f"{path}.{i}") for i, item in enumerate(items)
+            ]
+            if items is data and all(a is b for a, b in zip(sampled_items, data)):
+                return data
+            return sampled_items
+
+        return data
+
+    def _table_paths(self, nodes: dict) -> frozenset[str]:
+        """Data paths bound to table blocks."""
+        return frozenset(
+            self._normalize_path(node.get("props", {}).get("dataPath", ""))
+            for node in nodes.values()
+            if isinstance(node, dict) and self._resolved_name(node) == "TableBlock"
+        )
+
+    @staticmethod
+    def _normalize_path(path: str) -> str:
+        return re.sub(r"^\{\{|\}\}$", "", path).strip()
+
+    def _render_first_pages(self, root: dict, all_nodes: dict, data: dict, pages: int) -> str:
+        """
+        Render the root's children until about `pages` pages are filled.
+
+        Heights are rough estimates; this keeps previews of very long documents cheap
+        rather than paginating exactly.
+        """
+        budget = pages * PAGE_CONTENT_HEIGHT
+        used = 0.0
+        children_html = ""
+        child_ids = self._child_ids(root, all_nodes)
+        for index, child_id in enumerate(child_ids):
+            if used >= budget:
+                self.elided["pages"] = {"shown": pages, "nodes_omitted": len(child_ids) - index}
+                break
+            child = all_nodes[child_id]
+            used += self._estimate_height(child, all_nodes, data)
+            children_html += self._render_node(child, all_nodes, data)
+
+        return self._render_component(
+            self._resolved_name(root), root.get("props", {}), children_html, data
+        )
+
+    def _estimate_height(self, node: dict, all_nodes: dict, data: dict) -> float:
+        """Estimate a node's rendered height in pixels."""
+        name = self._resolved_name(node)
+        props = node.get("props", {})
+        children = [all_nodes[c] for c in self._child_ids(node, all_nodes)]
+
+        if name == "TextBlock":
+            font_size = float(props.get("fontSize", 16))
+            text = re.sub(r"<[^>]+>", "", self._replace_bindings(props.get("text", ""), data))
+            chars_per_line = max(1, PAGE_CONTENT_WIDTH / (font_size * 0.5))
+            lines = max(1, math.ceil(len(text) / chars_per_line))
+            return lines * font_size * float(props.get("lineHeight", 1.5))
+        if name == "TableBlock":
+            rows = self._get_bound_value(props.get("dataPath", ""), data)
+            row_count = len(rows) if isinstance(rows, (list, ColumnarTable)) else 0
+            if self.preview is not None and self.preview.max_table_rows is not None:
+                row_count = min(row_count, self.preview.max_table_rows)
+            return (row_count + 1) * 37
+        if name == "SpacerBlock":
+            return float(props.get("height", 40))
+        if name == "DividerBlock":
+            return 2 * float(props.get("margin", 16)) + float(props.get("thickness", 1))
+        if name == "ImageBlock":
+            match = re.match(r"\s*([\d.]+)px", str(props.get("height", "200px")))
+            return float(match.group(1)) if match else 200.0
+        if name == "RowBlock":
+            return max((self._estimate_height(c, all_nodes, data) for c in children), default=0)
+        return sum(self._estimate_height(c, all_nodes, data) for c in children)
+
     def _compile_simple_template(self, template: dict, data: dict) -> str:
         """Compile a simple key-value template format."""
         content = template.get("content", "")
@@ -202,6 +428,55 @@ class TemplateCompiler:
         return ""
 
     def _replace_bindings(self, text: str, data: dict) -> str:
+        """
+        Render the binding expressions in a text.
+
+        Texts are Jinja templates: `{{ total | currency("€") }}`, `{% if ... %}` and
+        `{% for item in items %}` all work. Each distinct text is compiled once and
+        kept in the shared environment's cache. Texts that only use plain
+        `{{path | filter}}` bindings skip Jinja's per-render setup, and texts Jinja
+        can't handle fall back to that substitution too.
+        """
+        if "{" not in text:
+            return text
+        if has_only_simple_bindings(text):
+            return self._replace_simple_bindings(text, data)
+        try:
+            template = compile_binding(text)
+        except Exception as e:
+            return self._binding_error(text, e)
+        if data is not self._binding_data:
+            # Merge once per data object rather than once per text rendered. Columnar
+            # tables are for the table renderer; texts see the records they hold, so
+            # their output doesn't depend on a table's size.
+            self._binding_data = data
+            self._binding_vars = {**self.env.globals, **to_records(data)}
+        budget = _loop_budget.set([MAX_BINDING_ITERATIONS])
+        try:
+            context = template.new_context(self._binding_vars, shared=True)
+            parts = []
+            size = 0
+            for part in template.root_render_func(context):
+                size += len(part)
+                if size > MAX_BINDING_OUTPUT:
+                    raise SecurityError(f"Output longer than {MAX_BINDING_OUTPUT} characters")
+                parts.append(part)
+            return self.env.concat(parts)
+        except Exception as e:
+            return self._binding_error(text, e)
+        finally:
+            _loop_budget.reset(budget)
+
+    @staticmethod
+    def _binding_error(text: str, error: Exception) -> str:
+        """Log a text that failed to compile or render, and show the error in its place."""
+        logger.warning("Binding text %.200r failed: %s: %s", text, type(error).__name__, error)
+        return (
+            '<span style="color: #c62828; font-family: monospace;">'
+            f"[{escape(type(error).__name__)}: {escape(str(error))}]</span>"
+        )
+
+    def _replace_simple_bindings(self, text: str, data: dict) -> str:
         """Replace {{variable}} bindings with actual data."""
 
         def replace_match(match):
@@ -222,7 +497,8 @@ class TemplateCompiler:
                 elif filter_name == "lowercase":
                     value = str(value).lower()
 
-            return str(value) if value is not None else ""
+            # Bound data is escaped, as in texts Jinja renders
+            return str(escape(value)) if value is not None else ""
 
         return re.sub(r"\{\{(.+?)\}\}", replace_match, text)
 
@@ -304,3 +580,128 @@ class TemplateCompiler:
             return f"{num:,.{decimals}f}"
         except (ValueError, TypeError):
             return str(value)
+
+
+# The bindings `_replace_simple_bindings` understands: a data path and argument-less filters
+_SIMPLE_BINDING = re.compile(r"\{\{\s*[\w.-]+\s*(?:\|\s*(?:currency|uppercase|lowercase)\s*)*\}\}")
+
+
+@lru_cache(maxsize=4096)
+def has_only_simple_bindings(text: str) -> bool:
+    """Whether a text only uses plain `{{path | filter}}` bindings, without Jinja tags."""
+    if "{%" in text or "{#" in text:
+        return False
+    return "{{" not in _SIMPLE_BINDING.sub("", text)
+
+
+class _TextLoader(BaseLoader):
+    """Loads a template whose name is its own source, so compiled texts are cached by content."""
+
+    def get_source(self, environment, template):
+        return template, None, lambda: True
+
+
+# Loop iterations left in the binding text being rendered; None outside a render
+_loop_budget: ContextVar[list[int] | None] = ContextVar("loop_budget", default=None)
+
+
+class _BindingEnvironment(SandboxedEnvironment):
+    """
+    Sandbox in which `a.b` reads the key `b` of a dict before any attribute of it.
+
+    Also bounds what a text can make the renderer do: loops share an iteration
+    budget per render, and `*` / `**` refuse to build huge strings, lists or
+    integers. Output size is limited by `TemplateCompiler._replace_bindings`.
+    """
+
+    intercepted_binops = frozenset(["*", "**"])
+
+    def getattr(self, obj: Any, attribute: str) -> Any:
+        # Data is plain JSON, so `order.items` means the "items" key, not dict.items
+        if isinstance(obj, Mapping) and attribute in obj:
+            return obj[attribute]
+        return super().getattr(obj, attribute)
+
+    def call_binop(self, context, operator: str, left: Any, right: Any) -> Any:
+        if operator == "*":
+            for sequence, count in ((left, right), (right, left)):
+                if (
+                    isinstance(sequence, (str, list, tuple))
+                    and isinstance(count, int)
+                    and len(sequence) * count > MAX_BINDING_SEQUENCE
+                ):
+                    raise SecurityError(f"Result longer than {MAX_BINDING_SEQUENCE}")
+            return left * right
+        if (
+            isinstance(left, int)
+            and isinstance(right, int)
+            and right > 0
+            and max(1, abs(left).bit_length()) * right > MAX_BINDING_POWER_BITS
+        ):
+            raise SecurityError(f"Result larger than {MAX_BINDING_POWER_BITS} bits")
+        return left**right
+
+    def guard_loop(self, iterable: Iterable) -> Iterator:
+        """Iterate a `{% for %}` loop, charging each item to the render's budget."""
+        budget = _loop_budget.get() or [MAX_BINDING_ITERATIONS]
+        for item in iterable:
+            budget[0] -= 1
+            if budget[0] < 0:
+                raise SecurityError(f"More than {MAX_BINDING_ITERATIONS} loop iterations")
+            yield item
+
+    def _generate(self, source: nodes.Template, name, filename, defer_init=False):
+        # Route every loop through `guard_loop`. Done here rather than when parsing,
+        # so `parse` (used to find the data a text reads) sees the tree as written.
+        for loop in source.find_all(nodes.For):
+            loop.iter = nodes.Call(
+                nodes.EnvironmentAttribute("guard_loop"),
+                [loop.iter],
+                [],
+                None,
+                None,
+                lineno=loop.iter.lineno,
+            )
+        return super()._generate(source, name, filename, defer_init)
+
+
+@lru_cache
+def get_binding_environment() -> SandboxedEnvironment:
+    """
+    The process-wide environment binding expressions are compiled in.
+
+    Sandboxed, since template authors are untrusted, and shared so compiled
+    expressions are reused across requests: up to `binding_cache_size` of them are
+    kept in memory, and bytecode is also kept on disk when
+    `binding_bytecode_cache_dir` is set.
+    """
+    settings = get_settings()
+    bytecode_cache = None
+    if settings.binding_bytecode_cache_dir:
+        bytecode_cache = FileSystemBytecodeCache(
+            settings.binding_bytecode_cache_dir,
+            f"pdfgen-bindings-v{BINDING_CODE_VERSION}-%s.cache",
+        )
+
+    env = _BindingEnvironment(
+        loader=_TextLoader(),
+        cache_size=settings.binding_cache_size,
+        auto_reload=False,
+        bytecode_cache=bytecode_cache,
+        undefined=ChainableUndefined,
+        # Bound data is untrusted too; the text around it is the template's own markup
+        autoescape=True,
+        # Missing values render empty, as they always have
+        finalize=lambda value: "" if value is None else value,
+    )
+    env.filters["currency"] = TemplateCompiler._format_currency
+    env.filters["date"] = TemplateCompiler._format_date
+    env.filters["number"] = TemplateCompiler._format_number
+    env.filters["uppercase"] = env.filters["upper"]
+    env.filters["lowercase"] = env.filters["lower"]
+    return env
+
+
+def compile_binding(text: str) -> Template:
+    """Compile a text with binding expressions, or fetch it from the cache."""
+    return get_binding_environment().get_template(text)
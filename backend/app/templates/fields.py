@@ -0,0 +1,122 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any
+
+from jinja2 import TemplateSyntaxError, meta
+from jinja2 import nodes as ast
+
+from app.templates.compiler import (
+    TemplateCompiler,
+    get_binding_environment,
+    has_only_simple_bindings,
+)
+
+_SIMPLE_EXPRESSION = re.compile(r"\{\{(.+?)\}\}")
+
+
+def template_data_paths(
+    template_json: dict[str, Any], craft_nodes: dict[str, Any] | None = None
+) -> set[str]:
+    """
+    The data paths a template reads, found statically.
+
+    Paths are dotted (`customer.name`, `order.items.sku`), with list elements
+    transparent. A path means its whole value is used, so the result is a safe
+    over-approximation: pruning data to these paths never changes the output.
+
+    Args:
+        template_json: The template
+        craft_nodes: Its already parsed Craft.js node map, if at hand
+    """
+    editor_state = template_json.get("editorState")
+    if not editor_state or not isinstance(editor_state, str):
+        content = template_json.get("content", "")
+        return text_data_paths(content) if isinstance(content, str) else set()
+
+    if craft_nodes is None:
+        try:
+            craft_nodes = json.loads(editor_state)
+        except json.JSONDecodeError:
+            return set()
+    if not isinstance(craft_nodes, dict):
+        return set()
+
+    paths: set[str] = set()
+    for node in craft_nodes.values():
+        if not isinstance(node, dict):
+            continue
+        name = TemplateCompiler._resolved_name(node)
+        props = node.get("props", {})
+        if name == "TextBlock" and isinstance(props.get("text"), str):
+            paths |= text_data_paths(props["text"])
+        elif name == "TableBlock":
+            table_path = TemplateCompiler._normalize_path(props.get("dataPath", ""))
+            if not table_path:
+                continue
+            keys = [
+                column["key"]
+                for column in props.get("columns", [])
+                if isinstance(column, dict) and column.get("key")
+            ]
+            # Without keyed columns the rows still render, so keep the list whole
+            paths |= {f"{table_path}.{key}" for key in keys} if keys else {table_path}
+    return paths
+
+
+@lru_cache(maxsize=4096)
+def text_data_paths(text: str) -> frozenset[str]:
+    """The data paths the binding expressions in one text read."""
+    if "{" not in text:
+        return frozenset()
+    # What plain `{{path | filter}}` substitution reads; texts fall back to it when
+    # Jinja can't compile or render them
+    paths = {expression.split("|")[0].strip() for expression in _SIMPLE_EXPRESSION.findall(text)}
+    if has_only_simple_bindings(text):
+        return frozenset(paths)
+
+    try:
+        tree = get_binding_environment().parse(text)
+    except TemplateSyntaxError:
+        return frozenset(paths)
+    _collect_paths(tree, meta.find_undeclared_variables(tree), paths)
+    return frozenset(paths)
+
+
+def _chain(node: ast.Node, data_names: set[str]) -> list[str] | None:
+    """The key path of `a.b["c"]`-style access rooted at a data variable, else None."""
+    parts: list[str] = []
+    while True:
+        if isinstance(node, ast.Getattr):
+            parts.append(node.attr)
+            node = node.node
+        elif (
+            isinstance(node, ast.Getitem)
+            and isinstance(node.arg, ast.Const)
+            and isinstance(node.arg.value, str)
+        ):
+            parts.append(node.arg.value)
+            node = node.node
+        elif isinstance(node, ast.Name) and node.ctx == "load" and node.name in data_names:
+            parts.append(node.name)
+            return parts[::-1]
+        else:
+            return None
+
+
+def _collect_paths(node: ast.Node, data_names: set[str], paths: set[str]) -> None:
+    if isinstance(node, ast.Call):
+        parts = _chain(node.node, data_names)
+        if parts is not None:
+            # `order.items()` calls a method of `order`, which may read all of it
+            paths.add(".".join(parts[:-1] or parts))
+            for child in node.iter_child_nodes(exclude=("node",)):
+                _collect_paths(child, data_names, paths)
+            return
+
+    parts = _chain(node, data_names)
+    if parts is not None:
+        paths.add(".".join(parts))
+        return
+    for child in node.iter_child_nodes():
+        _collect_paths(child, data_names, paths)
@@ -0,0 +1,212 @@
+import copy
+import json
+from typing import Any
+
+
+class JsonPatchError(ValueError):
+    """A patch operation is malformed or doesn't apply to the document."""
+
+
+class JsonPatchTestFailedError(JsonPatchError):
+    """A `test` operation didn't match, i.e. the document changed underneath the client."""
+
+
+def apply_json_patch(document: Any, operations: list[dict[str, Any]]) -> Any:
+    """
+    Apply an RFC 6902 JSON Patch and return the patched copy of `document`.
+
+    Operations are applied in order to a copy; if any fails the input is untouched.
+    """
+    document = copy.deepcopy(document)
+    for operation in operations:
+        document = _apply_operation(document, operation)
+    return document
+
+
+def apply_template_patch(
+    template_json: dict[str, Any],
+    operations: list[dict[str, Any]],
+    nodes: dict[str, dict[str, Any] | None],
+) -> tuple[dict[str, Any], dict[str, Any] | None]:
+    """
+    Apply a JSON Patch and/or Craft.js node changes to a template.
+
+    `editorState` is stored as a serialized string, so patch paths below
+    `/editorState/...` address the parsed node map, e.g.
+    `/editorState/<node id>/props/text`. `nodes` maps node ids to their new
+    serialized node, or None to delete it.
+
+    Returns:
+        The patched template and the changed nodes (node id -> new node, or None
+        if it was removed), or None when the editor state was replaced as a whole.
+    """
+    touches_nodes = bool(nodes) or any(
+        _pointer(op.get(key)).startswith("/editorState/")
+        for op in operations
+        for key in ("path", "from")
+    )
+    replaces_state = any(_pointer(op.get("path")) in ("", "/editorState") for op in operations)
+
+    state = template_json.get("editorState")
+    if touches_nodes and isinstance(state, str):
+        try:
+            parsed = json.loads(state)
+        except json.JSONDecodeError:
+            raise JsonPatchError("Template editorState is not valid JSON")
+        # The freshly parsed state is already private; copy only the rest
+        rest = {key: value for key, value in template_json.items() if key != "editorState"}
+        document = {**copy.deepcopy(rest), "editorState": parsed}
+    else:
+        document = copy.deepcopy(template_json)
+
+    for operation in operations:
+        document = _apply_operation(document, operation)
+    if not isinstance(document, dict):
+        raise JsonPatchError("A template must remain a JSON object")
+
+    changed: set[str] = set()
+    for op in operations:
+        for key in ("path", "from"):
+            tokens = _split(op.get(key))
+            if len(tokens) >= 2 and tokens[0] == "editorState":
+                changed.add(tokens[1])
+
+    if nodes:
+        state = document.get("editorState")
+        if not isinstance(state, dict):
+            raise JsonPatchError("Template has no editor state to apply node changes to")
+        for node_id, node in nodes.items():
+            if node is None:
+                state.pop(node_id, None)
+            else:
+                state[node_id] = copy.deepcopy(node)
+        changed.update(nodes)
+
+    changed_nodes: dict[str, Any] = {}
+    state = document.get("editorState")
+    if isinstance(state, dict):
+        changed_nodes = {node_id: state.get(node_id) for node_id in changed}
+        # Stored serialized, in the compact form Craft.js produces
+        document["editorState"] = json.dumps(state, separators=(",", ":"), ensure_ascii=False)
+    return document, None if replaces_state else changed_nodes
+
+
+def _apply_operation(document: Any, operation: dict[str, Any]) -> Any:
+    if not isinstance(operation, dict):
+        raise JsonPatchError(f"Operation must be an object: {operation!r}")
+    op = operation.get("op")
+    if not isinstance(operation.get("path"), str):
+        raise JsonPatchError(f"Operation is missing 'path': {operation}")
+    path = operation["path"]
+
+    if op == "add":
+        return _add(document, path, copy.deepcopy(_value(operation)))
+    if op == "remove":
+        return _remove(document, path)[0]
+    if op == "replace":
+        document, _ = _remove(document, path)
+        return _add(document, path, copy.deepcopy(_value(operation)))
+    if op == "move":
+        source = _from(operation)
+        if path != source and path.startswith(source + "/"):
+            raise JsonPatchError(f"Cannot move {source} into its own child {path}")
+        document, value = _remove(document, source)
+        return _add(document, path, value)
+    if op == "copy":
+        return _add(document, path, copy.deepcopy(_get(document, _from(operation))))
+    if op == "test":
+        if _get(document, path) != _value(operation):
+            raise JsonPatchTestFailedError(f"Test failed at {path}")
+        return document
+    raise JsonPatchError(f"Unknown operation: {op}")
+
+
+def _value(operation: dict[str, Any]) -> Any:
+    if "value" not in operation:
+        raise JsonPatchError(f"Operation is missing 'value': {operation}")
+    return operation["value"]
+
+
+def _from(operation: dict[str, Any]) -> str:
+    if not isinstance(operation.get("from"), str):
+        raise JsonPatchError(f"Operation is missing 'from': {operation}")
+    return operation["from"]
+
+
+def _pointer(path: Any) -> str:
+    return path if isinstance(path, str) else ""
+
+
+def _split(path: Any) -> list[str]:
+    """Split a JSON Pointer (RFC 6901) into unescaped reference tokens."""
+    path = _pointer(path)
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON Pointer: {path!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _parent(document: Any, path: str) -> tuple[Any, str]:
+    tokens = _split(path)
+    if not tokens:
+        raise JsonPatchError("Operation targets the whole document")
+    container = document
+    for token in tokens[:-1]:
+        container = _child(container, token)
+    return container, tokens[-1]
+
+
+def _child(container: Any, token: str) -> Any:
+    if isinstance(container, dict):
+        if token not in container:
+            raise JsonPatchError(f"Path not found: {token!r}")
+        return container[token]
+    if isinstance(container, list):
+        return container[_index(container, token)]
+    raise JsonPatchError(f"Cannot descend into {type(container).__name__} at {token!r}")
+
+
+def _get(document: Any, path: str) -> Any:
+    value = document
+    for token in _split(path):
+        value = _child(value, token)
+    return value
+
+
+def _add(document: Any, path: str, value: Any) -> Any:
+    if path == "":
+        return value
+    container, token = _parent(document, path)
+    if isinstance(container, dict):
+        container[token] = value
+    elif isinstance(container, list):
+        container.insert(_index(container, token, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to {type(container).__name__} at {path}")
+    return document
+
+
+def _remove(document: Any, path: str) -> tuple[Any, Any]:
+    """Remove the value at `path`, returning the document and the removed value."""
+    if path == "":
+        return None, document
+    container, token = _parent(document, path)
+    if isinstance(container, dict):
+        if token not in container:
+            raise JsonPatchError(f"Path not found: {path}")
+        return document, container.pop(token)
+    if isinstance(container, list):
+        return document, container.pop(_index(container, token))
+    raise JsonPatchError(f"Cannot remove from {type(container).__name__} at {path}")
@@ -0,0 +1,155 @@
+import hashlib
+import html
+import json
+from typing import Any
+
+from app.metrics import record_cache
+from app.templates.compiler import TemplateCompiler
+
+
+class PreviewSession:
+    """
+    Live preview state for one editor connection.
+
+    Keeps the parsed Craft.js node tree and data in memory and memoizes each
+    node's HTML by a key built from its type, props and its children's keys, so
+    after a node-level change only that node and its ancestors are recomputed
+    and unchanged subtrees are reused as-is.
+
+    Rendered nodes are wrapped in `<div data-node-id="..." style="display: contents">`
+    so the editor can swap individual subtrees without affecting layout.
+
+    When the compiler has preview limits, long lists and tables are sampled; the
+    page limit does not apply since the whole tree stays editable.
+    """
+
+    def __init__(
+        self,
+        template_json: dict[str, Any],
+        data: dict[str, Any],
+        compiler: TemplateCompiler | None = None,
+    ):
+        self.compiler = compiler or TemplateCompiler()
+        self.page_settings = template_json.get("pageSettings", {})
+        editor_state = template_json.get("editorState")
+        self.nodes: dict[str, dict] = json.loads(editor_state) if editor_state else {}
+        self.data = self._sample(data)
+
+        self._props_keys: dict[str, str] = {}
+        self._memo: dict[str, tuple[str, str]] = {}  # node id -> (key, html)
+        self._rendered: set[str] = set()  # Nodes reached from ROOT in the last pass
+        self._ancestors: set[str] = set()  # Nodes being rendered above the current one
+
+    def render_document(self) -> str:
+        """Render the complete HTML document."""
+        self._rendered = set()
+        self._ancestors = set()
+        body = self._render("ROOT")[1] if "ROOT" in self.nodes else ""
+        return self.compiler._wrap_html(body, self.page_settings)
+
+    def set_data(self, data: dict[str, Any]) -> str:
+        """Replace the bound data. Bindings can appear anywhere, so everything re-renders."""
+        self.data = self._sample(data)
+        self._memo.clear()
+        return self.render_document()
+
+    def apply_patch(self, changes: dict[str, dict | None]) -> list[dict[str, str]]:
+        """
+        Apply node-level changes and return HTML patches for the editor.
+
+        Args:
+            changes: Node id -> new serialized node, or None to delete the node.
+                A parent whose `nodes` list changed must be included as well.
+
+        Returns:
+            `{"id": node_id, "html": html}` for each outermost changed node that
+            is still in the tree; replacing those elements updates the preview.
+        """
+        for node_id, node in changes.items():
+            self._props_keys.pop(node_id, None)
+            self._memo.pop(node_id, None)
+            if node is None:
+                self.nodes.pop(node_id, None)
+            else:
+                self.nodes[node_id] = node
+
+        if "ROOT" not in self.nodes:
+            return []
+        self._rendered = set()
+        self._ancestors = set()
+        self._render("ROOT")
+
+        patches = []
+        for node_id in changes:
+            if node_id in self._rendered:
+                if not self._has_changed_ancestor(node_id, changes):
+                    patches.append({"id": node_id, "html": self._memo[node_id][1]})
+        return patches
+
+    def _sample(self, data: dict[str, Any]) -> dict[str, Any]:
+        if self.compiler.preview is None:
+            return data
+        self.compiler.elided = {}
+        return self.compiler.sample_data(data, self.compiler._table_paths(self.nodes))
+
+    def _render(self, node_id: str) -> tuple[str, str]:
+        """
+        Render a node, returning its memo key and annotated HTML.
+
+        Raises:
+            ValueError: If the node is among its own descendants
+        """
+        if node_id in self._ancestors:
+            raise ValueError(f"Node {node_id!r} contains itself")
+        node = self.nodes[node_id]
+        self._rendered.add(node_id)
+        child_ids = self.compiler._child_ids(node, self.nodes)
+        self._ancestors.add(node_id)
+        try:
+            children = [self._render(child_id) for child_id in child_ids]
+        finally:
+            self._ancestors.discard(node_id)
+        key = self._node_key(node_id, node, [child_key for child_key, _ in children])
+
+        cached = self._memo.get(node_id)
+        record_cache("preview_node", cached is not None and cached[0] == key)
+        if cached is not None and cached[0] == key:
+            return cached
+
+        content = self.compiler._render_component(
+            self.compiler._resolved_name(node),
+            node.get("props", {}),
+            "".join(child_html for _, child_html in children),
+            self.data,
+        )
+        annotated = (
+            f'<div data-node-id="{html.escape(node_id, quote=True)}" '
+            f'style="display: contents">{content}</div>'
+        )
+        self._memo[node_id] = (key, annotated)
+        return key, annotated
+
+    def _node_key(self, node_id: str, node: dict, child_keys: list[str]) -> str:
+        props_key = self._props_keys.get(node_id)
+        if props_key is None:
+            encoded = json.dumps([node.get("type"), node.get("props", {})], sort_keys=True)
+            props_key = hashlib.blake2b(encoded.encode(), digest_size=12).hexdigest()
+            self._props_keys[node_id] = props_key
+        if not child_keys:
+            return props_key
+        combined = "|".join([props_key, *child_keys])
+        return hashlib.blake2b(combined.encode(), digest_size=12).hexdigest()
+
+    def _parent_of(self, node_id: str) -> str | None:
+        parent = self.nodes[node_id].get("parent")
+        return parent if parent in self.nodes else None
+
+    def _has_changed_ancestor(self, node_id: str, changes: dict[str, Any]) -> bool:
+        parent = self._parent_of(node_id)
+        seen = set()
+        while parent is not None and parent not in seen:
+            if parent in changes:
+                return True
+            seen.add(parent)
+            parent = self._parent_of(parent)
+        return False
@@ -0,0 +1 @@
+"""Reproducible benchmarks for the template compile and PDF render pipeline."""
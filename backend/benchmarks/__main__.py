@@ -0,0 +1,213 @@
+"""
+Benchmark runner.
+
+Usage:
+    python -m benchmarks run --out results.json
+    python -m benchmarks run --suite compile --scenario table_10k
+    python -m benchmarks run --suite table --scenario table_1k table_10k
+    python -m benchmarks compare before.json after.json
+    python -m benchmarks startup --runs 5
+    python -m benchmarks upstream --port 9100 --latency-ms 50
+    python -m benchmarks load --upstream-url http://localhost:9100 --mix generate=6,preview=3
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any
+
+from benchmarks import templates
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _run_render_suites(args: argparse.Namespace, results: dict[str, Any]) -> None:
+    from app.pdf.engine import PDFEngine
+    from benchmarks.pipeline import bench_end_to_end, bench_render
+
+    engine = PDFEngine(max_concurrent_pages=max(args.concurrency))
+    await engine.initialize()
+    try:
+        for scenario in args.scenario:
+            if "render" in args.suite:
+                print(f"render {scenario}...", file=sys.stderr)
+                results["render"][scenario] = await bench_render(
+                    engine, scenario, args.concurrency, args.requests
+                )
+            if "e2e" in args.suite:
+                print(f"e2e {scenario}...", file=sys.stderr)
+                results["e2e"][scenario] = await bench_end_to_end(
+                    engine, scenario, args.concurrency, args.requests
+                )
+    finally:
+        await engine.shutdown()
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    from benchmarks.pipeline import bench_compile, bench_table
+
+    results: dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "seed": templates.SEED,
+        },
+        "compile": {},
+        "table": {},
+        "render": {},
+        "e2e": {},
+    }
+
+    if "compile" in args.suite:
+        for scenario in args.scenario:
+            print(f"compile {scenario}...", file=sys.stderr)
+            results["compile"][scenario] = bench_compile(scenario, args.repeat)
+
+    if "table" in args.suite:
+        for scenario in args.scenario:
+            print(f"table {scenario}...", file=sys.stderr)
+            table = bench_table(scenario, args.repeat)
+            if table is not None:
+                results["table"][scenario] = table
+
+    if "render" in args.suite or "e2e" in args.suite:
+        asyncio.run(_run_render_suites(args, results))
+
+    return results
+
+
+def _flatten(prefix: str, value: Any, out: dict[str, float]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = float(value)
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print the relative change of every numeric metric between two result files."""
+    with open(before_path) as f:
+        before_raw = json.load(f)
+    with open(after_path) as f:
+        after_raw = json.load(f)
+
+    before: dict[str, float] = {}
+    after: dict[str, float] = {}
+    for section in ("compile", "table", "render", "e2e", "startup"):
+        _flatten(section, before_raw.get(section, {}), before)
+        _flatten(section, after_raw.get(section, {}), after)
+
+    print(f"{'metric':<60} {'before':>12} {'after':>12} {'change':>9}")
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{key:<60} {old:>12.2f} {new:>12.2f} {change:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmark suites")
+    run_parser.add_argument(
+        "--suite",
+        nargs="+",
+        choices=["compile", "table", "render", "e2e"],
+        default=["compile", "table", "render", "e2e"],
+    )
+    run_parser.add_argument(
+        "--scenario",
+        nargs="+",
+        choices=list(templates.SCENARIOS),
+        default=list(templates.SCENARIOS),
+    )
+    run_parser.add_argument(
+        "--repeat", type=int, default=20, help="Compile runs per scenario and suite"
+    )
+    run_parser.add_argument(
+        "--requests", type=int, default=20, help="Renders per concurrency level"
+    )
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    run_parser.add_argument("--out", help="Write JSON results to this file instead of stdout")
+
+    compare_parser = commands.add_parser("compare", help="Diff two result files")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+
+    upstream_parser = commands.add_parser("upstream", help="Serve the mock upstream API")
+    upstream_parser.add_argument("--host", default="127.0.0.1")
+    upstream_parser.add_argument("--port", type=int, default=9100)
+    upstream_parser.add_argument("--latency-ms", type=float, default=20.0)
+    upstream_parser.add_argument("--jitter-ms", type=float, default=10.0)
+    upstream_parser.add_argument("--error-rate", type=float, default=0.0)
+
+    load_parser = commands.add_parser("load", help="Load test a running API")
+    load_parser.add_argument("--base-url", default="http://localhost:8000")
+    load_parser.add_argument("--upstream-url", default="http://localhost:9100")
+    load_parser.add_argument(
+        "--mix",
+        default="generate=6,generate_upstream=2,preview=3,fetch=1",
+        help="Weighted request mix, e.g. generate=6,preview=3",
+    )
+    load_parser.add_argument("--concurrency", type=int, default=16)
+    load_parser.add_argument("--duration", type=float, default=60.0, help="Seconds")
+    load_parser.add_argument("--rows", type=int, default=50, help="Table rows per document")
+    load_parser.add_argument("--out", help="Write JSON results to this file instead of stdout")
+
+    startup_parser = commands.add_parser("startup", help="Measure import and startup time")
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.add_argument("--out", help="Write JSON results to this file instead of stdout")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        compare(args.before, args.after)
+        return
+
+    if args.command == "upstream":
+        from benchmarks.upstreams import serve
+
+        serve(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+        return
+
+    if args.command == "startup":
+        from benchmarks.startup import bench_startup
+
+        results = {"startup": bench_startup(args.runs)}
+    elif args.command == "load":
+        from benchmarks.loadgen import parse_mix, run_load
+
+        results = asyncio.run(
+            run_load(
+                args.base_url,
+                args.upstream_url,
+                parse_mix(args.mix),
+                args.concurrency,
+                args.duration,
+                rows=args.rows,
+            )
+        )
+    else:
+        results = run(args)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
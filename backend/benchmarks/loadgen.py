@@ -0,0 +1,153 @@
+"""
+End-to-end load generator for the running API.
+
+Start the API against local stand-ins, then point the generator at it:
+
+    DB_BACKEND=memory STORAGE_BACKEND=local uvicorn app.main:app --port 8000
+    python -m benchmarks upstream --port 9100
+    python -m benchmarks load --upstream-url http://localhost:9100 --mix generate=6,preview=3
+"""
+
+import asyncio
+import math
+import random
+import time
+from typing import Any
+
+import httpx
+
+from benchmarks import templates
+
+# Request kinds the mix can reference
+KINDS = ("generate", "generate_upstream", "preview", "fetch")
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """Parse a request mix such as "generate=6,preview=3,fetch=1"."""
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise ValueError(f"Unknown request kind: {kind} (expected one of {', '.join(KINDS)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+async def _seed(client: httpx.AsyncClient, upstream_url: str, rows: int) -> dict[str, str]:
+    """Create the template and data source every request kind refers to."""
+    template_json, _ = templates.large_table(rows=rows)
+    response = await client.post(
+        "/api/v1/templates/", json={"name": "loadtest", "template_json": template_json}
+    )
+    response.raise_for_status()
+    template_id = response.json()["id"]
+
+    response = await client.post(
+        "/api/v1/datasources/",
+        json={
+            "name": "loadtest-upstream",
+            "type": "rest_api",
+            "config": {"base_url": upstream_url},
+            "field_mappings": [],
+        },
+    )
+    response.raise_for_status()
+    return {"template_id": template_id, "datasource_id": response.json()["id"]}
+
+
+def _build_request(kind: str, ids: dict[str, str], rows: int) -> tuple[str, dict[str, Any]]:
+    _, data = templates.large_table(rows=rows)
+    upstream_query = {
+        "endpoint": "/records",
+        "params": {"count": rows},
+        "response_path": "data",
+    }
+    if kind == "generate":
+        return "/api/v1/generate/", {"template_id": ids["template_id"], "data": data}
+    if kind == "generate_upstream":
+        # The upstream's `{"items": [...]}` goes under `order`, where the template binds it
+        return "/api/v1/generate/", {
+            "template_id": ids["template_id"],
+            "datasources": [
+                {"datasource_id": ids["datasource_id"], "query": upstream_query, "key": "order"}
+            ],
+        }
+    if kind == "preview":
+        return "/api/v1/generate/preview", {"template_id": ids["template_id"], "data": data}
+    return f"/api/v1/datasources/{ids['datasource_id']}/fetch", upstream_query
+
+
+async def run_load(
+    base_url: str,
+    upstream_url: str,
+    mix: dict[str, float],
+    concurrency: int,
+    duration: float,
+    rows: int = 50,
+    timeout: float = 120.0,
+) -> dict[str, Any]:
+    """Drive a closed-loop load of `concurrency` workers for `duration` seconds."""
+    rng = random.Random(templates.SEED)
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    latencies: dict[str, list[float]] = {k: [] for k in kinds}
+    errors: dict[str, int] = {k: 0 for k in kinds}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        ids = await _seed(client, upstream_url, rows)
+        requests = {kind: _build_request(kind, ids, rows) for kind in kinds}
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                kind = rng.choices(kinds, weights)[0]
+                path, body = requests[kind]
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies[kind].append(time.perf_counter() - start)
+                if not ok:
+                    errors[kind] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    report: dict[str, Any] = {
+        "config": {
+            "base_url": base_url,
+            "mix": mix,
+            "concurrency": concurrency,
+            "duration_s": duration,
+            "rows": rows,
+        },
+        "elapsed_s": elapsed,
+        "requests": sum(len(v) for v in latencies.values()),
+        "errors": sum(errors.values()),
+        "kinds": {},
+    }
+    report["throughput_rps"] = report["requests"] / elapsed
+
+    for kind in kinds:
+        ordered = sorted(latencies[kind])
+        report["kinds"][kind] = {
+            "requests": len(ordered),
+            "errors": errors[kind],
+            "throughput_rps": len(ordered) / elapsed,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+        }
+    return report
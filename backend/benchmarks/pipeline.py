@@ -0,0 +1,172 @@
+"""Compile and render benchmarks for the generation pipeline."""
+
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+from unittest import mock
+
+from app.api.v1 import generation
+from app.connectors.columnar import columnarize
+from app.db.memory import MemoryClient
+from app.dependencies import set_audit_writer, set_pdf_engine
+from app.pdf.engine import PDFEngine
+from app.schemas import GenerateRequest, PDFOptions
+from app.services.audit import AuditWriter
+from app.storage.local import LocalStorage
+from app.templates.compiler import TemplateCompiler
+from benchmarks import templates
+from benchmarks.stubs import StubConnector  # noqa: F401 - registers "benchmark_stub"
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Summary statistics in milliseconds for a list of durations in seconds."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p95_ms": ordered[p95_index] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def bench_compile(scenario: str, repeat: int) -> dict[str, Any]:
+    """Time `TemplateCompiler.compile` for one scenario."""
+    template_json, data = templates.build(scenario)
+    compiler = TemplateCompiler()
+
+    # Warm-up run, also used to measure output size
+    html = compiler.compile(template_json, data)
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compiler.compile(template_json, data)
+        samples.append(time.perf_counter() - start)
+
+    return {"html_bytes": len(html.encode()), "runs": repeat, **summarize(samples)}
+
+
+def bench_table(scenario: str, repeat: int) -> dict[str, Any] | None:
+    """
+    Compile time and data memory with a scenario's tables held as lists of records
+    and as `ColumnarTable`s. None for scenarios without tables.
+    """
+    template_json, _ = templates.build(scenario)
+    compiler = TemplateCompiler()
+    paths = compiler._table_paths(json.loads(template_json["editorState"]))
+    if not paths:
+        return None
+
+    # Memory held by each form of the data once the other is gone
+    tracemalloc.start()
+    _, data = templates.build(scenario)
+    records_bytes = tracemalloc.get_traced_memory()[0]
+    columnar = columnarize(data, paths)
+    del data
+    columnar_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    _, data = templates.build(scenario)
+
+    html = compiler.compile(template_json, data)
+    if compiler.compile(template_json, columnar) != html:
+        raise AssertionError(f"Columnar output differs from records output for {scenario}")
+
+    timings: dict[str, list[float]] = {"records": [], "columnar": [], "columnarize": []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compiler.compile(template_json, data)
+        timings["records"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        compiler.compile(template_json, columnar)
+        timings["columnar"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        columnarize(data, paths)
+        timings["columnarize"].append(time.perf_counter() - start)
+
+    return {
+        "runs": repeat,
+        "records_bytes": records_bytes,
+        "columnar_bytes": columnar_bytes,
+        **{name: summarize(samples) for name, samples in timings.items()},
+    }
+
+
+async def _run_concurrently(job, total: int, concurrency: int) -> tuple[list[float], float]:
+    """Run `job` `total` times with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def timed():
+        async with semaphore:
+            start = time.perf_counter()
+            await job()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(total)))
+    return latencies, time.perf_counter() - start
+
+
+async def bench_render(
+    engine: PDFEngine, scenario: str, concurrency_levels: list[int], requests: int
+) -> dict[str, Any]:
+    """Render latency and throughput of `PDFEngine.generate_pdf` per concurrency level."""
+    template_json, data = templates.build(scenario)
+    html = TemplateCompiler().compile(template_json, data)
+    options = PDFOptions()
+    pdf_size = len(await engine.generate_pdf(html, options))
+
+    levels = {}
+    for concurrency in concurrency_levels:
+        latencies, wall = await _run_concurrently(
+            lambda: engine.generate_pdf(html, options), requests, concurrency
+        )
+        levels[str(concurrency)] = {"pdfs_per_sec": requests / wall, **summarize(latencies)}
+
+    return {"pdf_bytes": pdf_size, "requests": requests, "concurrency": levels}
+
+
+async def bench_end_to_end(
+    engine: PDFEngine, scenario: str, concurrency_levels: list[int], requests: int
+) -> dict[str, Any]:
+    """Latency of the full `generate_pdf` endpoint against local stand-ins for all I/O."""
+    template_json, data = templates.build(scenario)
+    request = GenerateRequest(template_id="bench-template", datasource_id="bench-source")
+
+    set_pdf_engine(engine)
+    levels = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        client = MemoryClient()
+        storage = LocalStorage(data_dir)
+        audit_writer = AuditWriter(client, storage)
+        audit_writer.start()
+        set_audit_writer(audit_writer)
+        client.table("templates").insert(
+            {"id": "bench-template", "name": scenario, "template_json": template_json}
+        ).execute()
+        client.table("data_sources").insert(
+            {"id": "bench-source", "type": "benchmark_stub", "config": {"data": data}}
+        ).execute()
+
+        with (
+            mock.patch.object(generation, "get_db_client", return_value=client),
+            mock.patch.object(generation, "get_storage_backend", return_value=storage),
+        ):
+            for concurrency in concurrency_levels:
+                latencies, wall = await _run_concurrently(
+                    lambda: generation.generate_pdf(request), requests, concurrency
+                )
+                levels[str(concurrency)] = {
+                    "requests_per_sec": requests / wall,
+                    **summarize(latencies),
+                }
+
+        await audit_writer.close()
+
+    return {"requests": requests, "concurrency": levels}
@@ -0,0 +1,78 @@
+"""
+Import-time and startup-time benchmarks.
+
+Each measurement runs in a fresh interpreter so module caches from earlier
+runs don't hide import costs.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Measures `import app.main`, then how long the lifespan takes to hand control
+# to the server and how long until the PDF engine reports ready.
+_STARTUP_SCRIPT = """
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+heavy = {name: name in sys.modules for name in ("hubspot", "playwright")}
+
+async def main():
+    from app.dependencies import get_pdf_engine
+
+    app_instance = app.main.app
+    lifespan_start = time.perf_counter()
+    async with app_instance.router.lifespan_context(app_instance):
+        started = time.perf_counter()
+        engine = get_pdf_engine()
+        await engine.wait_until_ready()
+        ready = time.perf_counter()
+    return started - lifespan_start, ready - lifespan_start
+
+startup, ready = asyncio.run(main())
+print(json.dumps({
+    "import_s": imported - start,
+    "startup_s": startup,
+    "ready_s": ready,
+    "heavy_modules_loaded": heavy,
+}))
+"""
+
+
+def _measure_once(env: dict[str, str]) -> dict[str, Any]:
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(runs: int = 5) -> dict[str, Any]:
+    """Median import, startup and time-to-ready over `runs` fresh processes."""
+    env = {
+        **os.environ,
+        "DB_BACKEND": "memory",
+        "STORAGE_BACKEND": "local",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    samples = [_measure_once(env) for _ in range(runs)]
+
+    return {
+        "runs": runs,
+        "import_ms": statistics.median(s["import_s"] for s in samples) * 1000,
+        "startup_ms": statistics.median(s["startup_s"] for s in samples) * 1000,
+        "ready_ms": statistics.median(s["ready_s"] for s in samples) * 1000,
+        "heavy_modules_loaded": samples[-1]["heavy_modules_loaded"],
+    }
@@ -0,0 +1,24 @@
+"""In-process stand-in connector used by benchmarks."""
+
+from typing import Any
+
+from app.connectors.base import BaseConnector
+from app.connectors.registry import ConnectorRegistry
+from app.schemas import DataResult
+
+
+@ConnectorRegistry.register("benchmark_stub")
+class StubConnector(BaseConnector):
+    """Connector returning the data stored in its config, without any I/O."""
+
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+    async def validate_credentials(self) -> bool:
+        return True
+
+    async def fetch_data(self, query: dict[str, Any]) -> DataResult:
+        return DataResult(success=True, data=self.settings["data"], source_type="benchmark_stub")
@@ -0,0 +1,106 @@
+"""Synthetic Craft.js templates and matching data for benchmarks."""
+
+import json
+import random
+from typing import Any
+
+# Fixed seed so every run (and every commit) benchmarks identical inputs
+SEED = 1234
+
+WORDS = (
+    "invoice total amount customer order quantity price discount shipping tax "
+    "account balance payment due date reference summary description item"
+).split()
+
+
+def _node(resolved_name: str, props: dict, parent: str | None, nodes: list[str] | None = None):
+    return {
+        "type": {"resolvedName": resolved_name},
+        "isCanvas": nodes is not None,
+        "props": props,
+        "parent": parent,
+        "nodes": nodes or [],
+        "linkedNodes": {},
+    }
+
+
+def _wrap(nodes: dict[str, Any]) -> dict[str, Any]:
+    return {"editorState": json.dumps(nodes), "pageSettings": {}}
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def text_heavy(blocks: int = 500) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Many text blocks with a mix of literal text and data bindings."""
+    rng = random.Random(SEED)
+    nodes: dict[str, Any] = {}
+    children = []
+    for i in range(blocks):
+        node_id = f"text-{i}"
+        text = _sentence(rng, 40)
+        if i % 5 == 0:
+            text += " Customer: {{customer.name}}, due {{invoice.total | currency}}."
+        nodes[node_id] = _node("TextBlock", {"text": text, "fontSize": 12}, "ROOT")
+        children.append(node_id)
+    nodes["ROOT"] = _node("Container", {}, None, children)
+
+    data = {"customer": {"name": "Acme Corp"}, "invoice": {"total": 12345.678}}
+    return _wrap(nodes), data
+
+
+def deep_nesting(depth: int = 50) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Alternating row/column layouts nested `depth` levels deep, one text leaf per level."""
+    nodes: dict[str, Any] = {}
+    parent = "ROOT"
+    for level in range(depth):
+        layout_id = f"layout-{level}"
+        text_id = f"text-{level}"
+        kind = "RowBlock" if level % 2 == 0 else "ColumnBlock"
+        children = [text_id] if level == depth - 1 else [text_id, f"layout-{level + 1}"]
+        nodes[layout_id] = _node(kind, {"gap": 8}, parent, children)
+        text = f"Level {level}: {{{{customer.name}}}}"
+        nodes[text_id] = _node("TextBlock", {"text": text}, layout_id)
+        parent = layout_id
+
+    nodes["ROOT"] = _node("Container", {}, None, ["layout-0"])
+    return _wrap(nodes), {"customer": {"name": "Acme Corp"}}
+
+
+def large_table(rows: int = 10_000, columns: int = 6) -> tuple[dict[str, Any], dict[str, Any]]:
+    """A single table bound to `rows` records with currency/number formatting."""
+    rng = random.Random(SEED)
+    cols = [{"key": "sku", "header": "SKU"}, {"key": "name", "header": "Name"}]
+    for i in range(columns - 2):
+        fmt = {"type": "currency"} if i % 2 == 0 else {"type": "number", "decimals": 1}
+        cols.append({"key": f"v{i}", "header": f"Value {i}", "align": "right", "format": fmt})
+
+    nodes = {
+        "ROOT": _node("Container", {}, None, ["title", "table"]),
+        "title": _node("TextBlock", {"text": "Order {{order.id}}", "fontSize": 20}, "ROOT"),
+        "table": _node("TableBlock", {"columns": cols, "dataPath": "{{order.items}}"}, "ROOT"),
+    }
+    items = []
+    for r in range(rows):
+        item = {"sku": f"SKU-{r:06d}", "name": rng.choice(WORDS).title()}
+        for i in range(columns - 2):
+            item[f"v{i}"] = round(rng.uniform(0, 10_000), 2)
+        items.append(item)
+
+    return _wrap(nodes), {"order": {"id": "ORD-1", "items": items}}
+
+
+# name -> (factory, kwargs); sizes chosen to stay well under a minute per suite
+SCENARIOS = {
+    "text_heavy": (text_heavy, {"blocks": 500}),
+    "deep_nesting": (deep_nesting, {"depth": 60}),
+    "table_1k": (large_table, {"rows": 1_000}),
+    "table_10k": (large_table, {"rows": 10_000}),
+}
+
+
+def build(name: str) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Build the template and data for a named scenario."""
+    factory, kwargs = SCENARIOS[name]
+    return factory(**kwargs)
@@ -0,0 +1,65 @@
+"""
+Mock upstream server standing in for customer REST APIs during load tests.
+
+Serves deterministic records with configurable latency and failure injection so
+connector fetches behave like a real upstream without leaving the machine.
+"""
+
+import asyncio
+import random
+from typing import Any
+
+from fastapi import FastAPI, HTTPException
+
+from benchmarks.templates import SEED, WORDS
+
+
+def _record(index: int) -> dict[str, Any]:
+    rng = random.Random(SEED + index)
+    return {
+        "id": f"rec-{index}",
+        "sku": f"SKU-{index:06d}",
+        "name": rng.choice(WORDS).title(),
+        "quantity": rng.randint(1, 50),
+        "price": round(rng.uniform(1, 500), 2),
+    }
+
+
+def create_upstream_app(
+    latency_ms: float = 20.0, jitter_ms: float = 10.0, error_rate: float = 0.0
+) -> FastAPI:
+    """Build the mock upstream application."""
+    app = FastAPI(title="Mock upstream")
+    rng = random.Random(SEED)
+
+    async def simulate() -> None:
+        await asyncio.sleep(max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000)
+        if rng.random() < error_rate:
+            raise HTTPException(status_code=503, detail="Injected upstream failure")
+
+    @app.get("/")
+    async def root():
+        return {"status": "ok"}
+
+    @app.get("/records")
+    async def list_records(count: int = 100):
+        await simulate()
+        return {"data": {"items": [_record(i) for i in range(count)]}}
+
+    @app.get("/records/{index}")
+    async def get_record(index: int):
+        await simulate()
+        return {"data": _record(index)}
+
+    return app
+
+
+def serve(host: str, port: int, latency_ms: float, jitter_ms: float, error_rate: float) -> None:
+    import uvicorn
+
+    uvicorn.run(
+        create_upstream_app(latency_ms, jitter_ms, error_rate),
+        host=host,
+        port=port,
+        log_level="warning",
+    )
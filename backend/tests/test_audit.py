@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+from app.connectors.columnar import columnarize
+from app.db.memory import MemoryClient, MemoryQuery
+from app.services.audit import AuditWriter
+from app.storage.local import LocalStorage
+
+RECORDS = [{"sku": f"SKU-{i}", "status": "open", "qty": i} for i in range(50)]
+
+
+def stored_rows(client: MemoryClient) -> dict[str, dict]:
+    return {row["id"]: row for row in client.tables.get("generated_pdfs", [])}
+
+
+async def test_columnar_input_is_written_as_records(tmp_path):
+    client = MemoryClient()
+    writer = AuditWriter(client, LocalStorage(tmp_path), input_ref_threshold=1024)
+    small = columnarize({"items": RECORDS[:3]}, ["items"])
+    large = columnarize({"items": RECORDS}, ["items"])
+
+    await writer.record({"id": "small", "input_data": small})
+    await writer.record({"id": "large", "input_data": large})
+    await writer.close()
+
+    rows = stored_rows(client)
+    assert rows["small"]["input_data"] == {"items": RECORDS[:3]}
+    ref = rows["large"]["input_data"]
+    assert ref["$ref"].startswith("sha256:")
+    assert json.loads((tmp_path / ref["storage_path"]).read_bytes()) == {"items": RECORDS}
+
+
+def count_batches(monkeypatch) -> list[int]:
+    """Record the size of every insert into the memory database."""
+    sizes: list[int] = []
+    insert = MemoryQuery.insert
+
+    def recording_insert(self, payload):
+        sizes.append(len(payload) if isinstance(payload, list) else 1)
+        return insert(self, payload)
+
+    monkeypatch.setattr(MemoryQuery, "insert", recording_insert)
+    return sizes
+
+
+async def test_full_batches_are_written_without_waiting(tmp_path, monkeypatch):
+    batches = count_batches(monkeypatch)
+    client = MemoryClient()
+    writer = AuditWriter(client, LocalStorage(tmp_path), batch_size=10, flush_interval=60)
+    writer.start()
+
+    for i in range(25):
+        await writer.record({"id": str(i)})
+    await asyncio.sleep(0.05)
+
+    assert batches == [10, 10]
+    assert len(stored_rows(client)) == 20
+    await writer.close()
+
+
+async def test_partial_batch_is_written_after_the_flush_interval(tmp_path):
+    client = MemoryClient()
+    writer = AuditWriter(client, LocalStorage(tmp_path), flush_interval=0.05)
+    writer.start()
+
+    for i in range(3):
+        await writer.record({"id": str(i)})
+    await asyncio.sleep(0.2)
+
+    assert len(stored_rows(client)) == 3
+    await writer.close()
+
+
+async def test_close_writes_the_batch_being_collected(tmp_path, monkeypatch):
+    batches = count_batches(monkeypatch)
+    client = MemoryClient()
+    writer = AuditWriter(client, LocalStorage(tmp_path), batch_size=10, flush_interval=60)
+    writer.start()
+    for i in range(25):
+        await writer.record({"id": str(i)})
+    await asyncio.sleep(0.05)  # The last 5 wait for more records or the interval
+
+    await asyncio.wait_for(writer.close(), timeout=1)
+
+    assert batches == [10, 10, 5]
+    assert sorted(stored_rows(client), key=int) == [str(i) for i in range(25)]
+
+
+async def test_close_writes_records_queued_without_a_running_loop(tmp_path):
+    client = MemoryClient()
+    writer = AuditWriter(client, LocalStorage(tmp_path), batch_size=2)
+    for i in range(5):
+        await writer.record({"id": str(i)})
+
+    await writer.close()
+
+    assert len(stored_rows(client)) == 5
+
+
+async def test_stored_input_hashes_are_bounded(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path)
+    uploads: list[str] = []
+    upload = storage.upload
+
+    async def recording_upload(path, source, content_type="application/octet-stream"):
+        uploads.append(json.loads(source)["name"])
+        await upload(path, source, content_type)
+
+    monkeypatch.setattr(storage, "upload", recording_upload)
+    writer = AuditWriter(MemoryClient(), storage, input_ref_threshold=1, stored_hash_limit=2)
+
+    for i, name in enumerate("ABACBC"):
+        await writer.record({"id": str(i), "input_data": {"name": name}})
+    await writer.close()
+
+    # "A" is used again before "C" arrives, so "B" is the one forgotten
+    assert uploads == ["A", "B", "C", "B"]
+    assert len(writer._stored_hashes) == 2
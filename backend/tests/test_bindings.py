@@ -0,0 +1,98 @@
+import pytest
+
+from app.templates.compiler import (
+    MAX_BINDING_ITERATIONS,
+    MAX_BINDING_OUTPUT,
+    TemplateCompiler,
+    has_only_simple_bindings,
+)
+
+DATA = {
+    "total": 1234.5,
+    "name": "<b>Acme</b>",
+    "order": {"items": [{"sku": "A"}, {"sku": "B"}]},
+    "rows": list(range(400)),
+    "long": "y" * 1000,
+}
+
+
+def render(text: str, data: dict = DATA) -> str:
+    return TemplateCompiler()._replace_bindings(text, data)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{{ total | currency("€") }}', "€1,234.50"),
+        ("{{ total | currency }}", "$1,234.50"),
+        ("{% for item in order.items %}{{ item.sku }}{% endfor %}", "AB"),
+        ("{% if total > 1000 %}big{% else %}small{% endif %}", "big"),
+        ("{{ missing.deeply.nested }}|{{ none }}", "|"),
+        ("{{ 2 ** 10 }}", "1024"),
+    ],
+)
+def test_binding_expressions(text, expected):
+    assert render(text, {**DATA, "none": None}) == expected
+
+
+@pytest.mark.parametrize("text", ["{{ name }}", "{{name}}", "{% if 1 %}{{ name }}{% endif %}"])
+def test_bound_data_is_escaped_on_both_paths(text):
+    assert render(text) == "&lt;b&gt;Acme&lt;/b&gt;"
+
+
+def test_sandbox_hides_internals():
+    assert render("{{ ''.__class__.__mro__ }}|{{ total.__class__ }}") == "|"
+
+
+@pytest.mark.parametrize(
+    "text, error",
+    [
+        # 400 x 400 iterations: each loop is small, together they are over budget
+        (
+            "{% for a in rows %}{% for b in rows %}{% endfor %}{% endfor %}",
+            f"More than {MAX_BINDING_ITERATIONS} loop iterations",
+        ),
+        (
+            "{% for i in range(1500) %}{{ long }}{% endfor %}",
+            f"Output longer than {MAX_BINDING_OUTPUT}",
+        ),
+        ('{{ "x" * 2000000 }}', "Result longer than"),
+        ("{{ 2000000 * [1] }}", "Result longer than"),
+        ("{{ 2 ** 100000 }}", "Result larger than"),
+    ],
+    ids=["nested loops", "output", "string repeat", "list repeat", "power"],
+)
+def test_runaway_texts_are_stopped(text, error, caplog):
+    output = render(text)
+
+    assert output.startswith('<span style="color: #c62828')
+    assert f"SecurityError: {error}" in output
+    assert "SecurityError" in caplog.text
+
+
+def test_loop_budget_is_per_render():
+    compiler = TemplateCompiler()
+    text = "{% for i in range(" + str(MAX_BINDING_ITERATIONS - 1) + ") %}{% endfor %}ok"
+
+    assert compiler._replace_bindings(text, DATA) == "ok"
+    assert compiler._replace_bindings(text, DATA) == "ok"
+
+
+def test_syntax_errors_are_shown_not_substituted():
+    output = render("{% if %}{{ name }}")
+
+    assert "TemplateSyntaxError" in output
+    assert "Acme" not in output
+
+
+@pytest.mark.parametrize(
+    "text, simple",
+    [
+        ("{{ a.b }} and {{ c | currency }}", True),
+        ('{{ c | currency("€") }}', False),
+        ("{% if a %}x{% endif %}", False),
+        ("{# note #}", False),
+    ],
+)
+def test_has_only_simple_bindings(text, simple):
+    assert has_only_simple_bindings(text) is simple
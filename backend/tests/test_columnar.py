@@ -0,0 +1,88 @@
+import json
+from array import array
+from datetime import date
+
+from app.connectors.columnar import (
+    ColumnarTable,
+    columnarize,
+    digest,
+    dumps_records,
+    to_records,
+)
+
+RECORDS = [
+    {"sku": f"SKU-{i}", "status": "open" if i % 3 else "closed", "qty": i, "price": i * 1.5}
+    for i in range(40)
+] + [{"sku": "SKU-x", "note": "no qty"}]
+
+
+def test_table_rows_read_back_as_built():
+    table = ColumnarTable.from_records(RECORDS)
+
+    assert isinstance(table.columns["price"], list)  # A missing cell keeps it generic
+    assert isinstance(table.columns["status"], array)  # Dictionary codes
+    assert table.to_records() == RECORDS
+    assert table[-1] == {"sku": "SKU-x", "note": "no qty"}
+    assert table[2:4].to_records() == RECORDS[2:4]
+
+
+def test_columnarize_only_replaces_long_record_lists():
+    data = {"order": {"items": RECORDS, "tags": ["a"]}, "short": RECORDS[:2]}
+
+    converted = columnarize(data, ["order.items", "order.tags", "short"], min_rows=10)
+
+    assert isinstance(converted["order"]["items"], ColumnarTable)
+    assert converted["order"]["tags"] == ["a"]
+    assert converted["short"] is data["short"]
+    assert data["order"]["items"] is RECORDS  # The input is left as it was
+    assert to_records(converted) == data
+
+
+def test_dumps_records_matches_json_of_the_records():
+    data = {
+        "order": {"items": RECORDS, "placed": date(2024, 3, 1), "id": 7},
+        "rows": RECORDS[:5],
+        "empty": [],
+    }
+    converted = columnarize(data, ["order.items", "rows", "empty"])
+
+    for sort_keys in (False, True):
+        expected = json.dumps(to_records(converted), sort_keys=sort_keys, default=str)
+        assert dumps_records(converted, sort_keys=sort_keys, default=str) == expected
+    assert dumps_records(ColumnarTable.from_records([])) == "[]"
+
+
+def test_digest_is_equal_for_equal_tables():
+    data = {"order": {"id": 1, "items": RECORDS}}
+    first = columnarize(data, ["order.items"])
+    second = columnarize(json.loads(json.dumps(data)), ["order.items"])
+
+    assert digest(first) == digest(second)
+
+
+def test_digest_changes_with_any_cell():
+    data = columnarize({"items": RECORDS}, ["items"])
+    changed_records = [dict(record) for record in RECORDS]
+    changed_records[7]["qty"] = 8
+
+    assert digest(data) != digest(columnarize({"items": changed_records}, ["items"]))
+    assert digest(data) != digest(columnarize({"items": RECORDS[:-1]}, ["items"]))
+    assert digest(data) != digest({"items": RECORDS, "extra": 1})
+
+
+def test_digest_tells_missing_cells_from_values():
+    with_missing = ColumnarTable.from_records([{"a": 1}, {"b": 2}])
+    with_null = ColumnarTable.from_records([{"a": 1, "b": None}, {"a": None, "b": 2}])
+
+    assert digest({"t": with_missing}) != digest({"t": with_null})
+
+
+def test_digest_does_not_build_records(monkeypatch):
+    data = columnarize({"items": RECORDS}, ["items"])
+
+    def fail(self):
+        raise AssertionError("records were built")
+
+    monkeypatch.setattr(ColumnarTable, "to_records", fail)
+    monkeypatch.setattr(ColumnarTable, "__getitem__", fail)
+    digest(data)
@@ -0,0 +1,57 @@
+from unittest import mock
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1 import generation
+from app.db.memory import MemoryClient
+from app.storage.local import LocalStorage
+
+
+@pytest.fixture
+def client() -> MemoryClient:
+    return MemoryClient()
+
+
+@pytest.fixture
+def storage(tmp_path) -> LocalStorage:
+    return LocalStorage(tmp_path)
+
+
+@pytest.fixture
+async def api(client, storage):
+    app = FastAPI()
+    app.include_router(generation.router, prefix="/generate")
+    with (
+        mock.patch.object(generation, "get_db_client", return_value=client),
+        mock.patch.object(generation, "get_storage_backend", return_value=storage),
+    ):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
+
+
+async def test_download_before_the_record_is_written(api, storage):
+    job_id = str(uuid4())
+    await storage.upload(f"pdfs/{job_id}.pdf", b"%PDF-1.7 queued", "application/pdf")
+
+    response = await api.get(f"/generate/{job_id}/download")
+
+    assert response.status_code == 200
+    assert response.content == b"%PDF-1.7 queued"
+
+
+async def test_download_of_an_unknown_job_is_404(api):
+    response = await api.get(f"/generate/{uuid4()}/download")
+
+    assert response.status_code == 404
+
+
+async def test_download_only_falls_back_for_job_ids(api, storage):
+    await storage.upload("pdfs/../secret.pdf", b"not a job", "application/pdf")
+
+    response = await api.get("/generate/..%2Fsecret/download")
+
+    assert response.status_code == 404
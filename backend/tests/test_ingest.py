@@ -0,0 +1,226 @@
+import csv
+import io
+
+import pytest
+
+from app.services.ingest import (
+    IngestError,
+    RecordError,
+    RecordParser,
+    coerce,
+    iter_multipart,
+    map_record,
+)
+
+CSV = (
+    "id,customer.name,note,total\r\n"
+    '1,"Acme, Inc.","first line\r\nsecond ""quoted"" line",12.50\r\n'
+    '2,Globex,"",7\r\n'
+    '3,"Initech","ends with a newline\n",0\r\n'
+)
+
+
+def feed_in_chunks(parser: RecordParser, data: bytes, size: int) -> list:
+    records = []
+    for start in range(0, len(data), size):
+        records += parser.feed(data[start : start + size])
+    return records + parser.feed(b"", final=True)
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 4096])
+def test_csv_records_survive_any_chunking(size):
+    records = feed_in_chunks(RecordParser("csv"), CSV.encode(), size)
+
+    rows = list(csv.reader(io.StringIO(CSV, newline="")))
+    assert records == [
+        {"id": row[0], "customer": {"name": row[1]}, "note": row[2], "total": row[3]}
+        for row in rows[1:]
+    ]
+    assert records[0]["note"] == 'first line\r\nsecond "quoted" line'
+
+
+def test_quotes_inside_unquoted_fields_do_not_hold_back_records():
+    parser = RecordParser("csv")
+
+    records = parser.feed(b'sku,name\n1,5" oak plank\n2,maple\n3,ash\n')
+
+    assert records == [
+        {"sku": "1", "name": '5" oak plank'},
+        {"sku": "2", "name": "maple"},
+        {"sku": "3", "name": "ash"},
+    ]
+    assert parser._pending == ""
+
+
+@pytest.mark.parametrize("size", [1, 3, 4096])
+def test_csv_quote_placements_survive_any_chunking(size):
+    data = 'a,b\n1,"x ""y"",\nz"\n2,3"\n"4","""5"""\n6,7\n'
+
+    records = feed_in_chunks(RecordParser("csv"), data.encode(), size)
+
+    assert records == [
+        {"a": "1", "b": 'x "y",\nz'},
+        {"a": "2", "b": '3"'},
+        {"a": "4", "b": '"5"'},
+        {"a": "6", "b": "7"},
+    ]
+
+
+def test_csv_multibyte_characters_split_across_chunks():
+    data = "name\nZoë\n“Ünïcode”\n".encode()
+
+    records = feed_in_chunks(RecordParser("csv"), data, 1)
+
+    assert records == [{"name": "Zoë"}, {"name": "“Ünïcode”"}]
+
+
+def test_csv_rows_with_extra_fields_are_record_errors():
+    records = RecordParser("csv").feed(b"a,b\n1,2\n1,2,3\n4\n", final=True)
+
+    assert records[0] == {"a": "1", "b": "2"}
+    assert isinstance(records[1], RecordError)
+    assert records[2] == {"a": "4"}
+
+
+def test_csv_header_with_a_column_and_columns_below_it():
+    records = RecordParser("csv").feed(b"a,a.b\n1,2\n", final=True)
+
+    assert isinstance(records[0], RecordError)
+
+
+def test_ndjson_lines_split_across_chunks():
+    data = b'{"id": 1, "tags": ["a"]}\n\n[1, 2]\nnot json\n{"id": 2}'
+
+    records = feed_in_chunks(RecordParser("ndjson"), data, 5)
+
+    assert records[0] == {"id": 1, "tags": ["a"]}
+    assert isinstance(records[1], RecordError)  # Not an object
+    assert isinstance(records[2], RecordError)  # Not JSON
+    assert records[3] == {"id": 2}
+
+
+def test_invalid_utf8_is_an_ingest_error():
+    with pytest.raises(IngestError):
+        RecordParser("csv").feed(b"name\n\xff\n", final=True)
+
+
+@pytest.mark.parametrize(
+    "value, field_type, expected",
+    [
+        ("42", "number", 42),
+        (" 4.5 ", "number", 4.5),
+        ("-1e3", "number", -1000.0),
+        (7, "number", 7),
+        ("yes", "boolean", True),
+        ("FALSE", "boolean", False),
+        (True, "boolean", True),
+        ("2024-03-01", "date", "2024-03-01"),
+        ("2024-03-01T10:00:00Z", "date", "2024-03-01T10:00:00+00:00"),
+        ('["a", 1]', "array", ["a", 1]),
+        ('{"a": 1}', "object", {"a": 1}),
+        ("", "number", None),
+        ("   ", "boolean", None),
+        ("", "string", ""),
+        (" padded ", "string", " padded "),
+        ("anything", None, "anything"),
+        (None, "number", None),
+    ],
+)
+def test_coerce(value, field_type, expected):
+    assert coerce(value, field_type) == expected
+
+
+@pytest.mark.parametrize(
+    "value, field_type",
+    [
+        ("x", "number"),
+        (True, "number"),
+        ("maybe", "boolean"),
+        ("01/03/2024", "date"),
+        ('{"a": 1}', "array"),
+        (5, "string"),
+    ],
+)
+def test_coerce_rejects_mismatched_values(value, field_type):
+    with pytest.raises(ValueError):
+        coerce(value, field_type)
+
+
+def test_map_record_coerces_and_maps_fields():
+    mappings = [
+        {"sourceField": "customer.name", "templateField": "name", "type": "string"},
+        {"sourceField": "total", "templateField": "invoice.total", "type": "number"},
+        {"sourceField": "paid", "templateField": "paid", "type": "boolean"},
+    ]
+
+    mapped = map_record({"customer": {"name": "Acme"}, "total": "12.50", "paid": "0"}, mappings)
+
+    assert mapped == {"name": "Acme", "invoice": {"total": 12.5}, "paid": False}
+
+
+def test_map_record_names_the_field_that_failed():
+    mappings = [{"sourceField": "total", "templateField": "total", "type": "number"}]
+
+    with pytest.raises(RecordError, match="total: not a number: 'abc'"):
+        map_record({"total": "abc"}, mappings)
+
+
+def test_map_record_without_mappings_keeps_the_record():
+    record = {"a": "1"}
+
+    assert map_record(record, []) is record
+
+
+BOUNDARY = "xyz"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def multipart(*parts: tuple[str, str | None, bytes], close: bool = True) -> bytes:
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename:
+            disposition += f'; filename="{filename}"'
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode()
+        body += content + b"\r\n"
+    return body + (f"--{BOUNDARY}--\r\n".encode() if close else b"")
+
+
+async def collect(body: bytes, size: int = 3) -> list:
+    async def chunks():
+        for start in range(0, len(body), size):
+            yield body[start : start + size]
+
+    parts: dict[str, bytearray] = {}
+    async for part, chunk in iter_multipart(CONTENT_TYPE, chunks()):
+        content = parts.setdefault(part.name, bytearray())
+        if chunk is not None:
+            content += chunk
+    return [(name, bytes(content)) for name, content in parts.items()]
+
+
+async def test_multipart_parts_are_streamed():
+    body = multipart(("format", None, b"csv"), ("file", "rows.csv", CSV.encode()))
+
+    assert await collect(body) == [("format", b"csv"), ("file", CSV.encode())]
+
+
+async def test_multipart_without_closing_boundary_is_an_ingest_error():
+    body = multipart(("file", "rows.csv", b"a\n1\n"), close=False)
+
+    with pytest.raises(IngestError):
+        await collect(body)
+
+
+async def test_malformed_multipart_is_an_ingest_error():
+    with pytest.raises(IngestError):
+        await collect(b"--xyz\r\nno headers here\r\n\r\n--xyz--")
+
+
+async def test_non_multipart_upload_is_an_ingest_error():
+    async def chunks():
+        yield b"a,b\n"
+
+    with pytest.raises(IngestError):
+        async for _ in iter_multipart("text/csv", chunks()):
+            pass
@@ -0,0 +1,214 @@
+import json
+
+import pytest
+
+from app.templates.jsonpatch import (
+    JsonPatchError,
+    JsonPatchTestFailedError,
+    apply_json_patch,
+    apply_template_patch,
+)
+
+# RFC 6902, appendix A: (document, patch, expected result)
+RFC_EXAMPLES = {
+    "add an object member": (
+        {"foo": "bar"},
+        [{"op": "add", "path": "/baz", "value": "qux"}],
+        {"baz": "qux", "foo": "bar"},
+    ),
+    "add an array element": (
+        {"foo": ["bar", "baz"]},
+        [{"op": "add", "path": "/foo/1", "value": "qux"}],
+        {"foo": ["bar", "qux", "baz"]},
+    ),
+    "remove an object member": (
+        {"baz": "qux", "foo": "bar"},
+        [{"op": "remove", "path": "/baz"}],
+        {"foo": "bar"},
+    ),
+    "remove an array element": (
+        {"foo": ["bar", "qux", "baz"]},
+        [{"op": "remove", "path": "/foo/1"}],
+        {"foo": ["bar", "baz"]},
+    ),
+    "replace a value": (
+        {"baz": "qux", "foo": "bar"},
+        [{"op": "replace", "path": "/baz", "value": "boo"}],
+        {"baz": "boo", "foo": "bar"},
+    ),
+    "move a value": (
+        {"foo": {"bar": "baz", "waldo": "fred"}, "qux": {"corge": "grault"}},
+        [{"op": "move", "from": "/foo/waldo", "path": "/qux/thud"}],
+        {"foo": {"bar": "baz"}, "qux": {"corge": "grault", "thud": "fred"}},
+    ),
+    "move an array element": (
+        {"foo": ["all", "grass", "cows", "eat"]},
+        [{"op": "move", "from": "/foo/1", "path": "/foo/3"}],
+        {"foo": ["all", "cows", "eat", "grass"]},
+    ),
+    "test a value": (
+        {"baz": "qux", "foo": ["a", 2, "c"]},
+        [
+            {"op": "test", "path": "/baz", "value": "qux"},
+            {"op": "test", "path": "/foo/1", "value": 2},
+        ],
+        {"baz": "qux", "foo": ["a", 2, "c"]},
+    ),
+    "add a nested member object": (
+        {"foo": "bar"},
+        [{"op": "add", "path": "/child", "value": {"grandchild": {}}}],
+        {"foo": "bar", "child": {"grandchild": {}}},
+    ),
+    "ignore unrecognized elements": (
+        {"foo": "bar"},
+        [{"op": "add", "path": "/baz", "value": "qux", "xyz": 123}],
+        {"foo": "bar", "baz": "qux"},
+    ),
+    "~ escape ordering": (
+        {"/": 9, "~1": 10},
+        [{"op": "test", "path": "/~01", "value": 10}],
+        {"/": 9, "~1": 10},
+    ),
+    "add an array value": (
+        {"foo": ["bar"]},
+        [{"op": "add", "path": "/foo/-", "value": ["abc", "def"]}],
+        {"foo": ["bar", ["abc", "def"]]},
+    ),
+    "copy a value": (
+        {"foo": {"bar": [1]}},
+        [{"op": "copy", "from": "/foo/bar", "path": "/baz"}],
+        {"foo": {"bar": [1]}, "baz": [1]},
+    ),
+    "replace the whole document": (
+        {"foo": 1},
+        [{"op": "replace", "path": "", "value": [1, 2]}],
+        [1, 2],
+    ),
+}
+
+# RFC 6902, appendix A: `test` operations that must fail
+RFC_ERRORS = {
+    "test a value that differs": (
+        {"baz": "qux"},
+        [{"op": "test", "path": "/baz", "value": "bar"}],
+    ),
+    "test a number against a string": (
+        {"/": 9, "~1": 10},
+        [{"op": "test", "path": "/~01", "value": "10"}],
+    ),
+}
+# Patches that can't be applied at all
+INVALID_PATCHES = {
+    "add to a nonexistent target": (
+        {"foo": "bar"},
+        [{"op": "add", "path": "/baz/bat", "value": "qux"}],
+    ),
+    "remove a missing member": ({"foo": 1}, [{"op": "remove", "path": "/bar"}]),
+    "index past the end": ({"foo": [1]}, [{"op": "add", "path": "/foo/2", "value": 2}]),
+    "index with a leading zero": ({"foo": [1, 2]}, [{"op": "remove", "path": "/foo/01"}]),
+    "pointer without a leading slash": ({"foo": 1}, [{"op": "remove", "path": "foo"}]),
+    "missing value": ({"foo": 1}, [{"op": "replace", "path": "/foo"}]),
+    "missing from": ({"foo": 1}, [{"op": "move", "path": "/bar"}]),
+    "move into its own child": (
+        {"foo": {"bar": 1}},
+        [{"op": "move", "from": "/foo", "path": "/foo/bar/baz"}],
+    ),
+    "unknown operation": ({"foo": 1}, [{"op": "merge", "path": "/foo", "value": 2}]),
+}
+
+
+@pytest.mark.parametrize("document, patch, expected", RFC_EXAMPLES.values(), ids=RFC_EXAMPLES)
+def test_rfc_examples(document, patch, expected):
+    assert apply_json_patch(document, patch) == expected
+
+
+@pytest.mark.parametrize("document, patch", RFC_ERRORS.values(), ids=RFC_ERRORS)
+def test_failed_test_operations(document, patch):
+    with pytest.raises(JsonPatchTestFailedError):
+        apply_json_patch(document, patch)
+
+
+@pytest.mark.parametrize("document, patch", INVALID_PATCHES.values(), ids=INVALID_PATCHES)
+def test_invalid_patches(document, patch):
+    with pytest.raises(JsonPatchError):
+        apply_json_patch(document, patch)
+
+
+def test_failed_patch_leaves_the_document_untouched():
+    document = {"foo": [1, 2], "bar": {"baz": 1}}
+    snapshot = json.loads(json.dumps(document))
+    patch = [
+        {"op": "add", "path": "/foo/-", "value": 3},
+        {"op": "remove", "path": "/bar/baz"},
+        {"op": "test", "path": "/foo/0", "value": "not 1"},
+    ]
+
+    with pytest.raises(JsonPatchTestFailedError):
+        apply_json_patch(document, patch)
+    assert document == snapshot
+
+
+def test_added_values_are_copies():
+    value = {"nested": [1]}
+
+    patched = apply_json_patch({}, [{"op": "add", "path": "/a", "value": value}])
+    patched["a"]["nested"].append(2)
+
+    assert value == {"nested": [1]}
+
+
+NODES = {
+    "ROOT": {"type": {"resolvedName": "Container"}, "props": {}, "nodes": ["title"]},
+    "title": {"type": {"resolvedName": "TextBlock"}, "props": {"text": "Hi"}, "nodes": []},
+}
+
+
+def template() -> dict:
+    return {"editorState": json.dumps(NODES), "pageSettings": {"size": "A4"}}
+
+
+def test_template_patch_addresses_the_parsed_editor_state():
+    patched, changed = apply_template_patch(
+        template(),
+        [
+            {"op": "test", "path": "/editorState/title/props/text", "value": "Hi"},
+            {"op": "replace", "path": "/editorState/title/props/text", "value": "Hello"},
+            {"op": "replace", "path": "/pageSettings/size", "value": "Letter"},
+        ],
+        {},
+    )
+
+    state = json.loads(patched["editorState"])
+    assert state["title"]["props"]["text"] == "Hello"
+    assert patched["pageSettings"] == {"size": "Letter"}
+    assert changed == {"title": state["title"]}
+
+
+def test_template_patch_applies_node_changes():
+    new_node = {"type": {"resolvedName": "SpacerBlock"}, "props": {}, "nodes": []}
+    root = {**NODES["ROOT"], "nodes": ["spacer"]}
+
+    patched, changed = apply_template_patch(
+        template(), [], {"spacer": new_node, "ROOT": root, "title": None}
+    )
+
+    assert json.loads(patched["editorState"]) == {"ROOT": root, "spacer": new_node}
+    assert changed == {"spacer": new_node, "ROOT": root, "title": None}
+
+
+def test_replacing_the_editor_state_reports_no_node_changes():
+    patched, changed = apply_template_patch(
+        template(), [{"op": "replace", "path": "/editorState", "value": "{}"}], {}
+    )
+
+    assert patched["editorState"] == "{}"
+    assert changed is None
+
+
+def test_template_patch_stale_test_fails():
+    with pytest.raises(JsonPatchTestFailedError):
+        apply_template_patch(
+            template(),
+            [{"op": "test", "path": "/editorState/title/props/text", "value": "Old"}],
+            {},
+        )
@@ -0,0 +1,163 @@
+import json
+from contextlib import asynccontextmanager
+from unittest import mock
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1 import generation
+from app.db.memory import MemoryClient
+from app.pdf.native import NativeRenderer, NativeRenderError
+from app.schemas import PDFOptions
+from app.storage.local import LocalStorage
+
+
+def node(resolved_name: str, props: dict | None = None, children: list[str] | None = None):
+    return {"type": {"resolvedName": resolved_name}, "props": props or {}, "nodes": children or []}
+
+
+NODES = {
+    "ROOT": node("Container", children=["title", "lines", "gap", "rule"]),
+    "title": node("TextBlock", {"text": "<h1>Invoice {{ number }}</h1><p><b>Due</b> soon</p>"}),
+    "lines": node(
+        "TableBlock",
+        {"dataPath": "{{lines}}", "columns": [{"key": "sku", "header": "SKU"}]},
+    ),
+    "gap": node("SpacerBlock", {"height": 20}),
+    "rule": node("DividerBlock"),
+}
+DATA = {"number": "INV-7", "lines": [{"sku": f"A-{i}"} for i in range(200)]}
+
+
+def with_node(node_id: str, value: dict) -> dict:
+    nodes = {**NODES, node_id: value}
+    nodes["ROOT"] = node("Container", children=[*NODES["ROOT"]["nodes"], node_id])
+    return nodes
+
+
+@pytest.mark.parametrize(
+    "nodes, options",
+    [
+        (with_node("logo", node("ImageBlock", {"src": "x.png"})), PDFOptions()),
+        (
+            with_node("odd", node("TextBlock", {"text": "<table><tr><td>x</td></tr></table>"})),
+            PDFOptions(),
+        ),
+        ({**NODES, "rule": node("Container", children=["ROOT"])}, PDFOptions()),
+        ({"title": NODES["title"]}, PDFOptions()),
+        (NODES, PDFOptions(page_size="B5")),
+        (NODES, PDFOptions(margin_top="1em")),
+    ],
+    ids=["image", "unsupported markup", "cycle", "no root", "page size", "margin unit"],
+)
+def test_unsupported_templates_are_left_to_the_browser(nodes, options):
+    assert not NativeRenderer().supports(nodes, options)
+
+
+def test_simple_template_renders_natively():
+    renderer = NativeRenderer()
+    options = PDFOptions(page_size="Letter", orientation="landscape", margin_top="1in")
+
+    assert renderer.supports(NODES, options)
+    pdf = renderer.render(NODES, DATA, options)
+
+    assert pdf.startswith(b"%PDF")
+    assert pdf.count(b"/Type /Page\n") > 1  # The long table broke across pages
+
+
+def test_data_outside_the_standard_fonts_is_a_native_render_error():
+    with pytest.raises(NativeRenderError):
+        NativeRenderer().render(NODES, {**DATA, "number": "请求"}, PDFOptions())
+
+
+class FakeBrowser:
+    """Counts browser renders; its "PDF" says where it came from."""
+
+    def __init__(self):
+        self.renders = 0
+
+    @asynccontextmanager
+    async def page(self, priority, tenant):
+        yield "page"
+
+    async def render_pdf(self, page, html, options):
+        self.renders += 1
+        return b"%PDF browser"
+
+
+@pytest.fixture
+def client() -> MemoryClient:
+    return MemoryClient()
+
+
+@pytest.fixture
+def storage(tmp_path) -> LocalStorage:
+    return LocalStorage(tmp_path)
+
+
+@pytest.fixture
+def browser() -> FakeBrowser:
+    return FakeBrowser()
+
+
+@pytest.fixture
+def native() -> NativeRenderer | None:
+    return NativeRenderer()
+
+
+@pytest.fixture
+async def api(client, storage, browser, native):
+    app = FastAPI()
+    app.include_router(generation.router, prefix="/generate")
+    builder = mock.Mock(artifact_for=mock.AsyncMock(return_value=None))
+    with (
+        mock.patch.object(generation, "get_db_client", return_value=client),
+        mock.patch.object(generation, "get_storage_backend", return_value=storage),
+        mock.patch.object(generation, "get_pdf_engine", return_value=browser),
+        mock.patch.object(generation, "get_native_renderer", return_value=native),
+        mock.patch.object(generation, "get_template_builder", return_value=builder),
+        mock.patch.object(generation, "get_audit_writer", return_value=mock.AsyncMock()),
+    ):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
+
+
+async def generate(api, client, storage, nodes: dict, data: dict) -> bytes:
+    template_json = {"editorState": json.dumps(nodes), "pageSettings": {}}
+    row = {"name": "Invoice", "template_json": template_json, "user_id": "demo-user"}
+    template = client.table("templates").insert(row).execute().data[0]
+
+    response = await api.post("/generate/", json={"template_id": template["id"], "data": data})
+
+    assert response.status_code == 200
+    return await storage.read(f"pdfs/{response.json()['job_id']}.pdf")
+
+
+async def test_supported_templates_skip_the_browser(api, client, storage, browser):
+    pdf = await generate(api, client, storage, NODES, DATA)
+
+    assert pdf.startswith(b"%PDF-")
+    assert browser.renders == 0
+
+
+async def test_other_templates_render_in_the_browser(api, client, storage, browser):
+    nodes = with_node("logo", node("ImageBlock", {"src": "x.png"}))
+
+    assert await generate(api, client, storage, nodes, DATA) == b"%PDF browser"
+    assert browser.renders == 1
+
+
+async def test_native_failures_fall_back_to_the_browser(api, client, storage, browser):
+    data = {**DATA, "number": "请求"}
+
+    assert await generate(api, client, storage, NODES, data) == b"%PDF browser"
+    assert browser.renders == 1
+
+
+@pytest.mark.parametrize("native", [None])
+async def test_without_a_native_renderer_everything_uses_the_browser(
+    api, client, storage, browser, native
+):
+    assert await generate(api, client, storage, NODES, DATA) == b"%PDF browser"
@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+from app.connectors.projection import build_projection, leaf_paths, prune, subtree
+from app.templates.compiler import TemplateCompiler
+from app.templates.fields import template_data_paths, text_data_paths
+
+
+def node(resolved_name: str, props: dict, children: list[str] | None = None) -> dict:
+    return {"type": {"resolvedName": resolved_name}, "props": props, "nodes": children or []}
+
+
+TEXTS = [
+    "Invoice {{invoice.number}} for {{ customer.name | uppercase }}",
+    "Due: {{ invoice.total | currency }}",
+    "{% for line in invoice.notes %}<p>{{ line.text }}</p>{% endfor %}",
+    "{% if customer.vip %}VIP since {{ customer.since | date }}{% endif %}",
+    "{{ invoice.lines | length }} lines, first: {{ invoice.lines[0].sku }}",
+    "{{ customer['address'].city }} / {{ tags | join(', ') }}",
+    "{% set shipping = invoice.shipping %}Ship via {{ shipping.carrier }}",
+]
+# Calling a method may read everything, so the whole `invoice` is kept
+METHOD_TEXT = "{{ invoice.items() | list | length }} keys"
+
+NODES = {
+    "ROOT": node("Container", {}, [f"text-{i}" for i in range(len(TEXTS))] + ["table"]),
+    **{f"text-{i}": node("TextBlock", {"text": text}) for i, text in enumerate(TEXTS)},
+    "table": node(
+        "TableBlock",
+        {
+            "dataPath": "{{invoice.lines}}",
+            "columns": [
+                {"key": "sku", "header": "SKU"},
+                {"key": "price", "header": "Price", "format": {"type": "currency"}},
+            ],
+        },
+    ),
+}
+TEMPLATE = {"editorState": json.dumps(NODES), "pageSettings": {}}
+
+DATA = {
+    "customer": {
+        "name": "Acme",
+        "vip": True,
+        "since": "2020-01-31",
+        "address": {"city": "Berlin", "street": "Unused 1"},
+        "ssn": "unused",
+    },
+    "invoice": {
+        "number": "INV-7",
+        "total": 1234.5,
+        "notes": [{"text": "Thanks", "author": "unused"}, {"text": "Net 30"}],
+        "lines": [
+            {"sku": "A-1", "price": 10, "description": "unused"},
+            {"sku": "B-2", "price": 2.5, "weight": 3},
+        ],
+        "shipping": {"carrier": "DHL", "tracking": "unused"},
+        "internal": {"margin": 0.4},
+    },
+    "tags": ["red", "blue"],
+    "audit": [{"who": "unused"}] * 3,
+}
+
+
+def pruned(template: dict, data: dict) -> dict:
+    return prune(data, build_projection(template_data_paths(template)))
+
+
+def test_pruned_data_renders_the_same_document():
+    compiler = TemplateCompiler()
+
+    reduced = pruned(TEMPLATE, DATA)
+
+    assert compiler.compile(TEMPLATE, reduced) == compiler.compile(TEMPLATE, DATA)
+    # Unused fields actually went
+    assert "audit" not in reduced
+    assert "ssn" not in reduced["customer"]
+    assert "street" not in reduced["customer"]["address"]
+    assert "internal" not in reduced["invoice"]
+
+
+def test_pruned_table_rows_keep_their_columns():
+    template = {"editorState": json.dumps({"ROOT": NODES["table"]}), "pageSettings": {}}
+    compiler = TemplateCompiler()
+
+    reduced = pruned(template, DATA)
+
+    assert compiler.compile(template, reduced) == compiler.compile(template, DATA)
+    assert reduced == {
+        "invoice": {"lines": [{"sku": "A-1", "price": 10}, {"sku": "B-2", "price": 2.5}]}
+    }
+
+
+@pytest.mark.parametrize("text", [*TEXTS, METHOD_TEXT])
+def test_each_text_renders_the_same_from_pruned_data(text):
+    compiler = TemplateCompiler()
+    reduced = prune(DATA, build_projection(text_data_paths(text)))
+
+    assert compiler._replace_bindings(text, reduced) == compiler._replace_bindings(text, DATA)
+
+
+def test_simple_template_paths():
+    template = {"content": "Hello {{ customer.name }}, you owe {{ invoice.total | currency }}"}
+
+    assert template_data_paths(template) == {"customer.name", "invoice.total"}
+    reduced = pruned(template, DATA)
+    assert reduced == {"customer": {"name": "Acme"}, "invoice": {"total": 1234.5}}
+
+
+def test_build_projection_keeps_the_widest_path():
+    projection = build_projection(["a.b.c", "a.b", "a.d.e", "x", "x.y", ""])
+
+    assert projection == {"a": {"b": None, "d": {"e": None}}, "x": None}
+    assert sorted(leaf_paths(projection)) == ["a.b", "a.d.e", "x"]
+    assert leaf_paths(None) is None
+
+
+def test_subtree():
+    projection = build_projection(["a.b.c", "x"])
+
+    assert subtree(projection, "a.b") == {"c": None}
+    assert subtree(projection, "x.y") is None
+    assert subtree(projection, "missing") == {}
+
+
+def test_prune_applies_to_each_list_element():
+    data = {"rows": [{"a": 1, "b": 2}, {"a": 3}, "scalar"], "other": 1}
+
+    assert prune(data, build_projection(["rows.a"])) == {"rows": [{"a": 1}, {"a": 3}, "scalar"]}
+
+
+def test_prune_keeps_lists_indexed_into_whole():
+    data = {"rows": [{"a": 1, "b": 2}]}
+
+    assert prune(data, build_projection(["rows.0.a"])) == data
@@ -0,0 +1,231 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.connectors import resilience
+from app.connectors.resilience import (
+    CircuitBreaker,
+    TokenBucket,
+    UpstreamGuard,
+    UpstreamUnavailableError,
+    shared_breaker,
+    shared_limiter,
+)
+
+
+class Clock:
+    """A monotonic clock that only moves when told to, or when something sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(
+        resilience,
+        "asyncio",
+        SimpleNamespace(sleep=clock.sleep, CancelledError=asyncio.CancelledError),
+    )
+    return clock
+
+
+async def test_bucket_allows_a_burst_then_queues_at_the_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+
+    for _ in range(5):
+        await bucket.acquire()
+
+    # Three go at once; the next two reserve the slots 0.5s and 1s out
+    assert clock.sleeps == [0.5, 1.0]
+
+
+async def test_bucket_refills_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        await bucket.acquire()
+
+    clock.now += 60
+    for _ in range(4):
+        await bucket.acquire()
+
+    assert clock.sleeps == [0.5]
+
+
+async def test_bucket_refuses_waits_past_max_wait(clock):
+    bucket = TokenBucket(rate=1, burst=1)
+    await bucket.acquire()
+
+    with pytest.raises(UpstreamUnavailableError, match="Rate limited"):
+        await bucket.acquire(max_wait=0.5)
+    # The refused call took no slot
+    await bucket.acquire(max_wait=1.0)
+    assert clock.sleeps == [1.0]
+
+
+def open_breaker(clock: Clock, threshold: int = 2) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=30)
+    for _ in range(threshold):
+        breaker.before_call()
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()  # Not consecutive any more
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    with pytest.raises(UpstreamUnavailableError, match="Circuit open"):
+        breaker.before_call()
+
+
+def test_breaker_lets_one_trial_through_after_the_timeout(clock):
+    breaker = open_breaker(clock)
+    clock.now += 29
+    with pytest.raises(UpstreamUnavailableError):
+        breaker.before_call()
+
+    clock.now += 1
+    breaker.before_call()
+    with pytest.raises(UpstreamUnavailableError):
+        breaker.before_call()  # Only the trial goes out
+
+    breaker.record_success()
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_breaker(clock):
+    breaker = open_breaker(clock, threshold=5)
+    clock.now += 30
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    with pytest.raises(UpstreamUnavailableError):
+        breaker.before_call()
+    clock.now += 30
+    breaker.before_call()
+
+
+def test_cancelled_trial_makes_room_for_another(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    breaker.before_call()
+
+    breaker.record_cancel()
+
+    breaker.before_call()
+
+
+class Upstream:
+    """Fails with each of `errors` in turn, then answers "ok"."""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class RetryableError(Exception):
+    pass
+
+
+def guard(limiter: TokenBucket | None = None, **kwargs) -> UpstreamGuard:
+    breaker = CircuitBreaker(failure_threshold=kwargs.pop("failure_threshold", 5))
+    return UpstreamGuard("test", limiter, breaker, backoff=0, **kwargs)
+
+
+async def call(guard: UpstreamGuard, upstream: Upstream, retry_after=None):
+    return await guard.call(
+        upstream, lambda error: isinstance(error, RetryableError), lambda error: retry_after
+    )
+
+
+async def test_retryable_errors_are_retried(clock):
+    upstream = Upstream(RetryableError(), RetryableError())
+
+    assert await call(guard(attempts=3), upstream) == "ok"
+    assert upstream.calls == 3
+
+
+async def test_retries_give_up_after_the_last_attempt(clock):
+    upstream = Upstream(*[RetryableError()] * 3)
+
+    with pytest.raises(RetryableError):
+        await call(guard(attempts=3), upstream)
+    assert upstream.calls == 3
+
+
+async def test_other_errors_are_raised_at_once_and_not_held_against_the_upstream(clock):
+    upstream_guard = guard(attempts=3, failure_threshold=2)
+    upstream = Upstream(ValueError("bad query"))
+
+    with pytest.raises(ValueError):
+        await call(upstream_guard, upstream)
+    assert upstream.calls == 1
+    assert upstream_guard.breaker._failures == 0
+
+
+async def test_retry_after_hints_are_capped(clock):
+    upstream = Upstream(RetryableError())
+
+    result = await asyncio.wait_for(
+        call(guard(attempts=2, max_backoff=0.01), upstream, retry_after=3600), timeout=1
+    )
+
+    assert result == "ok"
+
+
+async def test_open_circuit_short_circuits_without_calling(clock):
+    upstream_guard = guard(attempts=5, failure_threshold=2)
+    failing = Upstream(*[RetryableError()] * 5)
+    # Retries stop as soon as the circuit opens
+    with pytest.raises(UpstreamUnavailableError):
+        await call(upstream_guard, failing)
+    assert failing.calls == 2
+
+    upstream = Upstream()
+    with pytest.raises(UpstreamUnavailableError):
+        await call(upstream_guard, upstream)
+    assert upstream.calls == 0
+
+
+async def test_rate_limit_backlog_is_refused_not_retried(clock):
+    limiter = TokenBucket(rate=1, burst=1)
+    upstream_guard = guard(limiter, attempts=3, max_queue_wait=0)
+    upstream = Upstream()
+    await call(upstream_guard, upstream)
+
+    with pytest.raises(UpstreamUnavailableError):
+        await call(upstream_guard, upstream)
+    assert upstream.calls == 1
+    assert upstream_guard.breaker._failures == 0
+
+
+def test_limiters_and_breakers_are_shared_per_upstream():
+    assert shared_limiter("api.test", 5, 10) is shared_limiter("api.test", 5, 10)
+    assert shared_limiter("api.test", 5, 10) is not shared_limiter("api.test", 1, 10)
+    assert shared_breaker("api.test", 5, 30) is shared_breaker("api.test", 5, 30)
+    assert shared_breaker("api.test", 5, 30) is not shared_breaker("other.test", 5, 30)
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from app.pdf.scheduler import RenderPriority, RenderScheduler
+
+
+async def queue(scheduler: RenderScheduler, granted: list, *requests: tuple[RenderPriority, str]):
+    """Start an `acquire` per `(priority, tenant)` and wait until they are all queued."""
+    tasks = []
+    for priority, tenant in requests:
+
+        async def acquire(priority=priority, tenant=tenant):
+            await scheduler.acquire(priority, tenant)
+            granted.append((priority, tenant))
+
+        tasks.append(asyncio.create_task(acquire()))
+        await asyncio.sleep(0)
+    return tasks
+
+
+async def drain(scheduler: RenderScheduler, granted: list, count: int) -> None:
+    """Release slots one at a time, handing each to the next waiter, until `count` are granted."""
+    while len(granted) < count:
+        _, tenant = granted[-1] if granted else (None, "holder")
+        scheduler.release(tenant)
+        await asyncio.sleep(0)
+
+
+async def test_higher_classes_are_served_first():
+    scheduler = RenderScheduler(capacity=1)
+    await scheduler.acquire(RenderPriority.BATCH, "holder")
+    granted: list = []
+    await queue(
+        scheduler,
+        granted,
+        (RenderPriority.BATCH, "a"),
+        (RenderPriority.API, "a"),
+        (RenderPriority.INTERACTIVE, "a"),
+    )
+
+    await drain(scheduler, granted, 3)
+
+    assert [priority for priority, _ in granted] == [
+        RenderPriority.INTERACTIVE,
+        RenderPriority.API,
+        RenderPriority.BATCH,
+    ]
+
+
+async def test_tenants_take_turns_within_a_class():
+    scheduler = RenderScheduler(capacity=1)
+    await scheduler.acquire(RenderPriority.API, "holder")
+    granted: list = []
+    await queue(scheduler, granted, *[(RenderPriority.API, "busy")] * 3, (RenderPriority.API, "b"))
+
+    await drain(scheduler, granted, 4)
+
+    assert [tenant for _, tenant in granted] == ["busy", "b", "busy", "busy"]
+
+
+async def test_weights_set_each_tenants_share():
+    scheduler = RenderScheduler(capacity=1, tenant_weights={"heavy": 2.0})
+    await scheduler.acquire(RenderPriority.API, "holder")
+    granted: list = []
+    await queue(
+        scheduler,
+        granted,
+        *[(RenderPriority.API, "heavy")] * 4,
+        *[(RenderPriority.API, "light")] * 2,
+    )
+
+    await drain(scheduler, granted, 6)
+
+    assert [tenant for _, tenant in granted] == [
+        "heavy",
+        "heavy",
+        "light",
+        "heavy",
+        "heavy",
+        "light",
+    ]
+
+
+async def test_tenant_limit_leaves_slots_for_others():
+    scheduler = RenderScheduler(capacity=3, tenant_limit=1)
+    await scheduler.acquire(tenant="a")
+    granted: list = []
+    tasks = await queue(scheduler, granted, (RenderPriority.API, "a"), (RenderPriority.API, "b"))
+
+    # "a" waits at its cap while a slot stays free; "b" isn't held up behind it
+    assert granted == [(RenderPriority.API, "b")]
+    assert scheduler.active == 2
+    assert scheduler.queued == 1
+
+    scheduler.release("a")
+    await asyncio.gather(*tasks)
+    assert granted[-1] == (RenderPriority.API, "a")
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = RenderScheduler(capacity=1)
+    await scheduler.acquire(tenant="holder")
+    granted: list = []
+    waiter, other = await queue(
+        scheduler, granted, (RenderPriority.API, "a"), (RenderPriority.API, "b")
+    )
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.queued == 1
+
+    scheduler.release("holder")
+    await other
+    assert granted == [(RenderPriority.API, "b")]
+
+
+async def test_slot_granted_to_a_cancelled_waiter_passes_on():
+    scheduler = RenderScheduler(capacity=1)
+    await scheduler.acquire(tenant="holder")
+    granted: list = []
+    waiter, other = await queue(
+        scheduler, granted, (RenderPriority.API, "a"), (RenderPriority.API, "b")
+    )
+
+    # The slot is granted to "a", which is cancelled before it gets to run
+    scheduler.release("holder")
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await asyncio.wait_for(other, timeout=1)
+    assert granted == [(RenderPriority.API, "b")]
+    assert scheduler.active == 1
+    assert scheduler.queued == 0
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+class Work:
+    """A call that blocks until released, counting how often it ran and was cancelled."""
+
+    def __init__(self, result="done"):
+        self.result = result
+        self.runs = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def test_concurrent_calls_share_one_run():
+    flight = SingleFlight("test")
+    work = Work()
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    work.release.set()
+
+    assert await first == ("done", False)
+    assert await second == ("done", True)
+    assert work.runs == 1
+
+
+async def test_different_keys_run_separately():
+    flight = SingleFlight("test")
+    work = Work()
+    work.release.set()
+
+    results = await asyncio.gather(flight.do("a", work), flight.do("b", work))
+
+    assert results == [("done", False), ("done", False)]
+    assert work.runs == 2
+
+
+async def test_finished_calls_are_not_cached():
+    flight = SingleFlight("test")
+    work = Work()
+    work.release.set()
+
+    await flight.do("key", work)
+    result = await flight.do("key", work)
+
+    assert result == ("done", False)
+    assert work.runs == 2
+
+
+async def test_exception_reaches_every_caller():
+    flight = SingleFlight("test")
+    work = Work(result=RuntimeError("upstream down"))
+    calls = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    work.release.set()
+
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert work.runs == 1
+
+
+async def test_cancelling_one_caller_keeps_the_work_for_the_others():
+    flight = SingleFlight("test")
+    work = Work()
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    work.release.set()
+
+    assert await second == ("done", True)
+    assert work.cancelled == 0
+
+
+async def test_cancelling_every_caller_cancels_the_work():
+    flight = SingleFlight("test")
+    work = Work()
+    calls = [asyncio.create_task(flight.do("key", work)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    for call in calls:
+        call.cancel()
+    await asyncio.gather(*calls, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert work.cancelled == 1
+    # The cancelled flight is forgotten; the next caller starts a fresh run
+    work.release.set()
+    assert await flight.do("key", work) == ("done", False)
+    assert work.runs == 2
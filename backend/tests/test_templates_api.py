@@ -0,0 +1,132 @@
+from unittest import mock
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1 import templates
+from app.api.v1.pagination import encode_cursor
+from app.db.memory import MemoryClient, MemoryQuery
+
+
+@pytest.fixture
+def client() -> MemoryClient:
+    return MemoryClient()
+
+
+@pytest.fixture
+async def api(client):
+    app = FastAPI()
+    app.include_router(templates.router, prefix="/templates")
+    with (
+        mock.patch.object(templates, "get_db_client", return_value=client),
+        mock.patch.object(templates, "get_template_builder"),
+    ):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
+
+
+def add_template(client: MemoryClient, **values) -> dict:
+    row = {"name": "Invoice", "template_json": {}, "user_id": "demo-user", **values}
+    return client.table("templates").insert(row).execute().data[0]
+
+
+async def test_put_sets_updated_at(api, client, monkeypatch):
+    # The memory backend stamps updates itself; a real database doesn't
+    payloads = []
+    update = MemoryQuery.update
+
+    def recording_update(self, payload):
+        payloads.append(payload)
+        return update(self, payload)
+
+    monkeypatch.setattr(MemoryQuery, "update", recording_update)
+    template = add_template(client, updated_at="2024-01-01T00:00:00+00:00")
+
+    response = await api.put(f"/templates/{template['id']}", json={"name": "Receipt"})
+
+    assert response.status_code == 200
+    assert "updated_at" in payloads[0]
+    assert response.json()["updated_at"] > "2024-01-01T00:00:00+00:00"
+
+
+def add_templates(client: MemoryClient, count: int) -> list[dict]:
+    # Pairs share a creation time, so pages must break ties on id; "Z" is how
+    # clients commonly spell UTC, and the cursor normalizes it to "+00:00"
+    return [
+        add_template(client, name=f"T{i}", created_at=f"2024-01-01T00:00:{i // 2:02}Z")
+        for i in range(count)
+    ]
+
+
+async def test_pages_cover_every_template_once(api, client):
+    rows = add_templates(client, 7)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3} | ({"cursor": cursor} if cursor else {})
+        response = await api.get("/templates/", params=params)
+        assert response.status_code == 200
+        seen += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    newest_first = sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+    assert seen == [row["id"] for row in newest_first]
+
+
+async def test_list_leaves_out_template_json_unless_asked(api, client):
+    add_templates(client, 1)
+
+    default = (await api.get("/templates/")).json()[0]
+    requested = (await api.get("/templates/", params={"fields": "name,template_json"})).json()[0]
+
+    assert "template_json" not in default
+    assert set(requested) == {"id", "created_at", "name", "template_json"}
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        encode_cursor({"created_at": "yesterday", "id": str(uuid4())}),
+        encode_cursor({"created_at": "2024-01-01T00:00:00", "id": str(uuid4())}),
+        encode_cursor({"created_at": "2024-01-01T00:00:00+00:00", "id": '1",name.neq."'}),
+    ],
+    ids=["garbage", "bad timestamp", "naive timestamp", "filter injection"],
+)
+async def test_invalid_cursors_are_rejected(api, client, cursor):
+    add_templates(client, 1)
+
+    response = await api.get("/templates/", params={"cursor": cursor})
+
+    assert response.status_code == 400
+
+
+async def test_unchanged_page_is_not_modified(api, client):
+    add_templates(client, 2)
+    first = await api.get("/templates/")
+    etag = first.headers["ETag"]
+
+    unchanged = await api.get("/templates/", headers={"If-None-Match": f"W/{etag}"})
+    add_template(client, name="New")
+    changed = await api.get("/templates/", headers={"If-None-Match": etag})
+
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_list_endpoint_documents_the_page_model():
+    app = FastAPI()
+    app.include_router(templates.router, prefix="/templates")
+
+    responses = app.openapi()["paths"]["/templates/"]["get"]["responses"]
+
+    assert responses["200"]["content"]["application/json"]["schema"]["type"] == "array"
+    assert "X-Next-Cursor" in responses["200"]["headers"]
+    assert "304" in responses
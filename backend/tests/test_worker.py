@@ -0,0 +1,112 @@
+import os
+import time
+from pathlib import Path
+from unittest import mock
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.pdf import worker
+
+
+class FakeEngine:
+    """Stands in for the browser: the "PDF" is the HTML it was given."""
+
+    is_ready = True
+    capacity = 1
+    active = queued = 0
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def generate_pdf(self, html, options, priority, tenant):
+        return b"%PDF " + html.encode()
+
+
+@pytest.fixture
+def spool(tmp_path):
+    path = tmp_path / "spool"
+    path.mkdir()
+    return path
+
+
+async def post_job(spool, job: dict, spool_files: bool = True) -> httpx.Response:
+    with mock.patch.object(worker, "PDFEngine", FakeEngine):
+        app = worker.create_worker_app(spool_dir=str(spool), spool_files=spool_files)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://worker") as client:
+        return await client.post("/render/pdf", json=job)
+
+
+def spool_name(suffix: str = "html") -> str:
+    return f"pdfgen-{uuid4().hex}.{suffix}"
+
+
+async def test_spool_files_are_exchanged(spool):
+    html_path = spool / spool_name()
+    html_path.write_text("<p>hi</p>")
+
+    response = await post_job(spool, {"html_path": str(html_path), "output_to_file": True})
+
+    assert response.status_code == 200
+    output = Path(response.json()["path"])
+    assert output.parent == spool.resolve()
+    assert worker.SPOOL_FILE_PATTERN.fullmatch(output.name)
+    assert output.read_bytes() == b"%PDF <p>hi</p>"
+    assert not html_path.exists()
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["secrets.txt", "pdfgen-evil.html", spool_name("out"), f"nested/{spool_name()}"],
+)
+async def test_only_spool_files_are_read(spool, name):
+    target = spool / name
+    target.parent.mkdir(exist_ok=True)
+    target.write_text("private")
+
+    response = await post_job(spool, {"html_path": str(target)})
+
+    assert response.status_code == 400
+    assert target.read_text() == "private"
+
+
+async def test_paths_leaving_the_spool_are_rejected(spool, tmp_path):
+    outside = tmp_path / spool_name()
+    outside.write_text("private")
+    link = spool / spool_name()
+    link.symlink_to(outside)
+
+    for path in [outside, spool / ".." / outside.name, link]:
+        response = await post_job(spool, {"html_path": str(path)})
+        assert response.status_code == 400
+    assert outside.exists()
+
+
+@pytest.mark.parametrize("job", [{"html_path": "x"}, {"html": "<p/>", "output_to_file": True}])
+async def test_tcp_workers_refuse_spool_files(spool, job):
+    response = await post_job(spool, job, spool_files=False)
+
+    assert response.status_code == 400
+    assert list(spool.iterdir()) == []
+
+
+async def test_tcp_workers_render_inline_html(spool):
+    response = await post_job(spool, {"html": "<p/>"}, spool_files=False)
+
+    assert response.content == b"%PDF <p/>"
+
+
+def test_sweep_removes_only_stale_spool_files(spool):
+    stale, fresh = spool / spool_name("out"), spool / spool_name()
+    other = spool / "pdfgen-not-ours.txt"
+    for path in (stale, fresh, other):
+        path.write_text("x")
+    old = time.time() - 120
+    os.utime(stale, (old, old))
+    os.utime(other, (old, old))
+
+    assert worker.sweep_spool(spool, max_age=60) == 1
+    assert not stale.exists()
+    assert fresh.exists() and other.exists()